@@ -0,0 +1,159 @@
+"""Benchmark the scandir scan engine against the original pathlib-based parser.
+
+Usage:
+    python benchmarks/parser_benchmark.py [--dirs N] [--files-per-dir N] [--fanout N]
+
+A synthetic tree is generated in a temporary directory, then parsed by both implementations. Filesystem calls
+are counted on a separate instrumented run so that the instrumentation does not skew wall-clock timings.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from collections import Counter
+from collections.abc import Callable, Iterator
+from pathlib import Path, PurePath
+from typing import Any
+
+from dirstuff.summary.filter_criteria import FilterCriteria
+from dirstuff.summary.parser import Parser
+from dirstuff.summary.tree import Tree
+
+# ruff: noqa: T201
+
+
+def legacy_parse(root_dirpath: Path) -> Tree:
+    """Parse a directory the way dirstuff did before the scandir engine."""
+    tree = Tree(root_dirpath)
+    child_paths = [PurePath.joinpath(root_dirpath, f) for f in Path.iterdir(root_dirpath)]
+
+    total_files_size = 0
+    child_files = [p for p in child_paths if Path.is_file(p)]  # type: ignore[arg-type]
+    for child_file in child_files:
+        total_files_size += Path(child_file).stat().st_size
+
+    total_size = 0
+    child_paths = [p for p in child_paths if Path.is_dir(p)]  # type: ignore[arg-type]
+    for child_path in child_paths:
+        if Path.is_symlink(child_path):  # type: ignore[arg-type]
+            continue
+        child_tree = legacy_parse(child_path)  # type: ignore[arg-type]
+        total_size += child_tree.get_size()
+        tree.add_child(child_tree)
+
+    tree.set_size(total_files_size + total_size)
+    return tree
+
+
+def make_tree(root: Path, n_dirs: int, files_per_dir: int, fanout: int) -> None:
+    """Generate a synthetic directory tree breadth-first."""
+    dirpaths = [root]
+    for i in range(1, n_dirs):
+        dirpath = dirpaths[(i - 1) // fanout] / f"dir_{i}"
+        dirpath.mkdir()
+        dirpaths.append(dirpath)
+    for dirpath in dirpaths:
+        for j in range(files_per_dir):
+            (dirpath / f"file_{j}.bin").write_bytes(b"x" * (j + 1))
+
+
+class _CountingEntry:
+    """Directory entry proxy that counts the stat calls which reach the filesystem."""
+
+    def __init__(self, entry: os.DirEntry, counter: Counter):
+        self._entry = entry
+        self._counter = counter
+        self.name = entry.name
+        self.path = entry.path
+
+    def is_dir(self, *, follow_symlinks: bool = True) -> bool:
+        return self._entry.is_dir(follow_symlinks=follow_symlinks)
+
+    def is_file(self, *, follow_symlinks: bool = True) -> bool:
+        return self._entry.is_file(follow_symlinks=follow_symlinks)
+
+    def stat(self, *, follow_symlinks: bool = True) -> os.stat_result:
+        self._counter["stat"] += 1
+        return self._entry.stat(follow_symlinks=follow_symlinks)
+
+
+class _CountingScandir:
+    """Context manager proxy for os.scandir that wraps each entry."""
+
+    def __init__(self, iterator: Any, counter: Counter):
+        self._iterator = iterator
+        self._counter = counter
+
+    def __enter__(self) -> "_CountingScandir":
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self._iterator.close()
+
+    def __iter__(self) -> Iterator[_CountingEntry]:
+        for entry in self._iterator:
+            yield _CountingEntry(entry, self._counter)
+
+
+def count_calls(fn: Callable[[Path], Tree], root: Path) -> Counter:
+    """Run a parse function with the os module instrumented to count filesystem calls."""
+    counter: Counter = Counter()
+    originals = {name: getattr(os, name) for name in ("stat", "lstat", "listdir", "scandir")}
+
+    def wrap(name: str) -> Callable[..., Any]:
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            counter[name] += 1
+            result = originals[name](*args, **kwargs)
+            if name == "scandir":
+                return _CountingScandir(result, counter)
+            return result
+
+        return wrapper
+
+    try:
+        for name in originals:
+            setattr(os, name, wrap(name))
+        fn(root)
+    finally:
+        for name, original in originals.items():
+            setattr(os, name, original)
+    return counter
+
+
+def time_calls(fn: Callable[[Path], Tree], root: Path, repeat: int) -> float:
+    """Return the best wall-clock time of several runs."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(root)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    """Run the benchmark."""
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--dirs", type=int, default=2000)
+    arg_parser.add_argument("--files-per-dir", type=int, default=10)
+    arg_parser.add_argument("--fanout", type=int, default=8)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    args = arg_parser.parse_args()
+
+    parser = Parser(filter_criteria=FilterCriteria(min_bytes=0))
+    implementations: dict[str, Callable[[Path], Tree]] = {"legacy": legacy_parse, "scandir": parser.parse}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        make_tree(root, args.dirs, args.files_per_dir, args.fanout)
+        print(f"Tree: {args.dirs} dirs, {args.dirs * args.files_per_dir} files")
+        print(f"{'engine':<10} {'calls':>10} {'seconds':>10}   breakdown")
+        for name, fn in implementations.items():
+            counter = count_calls(fn, root)
+            seconds = time_calls(fn, root, args.repeat)
+            breakdown = ", ".join(f"{k}={v}" for k, v in sorted(counter.items()))
+            print(f"{name:<10} {sum(counter.values()):>10} {seconds:>10.3f}   {breakdown}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,15 @@
 import importlib.metadata
 
+from dirstuff.os.digest_cache import DigestCache
 from dirstuff.os.filesystem import Dir, File, Path
+from dirstuff.os.rename_plan import RenamePlan
 
 __version__ = importlib.metadata.version("dirstuff")
 
 __all__ = [
+    "DigestCache",
     "Dir",
     "File",
     "Path",
+    "RenamePlan",
 ]
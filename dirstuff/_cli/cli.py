@@ -1,12 +1,28 @@
+import heapq
+import json
 import logging
+import sys
+from dataclasses import asdict
 from pathlib import Path
+from typing import Any, Callable, Iterator
 
 import click
 
+from dirstuff.os.digest_cache import DigestCache
+from dirstuff.os.filesystem import Dir
+from dirstuff.os.rename_plan import RenameTargets
+from dirstuff.summary.array_tree import ArrayTree
+from dirstuff.summary.duplicates import DuplicateFinder, total_reclaimable_bytes
+from dirstuff.summary.extension_histogram import ExtensionHistogram
 from dirstuff.summary.filter_criteria import FilterCriteria
-from dirstuff.summary.memory_utilities import size_str_to_bytes
+from dirstuff.summary.largest_files import LargestFiles
+from dirstuff.summary.memory_utilities import size_str_to_bytes, to_size_str
+from dirstuff.summary.name_index import NameMatch
 from dirstuff.summary.parser import Parser
-from dirstuff.summary.tree import Tree
+from dirstuff.summary.render import OutputFormat, RenderEntry, render
+from dirstuff.summary.scan_boundaries import ScanBoundaries
+from dirstuff.summary.scan_cache import ScanCache
+from dirstuff.summary.tree import Tree, TreeView
 
 logger = logging.getLogger(__name__)
 
@@ -16,13 +32,113 @@ def main() -> None:
     pass
 
 
-def get_tree(root: Path, min_size_str: str) -> Tree:
-    min_bytes = size_str_to_bytes(min_size_str)
+def walk_options(command: Callable[..., None]) -> Callable[..., None]:
+    """Add the options that control how a directory is walked, which are passed through to get_parser."""
+    options = [
+        click.option(
+            "--workers", type=click.IntRange(min=1), default=1, help="Number of threads scanning directories."
+        ),
+        click.option(
+            "--processes", type=click.IntRange(min=1), default=1, help="Number of processes scanning subtrees."
+        ),
+        click.option(
+            "--one-file-system", "-x", "one_filesystem", is_flag=True, help="Skip directories on other filesystems."
+        ),
+        click.option("--exclude", "exclude_paths", multiple=True, type=str, help="Directory to skip. Repeatable."),
+        click.option(
+            "--exclude-fstype", "exclude_fs_types", multiple=True, type=str, help="Filesystem type to skip. Repeatable."
+        ),
+    ]
+    for option in reversed(options):
+        command = option(command)
+    return command
+
+
+def scan_options(command: Callable[..., None]) -> Callable[..., None]:
+    """Add the options that control how a directory tree is scanned, which are passed through to get_tree."""
+    options: list[Callable[[Callable[..., None]], Callable[..., None]]] = [
+        walk_options,
+        click.option("--cache", "cache_path", type=Path, help="File caching directory listings between scans."),
+        click.option(
+            "--from-snapshot",
+            type=bool,
+            is_flag=True,
+            help="Treat ROOT as a snapshot saved by --save, which is loaded as a compact tree.",
+        ),
+        click.option("--save", "save_path", type=Path, help="Save the scan to a snapshot file."),
+        click.option("--compact", type=bool, is_flag=True, help="Hold the scan in a compact array-backed tree."),
+    ]
+    for option in reversed(options):
+        command = option(command)
+    return command
+
+
+def get_parser(
+    min_bytes: int,
+    workers: int = 1,
+    processes: int = 1,
+    cache_path: Path | None = None,
+    boundaries: ScanBoundaries | None = None,
+    largest_files: LargestFiles | None = None,
+    count_extensions: bool = False,
+) -> Parser:
+    if cache_path is not None and processes > 1:
+        msg = "--cache cannot be shared between processes, so it cannot be combined with --processes"
+        raise click.UsageError(msg)
     filter_criteria = FilterCriteria(min_bytes=min_bytes)
-    parser = Parser(filter_criteria=filter_criteria)
-    absolute_root = Path.absolute(root)
-    tree = parser.parse(absolute_root)
-    filtered = tree.filter(filter_criteria)
+    cache = None if cache_path is None else ScanCache.load(cache_path)
+    return Parser(
+        filter_criteria=filter_criteria,
+        workers=workers,
+        processes=processes,
+        cache=cache,
+        boundaries=boundaries,
+        largest_files=largest_files,
+        count_extensions=count_extensions,
+    )
+
+
+def save_cache(parser: Parser) -> None:
+    cache = parser.cache
+    if cache is None:
+        return
+    cache.save()
+    n_reads = cache.hits + cache.misses
+    click.echo(f"Scan cache hit rate: {cache.hit_rate:.1%} ({cache.hits}/{n_reads} directories)", err=True)
+
+
+def get_tree(
+    root: Path,
+    min_size_str: str,
+    workers: int = 1,
+    processes: int = 1,
+    one_filesystem: bool = False,
+    exclude_paths: tuple[str, ...] = (),
+    exclude_fs_types: tuple[str, ...] = (),
+    cache_path: Path | None = None,
+    from_snapshot: bool = False,
+    save_path: Path | None = None,
+    compact: bool = False,
+) -> ArrayTree | TreeView:
+    filter_criteria = FilterCriteria(min_bytes=size_str_to_bytes(min_size_str))
+    # A saved snapshot keeps every directory, so that it can be explored later with any size threshold
+    scan_min_bytes = 0 if save_path is not None else filter_criteria.min_bytes
+    boundaries = ScanBoundaries(one_filesystem, list(exclude_paths), list(exclude_fs_types))
+    parser = get_parser(scan_min_bytes, workers, processes, cache_path, boundaries)
+    tree: Tree | ArrayTree
+    if from_snapshot:
+        # A snapshot stores the columns of a compact tree, which are read in bulk without building a tree of objects
+        tree = ArrayTree.load(root)
+    else:
+        absolute_root = Path.absolute(root)
+        if compact:
+            tree = ArrayTree.from_records(absolute_root, parser.parse_records(absolute_root))
+        else:
+            tree = parser.parse(absolute_root)
+        save_cache(parser)
+    if save_path is not None:
+        tree.save(save_path)
+    filtered = tree.filter(filter_criteria) if isinstance(tree, ArrayTree) else tree.filter(filter_criteria, lazy=True)
     if filtered is None:
         msg = "No paths matched filters"
         raise ValueError(msg)
@@ -33,23 +149,245 @@ def get_tree(root: Path, min_size_str: str) -> Tree:
 @click.argument("root", type=Path)
 @click.option("--size", "min_size_str", type=str, default="10MB", help="Minimum size of directory to show.")
 @click.option("--absolute", type=bool, is_flag=True, help="Print the absolute directory paths.")
+@click.option("--stream", type=bool, is_flag=True, help="Print NDJSON records as each subtree completes.")
+@click.option(
+    "--format",
+    "output_format",
+    type=click.Choice(["text", "json", "ndjson", "csv"]),
+    default="text",
+    help="Output format. Formats other than text always use absolute paths.",
+)
+@click.option("--max-depth", type=click.IntRange(min=0), help="Deepest level of directories to show.")
+@click.option("--limit", type=click.IntRange(min=1), help="Number of largest subdirectories to show per directory.")
+@scan_options
 def tree_command(
     root: Path,
     min_size_str: str,
     absolute: bool,
+    stream: bool,
+    output_format: OutputFormat,
+    max_depth: int | None,
+    limit: int | None,
+    **scan_kwargs: Any,
 ) -> None:
-    tree = get_tree(root, min_size_str)
-    tree.print(absolute=absolute)
+    if stream:
+        stream_tree(root, min_size_str, **scan_kwargs)
+        return
+    tree = get_tree(root, min_size_str, **scan_kwargs)
+    entries = tree.walk(absolute=absolute or output_format != "text", max_depth=max_depth, limit=limit)
+    render(entries, sys.stdout, output_format=output_format)
+
+
+def stream_tree(
+    root: Path,
+    min_size_str: str,
+    workers: int = 1,
+    processes: int = 1,
+    one_filesystem: bool = False,
+    exclude_paths: tuple[str, ...] = (),
+    exclude_fs_types: tuple[str, ...] = (),
+    cache_path: Path | None = None,
+    from_snapshot: bool = False,
+    save_path: Path | None = None,
+    compact: bool = False,
+) -> None:
+    if from_snapshot or save_path is not None or compact or workers > 1 or processes > 1:
+        msg = "--stream scans with a single worker and cannot be combined with snapshots or --compact"
+        raise click.UsageError(msg)
+    boundaries = ScanBoundaries(one_filesystem, list(exclude_paths), list(exclude_fs_types))
+    parser = get_parser(size_str_to_bytes(min_size_str), cache_path=cache_path, boundaries=boundaries)
+    for summary in parser.stream(Path.absolute(root)):
+        click.echo(json.dumps(asdict(summary)))
+    save_cache(parser)
 
 
 @main.command(name="search")
 @click.argument("root", type=Path)
-@click.argument("dir_name", type=str)
+@click.argument("dir_names", nargs=-1, required=True, type=str)
 @click.option("--size", "min_size_str", type=str, default="10MB", help="Minimum size of directory to show.")
+@click.option(
+    "--match",
+    type=click.Choice(["exact", "glob", "regex"]),
+    default="exact",
+    help="Match names exactly, or as glob or regex patterns.",
+)
+@scan_options
 def search_command(
     root: Path,
-    dir_name: str,
+    dir_names: tuple[str, ...],
+    min_size_str: str,
+    match: NameMatch,
+    **scan_kwargs: Any,
+) -> None:
+    tree = get_tree(root, min_size_str, **scan_kwargs)
+    tree.print_search(dir_name=dir_names, match=match)
+
+
+@main.command(name="top")
+@click.argument("root", type=Path)
+@click.option("-n", "--count", type=click.IntRange(min=1), default=20, help="Number of directories to show.")
+@click.option("--depth", "max_depth", type=click.IntRange(min=1), help="Deepest level of directories to include.")
+@click.option("--size", "min_size_str", type=str, default="0B", help="Minimum size of directory to consider.")
+@scan_options
+def top_command(
+    root: Path,
+    count: int,
+    max_depth: int | None,
+    min_size_str: str,
+    **scan_kwargs: Any,
+) -> None:
+    tree = get_tree(root, min_size_str, **scan_kwargs)
+    entries: Iterator[RenderEntry]
+    if isinstance(tree, ArrayTree):
+        indices = tree.top_k(count, max_depth=max_depth)
+        entries = ((str(tree.get_path(index)), tree.get_size(index), 0) for index in indices)
+    else:
+        subtrees = tree.top_k(count, max_depth=max_depth)
+        entries = ((str(subtree.path), subtree.get_size(), 0) for subtree in subtrees)
+    render(entries, sys.stdout)
+
+
+def load_or_scan(root: Path, workers: int) -> Tree:
+    if root.is_file():
+        return Tree.load(root)
+    parser = get_parser(0, workers=workers)
+    return parser.parse(Path.absolute(root))
+
+
+@main.command(name="diff")
+@click.argument("old", type=Path)
+@click.argument("new", type=Path)
+@click.option("-n", "--count", type=click.IntRange(min=1), default=20, help="Number of changes to show.")
+@click.option("--size", "min_size_str", type=str, default="0B", help="Minimum change in size to show.")
+@click.option("--workers", type=click.IntRange(min=1), default=1, help="Number of threads scanning directories.")
+def diff_command(
+    old: Path,
+    new: Path,
+    count: int,
+    min_size_str: str,
+    workers: int,
+) -> None:
+    min_bytes = size_str_to_bytes(min_size_str)
+    old_tree = load_or_scan(old, workers)
+    new_tree = load_or_scan(new, workers)
+    for delta in old_tree.diff(new_tree, limit=count):
+        if abs(delta.delta) >= min_bytes:
+            delta.print()
+
+
+@main.command(name="files")
+@click.argument("root", type=Path)
+@click.option("--top", "n_files", type=click.IntRange(min=1), default=20, help="Number of largest files to show.")
+@click.option("--per-dir", "n_files_per_dir", type=click.IntRange(min=1), help="Show the largest files per directory.")
+@walk_options
+def files_command(
+    root: Path,
+    n_files: int,
+    n_files_per_dir: int | None,
+    workers: int,
+    processes: int,
+    one_filesystem: bool,
+    exclude_paths: tuple[str, ...],
+    exclude_fs_types: tuple[str, ...],
+) -> None:
+    largest_files = LargestFiles(n_files, n_files_per_dir)
+    boundaries = ScanBoundaries(one_filesystem, list(exclude_paths), list(exclude_fs_types))
+    parser = get_parser(0, workers, processes, boundaries=boundaries, largest_files=largest_files)
+    parser.parse(Path.absolute(root))
+    if n_files_per_dir is None:
+        entries = [(file.path, file.size, 0) for file in largest_files.get_largest()]
+    else:
+        # Files are grouped by directory, with directories in order of their largest file and limited to --top
+        files_by_dir = largest_files.get_largest_by_dir()
+        dirpaths = heapq.nlargest(n_files, files_by_dir, key=lambda dirpath: files_by_dir[dirpath][0].size)
+        entries = [(file.path, file.size, 0) for dirpath in dirpaths for file in files_by_dir[dirpath]]
+    render(entries, sys.stdout)
+
+
+@main.command(name="types")
+@click.argument("root", type=Path)
+@click.option("--top", "n_types", type=click.IntRange(min=1), default=20, help="Number of extensions to show.")
+@walk_options
+def types_command(
+    root: Path,
+    n_types: int,
+    workers: int,
+    processes: int,
+    one_filesystem: bool,
+    exclude_paths: tuple[str, ...],
+    exclude_fs_types: tuple[str, ...],
+) -> None:
+    boundaries = ScanBoundaries(one_filesystem, list(exclude_paths), list(exclude_fs_types))
+    parser = get_parser(0, workers, processes, boundaries=boundaries, count_extensions=True)
+    tree = parser.parse(Path.absolute(root))
+    extensions = tree.extensions or ExtensionHistogram()
+    entries = [
+        (f"{summary.extension or '(no extension)'} ({summary.n_files} files)", summary.size, 0)
+        for summary in extensions.get_largest(n_types)
+    ]
+    render(entries, sys.stdout)
+
+
+@main.command(name="dupes")
+@click.argument("root", type=Path)
+@click.option("--workers", type=click.IntRange(min=1), default=8, help="Number of threads hashing files.")
+@click.option("--min-size", "min_size_str", type=str, default="1B", help="Minimum size of file to compare.")
+@click.option("--top", "n_groups", type=click.IntRange(min=1), help="Number of groups of duplicates to show.")
+@click.option("--digest-cache", "digest_cache_path", type=Path, help="Database caching file digests between runs.")
+def dupes_command(
+    root: Path,
+    workers: int,
     min_size_str: str,
+    n_groups: int | None,
+    digest_cache_path: Path | None,
+) -> None:
+    cache = None if digest_cache_path is None else DigestCache(digest_cache_path)
+    try:
+        finder = DuplicateFinder(workers=workers, min_size=size_str_to_bytes(min_size_str), cache=cache)
+        groups = finder.find(Dir(Path.absolute(root)))
+    finally:
+        if cache is not None:
+            cache.close()
+    entries: list[RenderEntry] = []
+    for group in groups[:n_groups]:
+        entries.append((f"{len(group.files)} copies of {to_size_str(group.size).strip()}", group.reclaimable_bytes, 0))
+        entries.extend((str(file), group.size, 1) for file in group.files)
+    render(entries, sys.stdout)
+    reclaimable_str = to_size_str(total_reclaimable_bytes(groups)).strip()
+    click.echo(f"{len(groups)} groups of duplicates, {reclaimable_str} reclaimable", err=True)
+
+
+@main.command(name="rename")
+@click.argument("root", type=Path)
+@click.argument("pattern", type=str)
+@click.argument("replace", type=str)
+@click.option(
+    "--type",
+    "targets",
+    type=click.Choice(["files", "dirs", "all"]),
+    default="files",
+    help="Kind of entries to rename.",
+)
+@click.option("--recursive/--no-recursive", default=True, help="Rename entries in subdirectories too.")
+@click.option("--dry-run", type=bool, is_flag=True, help="Show the renames without applying them.")
+def rename_command(
+    root: Path,
+    pattern: str,
+    replace: str,
+    targets: RenameTargets,
+    recursive: bool,
+    dry_run: bool,
 ) -> None:
-    tree = get_tree(root, min_size_str)
-    tree.print_search(dir_name=dir_name)
+    plan = Dir(root).plan_rename_regex(pattern, replace, targets=targets, recursive=recursive)
+    if dry_run:
+        sys.stdout.write("".join(f"{rename.source} -> {rename.target}\n" for rename in plan.renames))
+    if plan.conflicts:
+        conflicts_str = "".join(f"{rename.source} -> {rename.target}\n" for rename in plan.conflicts)
+        click.echo(f"{len(plan.conflicts)} renames conflict with existing names:\n{conflicts_str}", err=True, nl=False)
+        if not dry_run:
+            msg = "Nothing was renamed"
+            raise click.ClickException(msg)
+    if dry_run:
+        click.echo(f"{len(plan)} paths would be renamed", err=True)
+    else:
+        click.echo(f"{plan.apply()} paths renamed", err=True)
@@ -0,0 +1,130 @@
+import hashlib
+import mmap
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from types import TracebackType
+
+# Files at least this large are hashed through a memory map rather than read into a buffer
+_MMAP_THRESHOLD = 64 * 1024 * 1024
+
+# Size of the reads used to hash files smaller than the memory map threshold
+_READ_SIZE = 1024 * 1024
+
+# Number of new digests written before they are committed to the database
+_COMMIT_INTERVAL = 1000
+
+# Inode numbers are unsigned 64-bit values but SQLite integers are signed
+_INT64_OFFSET = 2**63
+
+
+def hash_file(path: Path, algorithm: str) -> str:
+    """Hash the contents of a file in large chunks, or through a memory map for large files.
+
+    Args:
+        path (Path): The file to hash.
+        algorithm (str): The hashlib algorithm to use, such as "sha256" or "blake2b".
+
+    Returns:
+        str: The hex digest of the file's contents.
+    """
+    hasher = hashlib.new(algorithm)
+    with path.open("rb", buffering=0) as file:
+        if os.fstat(file.fileno()).st_size >= _MMAP_THRESHOLD:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                hasher.update(mapped)
+        else:
+            buffer = bytearray(_READ_SIZE)
+            view = memoryview(buffer)
+            while n_read := file.readinto(buffer):
+                hasher.update(view[:n_read])
+    return hasher.hexdigest()
+
+
+class DigestCache:
+    """A persistent cache of file digests stored in an SQLite database.
+
+    A digest is reused while the file has the same device, inode, size and modification time as when it was
+    hashed, so unchanged files are never read again. Files modified shortly before they were hashed are not cached,
+    since a change in the same mtime tick would go unnoticed.
+    """
+
+    def __init__(self, path: Path | str = ":memory:", racy_window_ns: int = 2 * 10**9):
+        """Construct a DigestCache object.
+
+        Args:
+            path (Path | str): The database file, which is created if it does not exist. Defaults to ":memory:", for
+                an in-memory cache.
+            racy_window_ns (int): Files modified this recently before they were hashed are not cached. Defaults to
+                two seconds.
+        """
+        self.path = path
+        self.racy_window_ns = racy_window_ns
+        self.hits = 0
+        self.misses = 0
+        self._n_uncommitted = 0
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS digests ("
+            "device INTEGER, inode INTEGER, algorithm TEXT, size INTEGER, mtime_ns INTEGER, digest TEXT, "
+            "PRIMARY KEY (device, inode, algorithm))"
+        )
+
+    def __enter__(self) -> "DigestCache":
+        """Enter a context that closes the cache on exit."""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Commit and close the cache."""
+        self.close()
+
+    def close(self) -> None:
+        """Commit any new digests and close the database."""
+        with self._lock:
+            self._connection.commit()
+            self._connection.close()
+
+    def digest(self, path: Path, algorithm: str) -> str:
+        """Get the digest of a file, hashing it only if it has changed since it was last hashed.
+
+        Args:
+            path (Path): The file to hash.
+            algorithm (str): The hashlib algorithm to use.
+
+        Returns:
+            str: The hex digest of the file's contents.
+        """
+        stat = path.stat()
+        # Only one entry is kept per inode, so a changed file replaces its stale digest rather than adding to it
+        key = (stat.st_dev - _INT64_OFFSET, stat.st_ino - _INT64_OFFSET, algorithm)
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT size, mtime_ns, digest FROM digests WHERE device = ? AND inode = ? AND algorithm = ?", key
+            ).fetchone()
+        if row is not None and (row[0], row[1]) == (stat.st_size, stat.st_mtime_ns):
+            with self._lock:
+                self.hits += 1
+            return row[2]
+
+        hash_time_ns = time.time_ns()
+        file_digest = hash_file(path, algorithm)
+        with self._lock:
+            self.misses += 1
+            if stat.st_mtime_ns < hash_time_ns - self.racy_window_ns:
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO digests VALUES (?, ?, ?, ?, ?, ?)",
+                    (*key, stat.st_size, stat.st_mtime_ns, file_digest),
+                )
+                self._n_uncommitted += 1
+                if self._n_uncommitted >= _COMMIT_INTERVAL:
+                    self._connection.commit()
+                    self._n_uncommitted = 0
+        return file_digest
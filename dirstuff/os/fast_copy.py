@@ -0,0 +1,156 @@
+import errno
+import io
+import os
+import shutil
+import sys
+from collections.abc import Callable
+from pathlib import Path
+from typing import Literal
+
+# How the data of a file was copied, from cheapest to most expensive
+CopyStrategy = Literal["reflink", "copy_file_range", "sendfile", "buffered"]
+
+# A function copying up to a number of bytes between two file descriptors in the kernel, returning the bytes copied
+_KernelCopy = Callable[[int, int, int], int]
+
+# The ioctl request that clones a file on copy-on-write filesystems like btrfs and XFS
+_FICLONE = 0x40049409
+
+# Errors meaning a strategy is not supported for these files, rather than that copying failed
+_UNSUPPORTED_ERRNOS = {
+    errno.EBADF,
+    errno.EINVAL,
+    errno.ENOSYS,
+    errno.ENOTSUP,
+    errno.ENOTTY,
+    errno.EOPNOTSUPP,
+    errno.EPERM,
+    errno.EXDEV,
+}
+
+# Largest number of bytes asked for in one call, which Linux caps just under 2GiB anyway
+_MAX_COUNT = 1024 * 1024 * 1024
+
+# Size of the buffer used when data has to be copied through user space
+_BUFFER_SIZE = 1024 * 1024
+
+
+def copy_file(source: Path, target: Path) -> CopyStrategy:
+    """Copy the data of a file, using the cheapest strategy the platform and filesystems support.
+
+    Strategies are tried in order: a copy-on-write clone, which shares the data until either file is changed, then
+    copy_file_range and sendfile, which copy the data inside the kernel, and finally reads and writes through a
+    buffer. Only the data is copied, like shutil.copyfile.
+
+    Args:
+        source (Path): The file to copy.
+        target (Path): The path to copy to, which is replaced if it exists.
+
+    Returns:
+        CopyStrategy: The strategy the data was copied with.
+
+    Raises:
+        shutil.SameFileError: If the target is the source, or a hardlink to it.
+    """
+    with source.open("rb", buffering=0) as source_file:
+        source_stat = os.fstat(source_file.fileno())
+        # The target is only truncated once it is known not to be the source, which truncating would destroy
+        with io.FileIO(os.open(target, os.O_WRONLY | os.O_CREAT, 0o666), "w") as target_file:
+            target_stat = os.fstat(target_file.fileno())
+            if (target_stat.st_dev, target_stat.st_ino) == (source_stat.st_dev, source_stat.st_ino):
+                msg = f"{source} and {target} are the same file"
+                raise shutil.SameFileError(msg)
+            os.ftruncate(target_file.fileno(), 0)
+            return _copy_data(source_file, target_file, source_stat.st_size)
+
+
+def _copy_data(source_file: io.FileIO, target_file: io.FileIO, size: int) -> CopyStrategy:
+    """Copy the whole source into the empty target, trying each strategy in turn."""
+    # Other platforms' sendfile only writes to sockets, so data is only copied in the kernel on Linux
+    if sys.platform == "linux":
+        source_fd, target_fd = source_file.fileno(), target_file.fileno()
+        if _try_reflink(source_fd, target_fd):
+            return "reflink"
+        if hasattr(os, "copy_file_range") and _try_kernel_copy(os.copy_file_range, source_fd, target_fd, size):
+            return "copy_file_range"
+        if hasattr(os, "sendfile") and _try_kernel_copy(_sendfile, source_fd, target_fd, size):
+            return "sendfile"
+    _copy_buffered(source_file, target_file)
+    return "buffered"
+
+
+def copy_range(source_file: io.FileIO, target_file: io.FileIO, offset: int, length: int) -> CopyStrategy:
+    """Copy a range of bytes to the same offset in another file, inside the kernel where the platform supports it.
+
+    Args:
+        source_file (io.FileIO): The unbuffered file to copy from.
+        target_file (io.FileIO): The unbuffered file to copy to.
+        offset (int): The offset of the range in both files.
+        length (int): The number of bytes to copy, which may run past the end of the source.
+
+    Returns:
+        CopyStrategy: The strategy the range was copied with.
+    """
+    end = offset + length
+    if sys.platform == "linux" and hasattr(os, "copy_file_range"):
+        source_fd, target_fd = source_file.fileno(), target_file.fileno()
+        position = offset
+        try:
+            while position < end:
+                n_sent = os.copy_file_range(source_fd, target_fd, min(_MAX_COUNT, end - position), position, position)
+                if n_sent == 0:
+                    break
+                position += n_sent
+        except OSError as error:
+            if position > offset or error.errno not in _UNSUPPORTED_ERRNOS:
+                raise
+        if position > offset:
+            return "copy_file_range"
+    source_file.seek(offset)
+    target_file.seek(offset)
+    _copy_buffered(source_file, target_file, length)
+    return "buffered"
+
+
+def _try_reflink(source_fd: int, target_fd: int) -> bool:
+    import fcntl
+
+    try:
+        fcntl.ioctl(target_fd, _FICLONE, source_fd)
+    except OSError as error:
+        if error.errno in _UNSUPPORTED_ERRNOS:
+            return False
+        raise
+    return True
+
+
+def _sendfile(source_fd: int, target_fd: int, count: int) -> int:
+    return os.sendfile(target_fd, source_fd, None, count)
+
+
+def _try_kernel_copy(copy: _KernelCopy, source_fd: int, target_fd: int, size: int) -> bool:
+    """Copy from the current offsets until the end of the source, or return False if nothing could be copied."""
+    n_copied = 0
+    while True:
+        try:
+            n_sent = copy(source_fd, target_fd, _MAX_COUNT)
+        except OSError as error:
+            if n_copied == 0 and error.errno in _UNSUPPORTED_ERRNOS:
+                return False
+            raise
+        # Some filesystems, such as procfs, report nothing to copy for files that are not empty
+        if n_sent == 0:
+            return n_copied > 0 or size == 0
+        n_copied += n_sent
+
+
+def _copy_buffered(source_file: io.FileIO, target_file: io.FileIO, length: int | None = None) -> None:
+    """Copy from the current offsets until the end of the source, or until length bytes are copied."""
+    buffer = bytearray(_BUFFER_SIZE)
+    view = memoryview(buffer)
+    remaining = sys.maxsize if length is None else length
+    while remaining > 0 and (n_read := source_file.readinto(view[: min(_BUFFER_SIZE, remaining)])):
+        remaining -= n_read
+        n_written = 0
+        while n_written < n_read:
+            n_written += target_file.write(view[n_written:n_read])
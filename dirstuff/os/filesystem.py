@@ -1,7 +1,14 @@
 import re
 import shutil
 from pathlib import Path as PathlibPath
-from typing import Any, Iterator, Union
+from typing import Any, Callable, Iterator, Union
+
+from dirstuff.os.digest_cache import DigestCache, hash_file
+from dirstuff.os.fast_copy import copy_file
+from dirstuff.os.parallel_copy import copy_tree
+from dirstuff.os.parallel_delete import DeleteStats, delete_tree
+from dirstuff.os.rename_plan import RenamePlan, RenameTargets, plan_rename
+from dirstuff.os.resumable_move import MoveJournal, move_tree
 
 
 class Path:
@@ -143,80 +150,155 @@ class Dir(Path):
         self.libpath = self.libpath.rename(new_path)
         return self
 
-    def move_into(self, dir: "Dir") -> "Dir":
+    def plan_rename_regex(
+        self,
+        pattern: str,
+        replace: str,
+        *,
+        targets: RenameTargets = "files",
+        recursive: bool = True,
+    ) -> RenamePlan:
+        """Plan a regex rename of the files, directories or both under the directory.
+
+        Nothing is renamed until the plan is applied, so it can be checked for conflicts or shown as a dry run first.
+
+        Args:
+            pattern (str): The regular expression pattern.
+            replace (str): The replacement string.
+            targets (RenameTargets): Whether to rename "files", "dirs" or "all" entries. Defaults to "files".
+            recursive (bool): Whether to rename entries in subdirectories too. Defaults to True.
+
+        Returns:
+            RenamePlan: The planned renames and any conflicts between them.
+
+        Raises:
+            FileNotFoundError: If the directory does not exist.
+        """
+        if not self.exists():
+            msg = f"Dir does not exist: {self.libpath}"
+            raise FileNotFoundError(msg)
+        return plan_rename(str(self.libpath), pattern, replace, targets=targets, recursive=recursive)
+
+    def move_into(self, dir: "Dir", workers: int = 1, journal_path: PathlibPath | None = None) -> "Dir":
         """Move the directory into another directory.
 
         Args:
             dir (Dir): The directory to move into.
+            workers (int): The number of threads moving files when the destination is on another filesystem. With
+                more than one, or with a journal, each file is deleted from the source once its copy is verified.
+                Defaults to 1.
+            journal_path (PathlibPath | None): A file recording the progress of a move to another filesystem, so
+                that an interrupted move resumes when it is run again. It is removed once the move is done. Defaults
+                to None.
 
         Returns:
             Dir: The moved directory.
 
         Raises:
             FileNotFoundError: If the destination directory does not exist.
+            shutil.Error: If any files could not be moved to another filesystem, with the list of failures.
         """
         if not dir.exists():
             msg = f"Destination directory does not exist: {dir.libpath}"
             raise FileNotFoundError(msg)
         path = dir.libpath / self.name
-        shutil.move(self.libpath, path)
+        if (workers == 1 and journal_path is None) or self.libpath.stat().st_dev == dir.libpath.stat().st_dev:
+            shutil.move(self.libpath, path)
+        else:
+            with MoveJournal(":memory:" if journal_path is None else journal_path) as journal:
+                move_tree(str(self.libpath), str(path), workers=workers, journal=journal)
+            if journal_path is not None:
+                journal_path.unlink()
         self.libpath = PathlibPath(path)
         return self
 
-    def copy_to(self, path: Path, overwrite_ok: bool = False) -> "Dir":
+    def copy_to(self, path: Path, overwrite_ok: bool = False, workers: int = 1, symlinks: bool = False) -> "Dir":
         """Copy the directory to another directory.
 
         Args:
             path (Path): The path to copy to.
             overwrite_ok (bool): Whether to allow overwriting the destination directory. Defaults to False.
+            workers (int): The number of threads copying files. With more than one, directories are created first
+                and files are copied concurrently. Defaults to 1.
+            symlinks (bool): Whether to copy symlinks as symlinks rather than copying what they point to. Defaults to
+                False.
 
         Returns:
             Dir: The copied directory.
 
         Raises:
             FileExistsError: If the destination directory already exists and overwrite_ok is False.
+            shutil.Error: If any files could not be copied, with the list of failures.
         """
         if path.exists():
             if not overwrite_ok:
                 msg = f"Destination path already exists: {path.libpath}"
                 raise FileExistsError(msg)
             shutil.rmtree(path.libpath)
-        shutil.copytree(self.libpath, path.libpath)
+        self._copy_tree(path.libpath, workers, symlinks)
         self.libpath = path.libpath
         return self
 
-    def copy_into(self, dir: "Dir") -> "Dir":
+    def copy_into(self, dir: "Dir", workers: int = 1, symlinks: bool = False) -> "Dir":
         """Copy the directory into another directory.
 
         Args:
             dir (Dir): The directory to copy into.
+            workers (int): The number of threads copying files. With more than one, directories are created first
+                and files are copied concurrently. Defaults to 1.
+            symlinks (bool): Whether to copy symlinks as symlinks rather than copying what they point to. Defaults to
+                False.
 
         Returns:
             Dir: The copied directory
+
+        Raises:
+            FileNotFoundError: If the destination directory does not exist.
+            shutil.Error: If any files could not be copied, with the list of failures.
         """
         if not dir.exists():
             msg = f"Destination directory does not exist: {dir.libpath}"
             raise FileNotFoundError(msg)
         path = dir.libpath / self.name
-        shutil.copytree(self.libpath, path)
+        self._copy_tree(path, workers, symlinks)
         self.libpath = path
         return self
 
-    def delete(self, missing_ok: bool = False) -> None:
+    def _copy_tree(self, libpath: PathlibPath, workers: int, symlinks: bool) -> None:
+        if workers == 1:
+            shutil.copytree(self.libpath, libpath, symlinks=symlinks)
+        else:
+            copy_tree(str(self.libpath), str(libpath), workers=workers, symlinks=symlinks)
+
+    def delete(
+        self,
+        missing_ok: bool = False,
+        workers: int = 1,
+        progress: Callable[[DeleteStats], None] | None = None,
+    ) -> None:
         """Delete the directory.
 
         Args:
             missing_ok (bool): Whether to allow the directory to be missing. Defaults to False.
+            workers (int): The number of threads deleting subtrees. With more than one, entries are removed relative
+                to open directory descriptors and every entry that can be removed is removed before any failures are
+                raised. Defaults to 1.
+            progress (Callable[[DeleteStats], None] | None): A function called with the running totals as entries
+                are removed, when there is more than one worker. Defaults to None.
 
         Raises:
             FileNotFoundError: If the directory does not exist and missing_ok is False.
+            shutil.Error: If any entries could not be removed by several workers, with the list of failures.
         """
         if not self.exists():
             if not missing_ok:
                 msg = f"Dir does not exist: {self.libpath}"
                 raise FileNotFoundError(msg)
             return
-        shutil.rmtree(self.libpath)
+        if workers == 1:
+            shutil.rmtree(self.libpath)
+        else:
+            delete_tree(str(self.libpath), workers=workers, progress=progress)
 
     def make(self, parents: bool = True, exist_ok: bool = True) -> "Dir":
         """Create the directory on disk.
@@ -344,6 +426,8 @@ class File(Path):
     def copy_to(self, path: Path, overwrite_ok: bool = False) -> "File":
         """Copy the file to another path.
 
+        The data is cloned or copied inside the kernel where the platform and filesystems support it.
+
         Args:
             path (Path): The path to copy to.
             overwrite_ok (bool): Whether to allow overwriting the destination directory. Defaults to False.
@@ -353,19 +437,25 @@ class File(Path):
 
         Raises:
             FileExistsError: If the destination directory already exists and overwrite_ok is False.
+            shutil.SameFileError: If the destination is the file itself, or a hardlink to it.
         """
         if path.exists():
             if not overwrite_ok:
                 msg = f"Destination path already exists: {path.libpath}"
                 raise FileExistsError(msg)
+            if self.libpath.samefile(path.libpath):
+                msg = f"{self.libpath} and {path.libpath} are the same file"
+                raise shutil.SameFileError(msg)
             path.libpath.unlink(missing_ok=True)
-        shutil.copy(self.libpath, path.libpath)
+        self._copy_file(path.libpath)
         self.libpath = path.libpath
         return self
 
     def copy_into(self, dir: Dir) -> "File":
         """Copy the file into a directory.
 
+        The data is cloned or copied inside the kernel where the platform and filesystems support it.
+
         Args:
             dir (Dir): The directory to copy into.
 
@@ -374,15 +464,20 @@ class File(Path):
 
         Raises:
             FileNotFoundError: If the destination directory does not exist.
+            shutil.SameFileError: If the destination is the file itself, or a hardlink to it.
         """
         if not dir.exists():
             msg = f"Destination directory does not exist: {dir.libpath}"
             raise FileNotFoundError(msg)
         path = dir.libpath / self.name
-        shutil.copy(self.libpath, path)
+        self._copy_file(path)
         self.libpath = path
         return self
 
+    def _copy_file(self, libpath: PathlibPath) -> None:
+        copy_file(self.libpath, libpath)
+        shutil.copymode(self.libpath, libpath)
+
     def delete(self, missing_ok: bool = False) -> None:
         """Delete the file.
 
@@ -394,6 +489,27 @@ class File(Path):
             raise FileNotFoundError(msg)
         self.libpath.unlink(missing_ok=missing_ok)
 
+    def digest(self, algorithm: str = "sha256", cache: DigestCache | None = None) -> str:
+        """Hash the contents of the file.
+
+        Args:
+            algorithm (str): The hashlib algorithm to use. Defaults to "sha256".
+            cache (DigestCache | None): A persistent cache of digests to reuse while the file is unchanged. Defaults
+                to None.
+
+        Returns:
+            str: The hex digest of the file's contents.
+
+        Raises:
+            FileNotFoundError: If the file does not exist.
+        """
+        if not self.exists():
+            msg = f"File does not exist: {self.libpath}"
+            raise FileNotFoundError(msg)
+        if cache is None:
+            return hash_file(self.libpath, algorithm)
+        return cache.digest(self.libpath, algorithm)
+
     @property
     def name_no_extension(self) -> str:
         """Get the name of the file without the file extension.
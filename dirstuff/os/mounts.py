@@ -0,0 +1,41 @@
+import re
+from collections.abc import Collection
+from pathlib import Path
+
+# The Linux mount table, which lists one mount per line as: device, mount point, type, options, dump, pass
+MOUNT_TABLE_PATH = Path("/proc/self/mounts")
+_MOUNT_POINT_FIELD = 1
+_FS_TYPE_FIELD = 2
+
+# Whitespace and backslashes in mount points are written as three-digit octal escapes
+_OCTAL_ESCAPE_PATTERN = re.compile(r"\\([0-7]{3})")
+
+
+def _unescape_mount_point(mount_point: str) -> str:
+    return _OCTAL_ESCAPE_PATTERN.sub(lambda match: chr(int(match.group(1), 8)), mount_point)
+
+
+def read_mount_points(fs_types: Collection[str], mount_table_path: Path = MOUNT_TABLE_PATH) -> set[str]:
+    """Find the mount points of filesystems of the given types.
+
+    Args:
+        fs_types (Collection[str]): The filesystem types to look for, such as "nfs" or "fuse.sshfs".
+        mount_table_path (Path): The mount table to read. Defaults to the Linux mount table of this process.
+
+    Returns:
+        set[str]: The absolute paths of the matching mount points.
+
+    Raises:
+        FileNotFoundError: If the mount table does not exist on this system.
+    """
+    if not mount_table_path.exists():
+        msg = f"Mount table does not exist: {mount_table_path}"
+        raise FileNotFoundError(msg)
+
+    mount_points: set[str] = set()
+    with mount_table_path.open(encoding="utf-8", errors="surrogateescape") as file:
+        for line in file:
+            fields = line.split()
+            if len(fields) > _FS_TYPE_FIELD and fields[_FS_TYPE_FIELD] in fs_types:
+                mount_points.add(_unescape_mount_point(fields[_MOUNT_POINT_FIELD]))
+    return mount_points
@@ -0,0 +1,146 @@
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from dirstuff.os.fast_copy import copy_file, copy_range
+from dirstuff.summary.path_utilities import join_path
+
+# Files larger than this are split into chunks of this size, which are copied concurrently
+_CHUNK_SIZE = 64 * 1024 * 1024
+
+# A file that could not be copied, as its source path, its target path and the reason, like in shutil.Error
+CopyError = tuple[str, str, str]
+
+
+def copy_tree(source_dirpath: str, target_dirpath: str, workers: int = 8, symlinks: bool = False) -> None:
+    """Copy a directory tree, copying files on a pool of threads.
+
+    The whole directory skeleton is created first, then files are copied concurrently with their metadata, inside
+    the kernel where possible, and large files are split into chunks copied concurrently too. Directory metadata is
+    copied last, since copying files changes the modification times of their directories. Like shutil.copytree,
+    symlinks are followed unless symlinks is True. A file that cannot be copied does not stop the others from being
+    copied, and every failure is reported together at the end.
+
+    Args:
+        source_dirpath (str): The directory to copy.
+        target_dirpath (str): The path to copy to, which must not exist.
+        workers (int): The number of threads copying files. Defaults to 8.
+        symlinks (bool): Whether to copy symlinks as symlinks rather than copying what they point to. Defaults to
+            False.
+
+    Raises:
+        ValueError: If workers is less than 1.
+        FileExistsError: If the target path already exists.
+        shutil.Error: If any files or directories could not be copied, with the list of failures.
+    """
+    if workers < 1:
+        msg = f"Number of workers must be at least 1: {workers}"
+        raise ValueError(msg)
+    Path(target_dirpath).mkdir()
+    errors: list[CopyError] = []
+    dirpaths, files = _copy_skeleton(source_dirpath, target_dirpath, symlinks, errors)
+
+    small_files = [(source, target) for source, target, size in files if size <= _CHUNK_SIZE]
+    large_files = [(source, target, size) for source, target, size in files if size > _CHUNK_SIZE]
+    chunks = [
+        (source, target, offset, min(_CHUNK_SIZE, size - offset))
+        for source, target, size in large_files
+        if _allocate(source, target, size, errors)
+        for offset in range(0, size, _CHUNK_SIZE)
+    ]
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="dirstuff-copy") as executor:
+        results = list(executor.map(_copy_small_file, small_files))
+        results.extend(executor.map(_copy_chunk, chunks))
+        # Metadata is copied once every chunk of a file is written, since writes change the modification time
+        allocated = {(source, target) for source, target, _, _ in chunks}
+        results.extend(executor.map(_copy_stat, allocated))
+    errors.extend(error for error in results if error is not None)
+
+    # Directories are finished deepest first, once nothing more is written inside them
+    for source, target in reversed(dirpaths):
+        try:
+            shutil.copystat(source, target)
+        except OSError as error:
+            errors.append((source, target, str(error)))
+    if errors:
+        # Failed chunks of the same file are reported once
+        raise shutil.Error(list(dict.fromkeys(errors)))
+
+
+def _copy_skeleton(
+    source_dirpath: str,
+    target_dirpath: str,
+    symlinks: bool,
+    errors: list[CopyError],
+) -> tuple[list[tuple[str, str]], list[tuple[str, str, int]]]:
+    """Create every directory and symlink of the tree, returning the directories and the files left to copy."""
+    dirpaths = [(source_dirpath, target_dirpath)]
+    files: list[tuple[str, str, int]] = []
+    stack = [(source_dirpath, target_dirpath)]
+    while stack:
+        source_dir, target_dir = stack.pop()
+        try:
+            entries = list(os.scandir(source_dir))
+        except OSError as error:
+            errors.append((source_dir, target_dir, str(error)))
+            continue
+        for entry in entries:
+            target = join_path(target_dir, entry.name)
+            try:
+                if symlinks and entry.is_symlink():
+                    Path(target).symlink_to(Path(entry.path).readlink())
+                    shutil.copystat(entry.path, target, follow_symlinks=False)
+                elif entry.is_dir():
+                    Path(target).mkdir()
+                    dirpaths.append((entry.path, target))
+                    stack.append((entry.path, target))
+                elif entry.is_file():
+                    files.append((entry.path, target, entry.stat().st_size))
+                elif entry.is_symlink():
+                    errors.append((entry.path, target, "Symlink points to nothing"))
+                else:
+                    errors.append((entry.path, target, "Not a regular file, directory or symlink"))
+            except OSError as error:
+                errors.append((entry.path, target, str(error)))
+    return dirpaths, files
+
+
+def _copy_small_file(paths: tuple[str, str]) -> CopyError | None:
+    source, target = paths
+    try:
+        copy_file(Path(source), Path(target))
+        shutil.copystat(source, target)
+    except OSError as error:
+        return (source, target, str(error))
+    return None
+
+
+def _allocate(source: str, target: str, size: int, errors: list[CopyError]) -> bool:
+    """Create a target file at its full size, so that its chunks can be written in any order."""
+    try:
+        with Path(target).open("wb") as file:
+            file.truncate(size)
+    except OSError as error:
+        errors.append((source, target, str(error)))
+        return False
+    return True
+
+
+def _copy_chunk(chunk: tuple[str, str, int, int]) -> CopyError | None:
+    source, target, offset, length = chunk
+    try:
+        with Path(source).open("rb", buffering=0) as source_file, Path(target).open("r+b", buffering=0) as target_file:
+            copy_range(source_file, target_file, offset, length)
+    except OSError as error:
+        return (source, target, str(error))
+    return None
+
+
+def _copy_stat(paths: tuple[str, str]) -> CopyError | None:
+    source, target = paths
+    try:
+        shutil.copystat(source, target)
+    except OSError as error:
+        return (source, target, str(error))
+    return None
@@ -0,0 +1,203 @@
+import dataclasses
+import os
+import shutil
+import threading
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+from dirstuff.summary.path_utilities import join_path
+
+# Number of subtrees to split the tree into for each worker, so that workers stay busy when subtrees differ in size
+_SUBTREES_PER_WORKER = 16
+
+# Number of entries each worker removes between progress reports
+_PROGRESS_INTERVAL = 10_000
+
+# Subdirectories are opened without following symlinks, so a directory swapped for a symlink is never entered
+_DIR_FLAGS = os.O_RDONLY | os.O_DIRECTORY | getattr(os, "O_NOFOLLOW", 0)
+
+# Whether the platform can remove entries relative to an open directory
+_SUPPORTS_DIR_FD = {os.open, os.unlink, os.rmdir} <= os.supports_dir_fd and os.scandir in os.supports_fd
+
+# A path that could not be removed and the reason, in the style of the failures listed by shutil.Error
+DeleteError = tuple[str, str]
+
+
+@dataclass
+class DeleteStats:
+    """The number of entries a delete has removed so far and the number it failed to remove."""
+
+    n_files: int = 0
+    n_dirs: int = 0
+    n_errors: int = 0
+
+
+# A directory that has been opened and emptied of files: its descriptor, path, name and its parent's descriptor
+_OpenDir = tuple[int, str, str, int]
+
+
+class _TreeDeleter:
+    """The shared state of one delete, which every worker thread reports into."""
+
+    def __init__(self, progress: Callable[[DeleteStats], None] | None):
+        self.progress = progress
+        self.stats = DeleteStats()
+        self.errors: list[DeleteError] = []
+        self._lock = threading.Lock()
+
+    def report(self, counts: DeleteStats, errors: list[DeleteError]) -> None:
+        """Add a worker's counts to the totals and pass the totals to the progress callback."""
+        with self._lock:
+            self.stats.n_files += counts.n_files
+            self.stats.n_dirs += counts.n_dirs
+            self.stats.n_errors += len(errors)
+            self.errors.extend(errors)
+            if self.progress is not None:
+                self.progress(dataclasses.replace(self.stats))
+
+    def delete_subtree(self, parent_fd: int, parent_path: str, name: str) -> None:
+        """Delete a directory and everything in it, depth first, holding one descriptor per level."""
+        counts = DeleteStats()
+        errors: list[DeleteError] = []
+        opened = self._open_dir(parent_fd, parent_path, name, errors)
+        if opened is None:
+            self.report(DeleteStats(), errors)
+            return
+        stack = [(opened, self._unlink_files(opened[0], opened[1], counts, errors))]
+        while stack:
+            (dir_fd, dirpath, dir_name, dir_parent_fd), subdir_names = stack[-1]
+            if subdir_names:
+                child = self._open_dir(dir_fd, dirpath, subdir_names.pop(), errors)
+                if child is not None:
+                    stack.append((child, self._unlink_files(child[0], child[1], counts, errors)))
+                continue
+            stack.pop()
+            os.close(dir_fd)
+            self._rmdir(dir_parent_fd, dirpath, dir_name, counts, errors)
+            if counts.n_files + counts.n_dirs + len(errors) >= _PROGRESS_INTERVAL:
+                self.report(counts, errors)
+                counts, errors = DeleteStats(), []
+        self.report(counts, errors)
+
+    def expand(self, parent_fd: int, parent_path: str, name: str) -> tuple[_OpenDir, list[str]] | None:
+        """Open a directory and remove its files, leaving its subdirectories."""
+        counts = DeleteStats()
+        errors: list[DeleteError] = []
+        opened = self._open_dir(parent_fd, parent_path, name, errors)
+        subdir_names = [] if opened is None else self._unlink_files(opened[0], opened[1], counts, errors)
+        self.report(counts, errors)
+        return None if opened is None else (opened, subdir_names)
+
+    def remove_dir(self, parent_fd: int, dirpath: str, name: str) -> None:
+        """Remove an empty directory."""
+        counts = DeleteStats()
+        errors: list[DeleteError] = []
+        self._rmdir(parent_fd, dirpath, name, counts, errors)
+        self.report(counts, errors)
+
+    def _open_dir(self, parent_fd: int, parent_path: str, name: str, errors: list[DeleteError]) -> _OpenDir | None:
+        dirpath = join_path(parent_path, name)
+        try:
+            return (os.open(name, _DIR_FLAGS, dir_fd=parent_fd), dirpath, name, parent_fd)
+        except OSError as error:
+            errors.append((dirpath, str(error)))
+            return None
+
+    def _unlink_files(self, dir_fd: int, dirpath: str, counts: DeleteStats, errors: list[DeleteError]) -> list[str]:
+        """Remove every entry of a directory that is not a directory, returning the names of its subdirectories."""
+        try:
+            with os.scandir(dir_fd) as entries:
+                names = [(entry.name, entry.is_dir(follow_symlinks=False)) for entry in entries]
+        except OSError as error:
+            errors.append((dirpath, str(error)))
+            return []
+        subdir_names: list[str] = []
+        for name, is_dir in names:
+            if is_dir:
+                subdir_names.append(name)
+                continue
+            try:
+                os.unlink(name, dir_fd=dir_fd)
+                counts.n_files += 1
+            except OSError as error:
+                errors.append((join_path(dirpath, name), str(error)))
+        return subdir_names
+
+    def _rmdir(self, parent_fd: int, dirpath: str, name: str, counts: DeleteStats, errors: list[DeleteError]) -> None:
+        try:
+            os.rmdir(name, dir_fd=parent_fd)
+            counts.n_dirs += 1
+        except OSError as error:
+            errors.append((dirpath, str(error)))
+
+
+def delete_tree(dirpath: str, workers: int = 8, progress: Callable[[DeleteStats], None] | None = None) -> DeleteStats:
+    """Delete a directory tree, deleting subtrees on a pool of threads.
+
+    The top of the tree is emptied of files breadth first until there are enough subdirectories to share out, then
+    each worker deletes whole subtrees depth first. Entries are removed relative to open directory descriptors, so no
+    full path is resolved and symlinks are removed rather than followed. An entry that cannot be removed does not
+    stop the rest of the tree from being removed, and every failure is reported together at the end.
+
+    Args:
+        dirpath (str): The directory to delete.
+        workers (int): The number of threads deleting subtrees. Defaults to 8.
+        progress (Callable[[DeleteStats], None] | None): A function called with the running totals as entries are
+            removed, from any of the threads. Defaults to None.
+
+    Returns:
+        DeleteStats: The number of files and directories removed.
+
+    Raises:
+        ValueError: If workers is less than 1.
+        FileNotFoundError: If the directory does not exist.
+        shutil.Error: If any entries could not be removed, with the list of failures.
+    """
+    if workers < 1:
+        msg = f"Number of workers must be at least 1: {workers}"
+        raise ValueError(msg)
+    if not _SUPPORTS_DIR_FD:
+        shutil.rmtree(dirpath)
+        return DeleteStats()
+
+    root_path = Path(dirpath)
+    if not root_path.is_dir():
+        msg = f"Dir does not exist: {dirpath}"
+        raise FileNotFoundError(msg)
+    deleter = _TreeDeleter(progress)
+    parent_fd = os.open(root_path.parent, os.O_RDONLY | os.O_DIRECTORY)
+    expanded: list[_OpenDir] = []
+    try:
+        # Expand the tree breadth first until there are enough subtrees to share out among the workers
+        subtrees = [(parent_fd, str(root_path.parent), root_path.name)]
+        n_target_subtrees = workers * _SUBTREES_PER_WORKER
+        while subtrees and (not expanded or len(subtrees) < n_target_subtrees):
+            next_subtrees: list[tuple[int, str, str]] = []
+            for subtree in subtrees:
+                result = deleter.expand(*subtree)
+                if result is not None:
+                    opened, subdir_names = result
+                    expanded.append(opened)
+                    next_subtrees.extend((opened[0], opened[1], subdir_name) for subdir_name in subdir_names)
+            subtrees = next_subtrees
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="dirstuff-delete") as executor:
+            futures = [executor.submit(deleter.delete_subtree, *subtree) for subtree in subtrees]
+            for future in futures:
+                future.result()
+
+        # The expanded directories are removed deepest first, once the subtrees below them are gone
+        while expanded:
+            dir_fd, expanded_path, name, expanded_parent_fd = expanded.pop()
+            os.close(dir_fd)
+            deleter.remove_dir(expanded_parent_fd, expanded_path, name)
+    finally:
+        for opened in expanded:
+            os.close(opened[0])
+        os.close(parent_fd)
+
+    if deleter.errors:
+        raise shutil.Error(deleter.errors)
+    return deleter.stats
@@ -0,0 +1,112 @@
+import os
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Literal
+
+from dirstuff.summary.path_utilities import join_path
+
+# Which kinds of entries a rename applies to
+RenameTargets = Literal["files", "dirs", "all"]
+
+
+@dataclass
+class Rename:
+    """A single planned rename of a file or directory within its parent directory."""
+
+    source: str
+    target: str
+
+
+@dataclass
+class RenamePlan:
+    """Every rename of a bulk regex rename, worked out before anything on disk is changed.
+
+    Renames are ordered so that the contents of a directory are renamed before the directory itself, which keeps
+    every planned path valid while the plan is applied. A conflict is a rename whose new name is already taken in its
+    directory, by an existing entry or by another rename in the same plan, or whose new name is empty or contains a
+    path separator. Existing entries count even if they are renamed too, so no rename depends on the order of others.
+    """
+
+    renames: list[Rename] = field(default_factory=list)
+    conflicts: list[Rename] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        """Get the number of renames that can be applied."""
+        return len(self.renames)
+
+    def apply(self) -> int:
+        """Apply every rename in the plan.
+
+        Returns:
+            int: The number of paths renamed.
+
+        Raises:
+            FileExistsError: If the plan has any conflicts, in which case nothing is renamed.
+        """
+        if self.conflicts:
+            conflict = self.conflicts[0]
+            msg = f"Rename plan has {len(self.conflicts)} conflicts, such as: {conflict.source} -> {conflict.target}"
+            raise FileExistsError(msg)
+        for rename in self.renames:
+            Path(rename.source).rename(rename.target)
+        return len(self.renames)
+
+
+def plan_rename(
+    root_dirpath: str,
+    pattern: str,
+    replace: str,
+    *,
+    targets: RenameTargets = "files",
+    recursive: bool = True,
+) -> RenamePlan:
+    """Plan a regex rename of the entries under a directory, reading each directory once.
+
+    Args:
+        root_dirpath (str): The directory whose entries to rename. The directory itself is never renamed.
+        pattern (str): The regular expression pattern, which is compiled once for the whole plan.
+        replace (str): The replacement string.
+        targets (RenameTargets): Whether to rename "files", "dirs" or "all" entries. Defaults to "files".
+        recursive (bool): Whether to rename entries in subdirectories too. Defaults to True.
+
+    Returns:
+        RenamePlan: The renames to apply and the renames that conflict with existing names or with each other.
+    """
+    regex = re.compile(pattern)
+    rename_files = targets in ("files", "all")
+    rename_dirs = targets in ("dirs", "all")
+    plan = RenamePlan()
+    # Directories are read parents first, then planned in reverse so that each directory comes after its contents
+    dir_renames: list[tuple[list[Rename], list[Rename]]] = []
+    stack = [root_dirpath]
+    while stack:
+        dirpath = stack.pop()
+        try:
+            entries = list(os.scandir(dirpath))
+        except OSError:
+            continue
+        names = {entry.name for entry in entries}
+        new_names: set[str] = set()
+        renames: list[Rename] = []
+        conflicts: list[Rename] = []
+        for entry in entries:
+            is_dir = entry.is_dir(follow_symlinks=False)
+            if is_dir and recursive:
+                stack.append(entry.path)
+            if not (rename_dirs if is_dir else rename_files):
+                continue
+            new_name = regex.sub(replace, entry.name)
+            if new_name == entry.name:
+                continue
+            rename = Rename(entry.path, join_path(dirpath, new_name))
+            if not new_name or os.sep in new_name or new_name in names or new_name in new_names:
+                conflicts.append(rename)
+            else:
+                renames.append(rename)
+            new_names.add(new_name)
+        dir_renames.append((renames, conflicts))
+    for renames, conflicts in reversed(dir_renames):
+        plan.renames.extend(renames)
+        plan.conflicts.extend(conflicts)
+    return plan
@@ -0,0 +1,303 @@
+import os
+import shutil
+import sqlite3
+import stat
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from types import TracebackType
+
+from dirstuff.os.digest_cache import hash_file
+from dirstuff.os.fast_copy import copy_file
+from dirstuff.os.parallel_copy import CopyError
+from dirstuff.summary.path_utilities import join_path
+
+# Number of verified copies recorded before they are committed to the journal
+_COMMIT_INTERVAL = 1000
+
+# Algorithm used to check that a copy has the same contents as its source
+_VERIFY_ALGORITHM = "blake2b"
+
+
+class MoveJournal:
+    """A record of the progress of a move between filesystems, stored in an SQLite database.
+
+    The journal is bound to one source and to the target directory created by the move, and records every file whose
+    copy has been verified, so that a move interrupted before its source was deleted does not copy that file again
+    when it is resumed. Files that were deleted from the source are done, so the source itself records the rest of the
+    progress.
+    """
+
+    def __init__(self, path: Path | str = ":memory:"):
+        """Construct a MoveJournal object.
+
+        Args:
+            path (Path | str): The database file, which is created if it does not exist. Defaults to ":memory:", for a
+                journal that cannot be resumed from.
+        """
+        self.path = path
+        self._n_uncommitted = 0
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS moves (source TEXT, target TEXT, target_device INTEGER, target_inode INTEGER)"
+        )
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS copied (path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER)"
+        )
+
+    def __enter__(self) -> "MoveJournal":
+        """Enter a context that closes the journal on exit."""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Commit and close the journal."""
+        self.close()
+
+    def close(self) -> None:
+        """Commit any new records and close the database."""
+        with self._lock:
+            self._connection.commit()
+            self._connection.close()
+
+    def is_resumable(self, source_dirpath: str, target_dirpath: str) -> bool:
+        """Check whether the journal belongs to a move whose target directory it created still exists.
+
+        Args:
+            source_dirpath (str): The directory being moved.
+            target_dirpath (str): The path it is being moved to.
+
+        Returns:
+            bool: Whether the journal is bound to this move and the target is the directory created by the move.
+
+        Raises:
+            ValueError: If the journal belongs to a different move.
+        """
+        with self._lock:
+            row = self._connection.execute("SELECT source, target, target_device, target_inode FROM moves").fetchone()
+        if row is None:
+            return False
+        if tuple(row[:2]) != (source_dirpath, target_dirpath):
+            msg = f"Journal belongs to a different move: {row[0]} -> {row[1]}"
+            raise ValueError(msg)
+        return _get_dir_id(target_dirpath) == tuple(row[2:])
+
+    def bind(self, source_dirpath: str, target_dirpath: str) -> None:
+        """Bind the journal to a move once its target directory has been created.
+
+        Any files recorded for an earlier target are forgotten, since their copies are not in this one.
+
+        Args:
+            source_dirpath (str): The directory being moved.
+            target_dirpath (str): The directory it is being moved to, which must exist.
+
+        Raises:
+            NotADirectoryError: If the target is not a directory.
+        """
+        target_id = _get_dir_id(target_dirpath)
+        if target_id is None:
+            msg = f"Target is not a directory: {target_dirpath}"
+            raise NotADirectoryError(msg)
+        with self._lock:
+            self._connection.execute("DELETE FROM moves")
+            self._connection.execute("DELETE FROM copied")
+            self._connection.execute(
+                "INSERT INTO moves VALUES (?, ?, ?, ?)", (source_dirpath, target_dirpath, *target_id)
+            )
+            self._connection.commit()
+            self._n_uncommitted = 0
+
+    def is_copied(self, path: str, size: int, mtime_ns: int) -> bool:
+        """Check whether a file was copied and verified while it had the same size and modification time.
+
+        Args:
+            path (str): The path of the file relative to the source directory.
+            size (int): The current size of the file.
+            mtime_ns (int): The current modification time of the file.
+
+        Returns:
+            bool: Whether the file's copy was verified.
+        """
+        with self._lock:
+            row = self._connection.execute("SELECT size, mtime_ns FROM copied WHERE path = ?", (path,)).fetchone()
+        return row is not None and tuple(row) == (size, mtime_ns)
+
+    def mark_copied(self, path: str, size: int, mtime_ns: int) -> None:
+        """Record that a file's copy has been verified.
+
+        Args:
+            path (str): The path of the file relative to the source directory.
+            size (int): The size of the file when it was copied.
+            mtime_ns (int): The modification time of the file when it was copied.
+        """
+        with self._lock:
+            self._connection.execute("INSERT OR REPLACE INTO copied VALUES (?, ?, ?)", (path, size, mtime_ns))
+            self._n_uncommitted += 1
+            if self._n_uncommitted >= _COMMIT_INTERVAL:
+                self._connection.commit()
+                self._n_uncommitted = 0
+
+
+class _TreeMover:
+    """The shared state of one move, which every worker thread moves files with."""
+
+    def __init__(self, source_dirpath: str, target_dirpath: str, journal: MoveJournal, verify: bool):
+        self.source_dirpath = source_dirpath
+        self.target_dirpath = target_dirpath
+        self.journal = journal
+        self.verify = verify
+
+    def get_paths(self, relative_path: str) -> tuple[str, str]:
+        """Get the source and target paths of an entry from its path relative to the moved directory."""
+        if not relative_path:
+            return self.source_dirpath, self.target_dirpath
+        return join_path(self.source_dirpath, relative_path), join_path(self.target_dirpath, relative_path)
+
+    def create_skeleton(self, errors: list[CopyError]) -> tuple[list[str], list[str]]:
+        """Create every directory of the tree and move every symlink, returning the directories and files left."""
+        dirpaths = [""]
+        filepaths: list[str] = []
+        stack = [""]
+        while stack:
+            relative_dirpath = stack.pop()
+            source_dir, target_dir = self.get_paths(relative_dirpath)
+            try:
+                entries = list(os.scandir(source_dir))
+            except OSError as error:
+                errors.append((source_dir, target_dir, str(error)))
+                continue
+            for entry in entries:
+                relative_path = join_path(relative_dirpath, entry.name) if relative_dirpath else entry.name
+                source, target = self.get_paths(relative_path)
+                try:
+                    if entry.is_symlink():
+                        self._move_symlink(source, target)
+                    elif entry.is_dir():
+                        Path(target).mkdir(exist_ok=True)
+                        dirpaths.append(relative_path)
+                        stack.append(relative_path)
+                    elif entry.is_file():
+                        filepaths.append(relative_path)
+                    else:
+                        errors.append((source, target, "Not a regular file, directory or symlink"))
+                except OSError as error:
+                    errors.append((source, target, str(error)))
+        return dirpaths, filepaths
+
+    def move_file(self, relative_path: str) -> CopyError | None:
+        """Copy a file unless its copy was already verified, then delete it from the source."""
+        source, target = self.get_paths(relative_path)
+        try:
+            stat = Path(source).stat()
+            already_copied = self.journal.is_copied(relative_path, stat.st_size, stat.st_mtime_ns) and (
+                Path(target).is_file() and Path(target).stat().st_size == stat.st_size
+            )
+            if not already_copied:
+                copy_file(Path(source), Path(target))
+                shutil.copystat(source, target)
+                reason = self._check_copy(source, target, stat.st_size, stat.st_mtime_ns)
+                if reason is not None:
+                    return (source, target, reason)
+                self.journal.mark_copied(relative_path, stat.st_size, stat.st_mtime_ns)
+            Path(source).unlink()
+        except OSError as error:
+            return (source, target, str(error))
+        return None
+
+    def _check_copy(self, source: str, target: str, size: int, mtime_ns: int) -> str | None:
+        """Get the reason a copy cannot replace its source, or None if the source can be deleted."""
+        source_stat = Path(source).stat()
+        if (source_stat.st_size, source_stat.st_mtime_ns) != (size, mtime_ns):
+            return "Source changed while it was copied"
+        if Path(target).stat().st_size != size:
+            return "Copy has a different size from its source"
+        if self.verify and hash_file(Path(source), _VERIFY_ALGORITHM) != hash_file(Path(target), _VERIFY_ALGORITHM):
+            return "Copy has different contents from its source"
+        return None
+
+    def _move_symlink(self, source: str, target: str) -> None:
+        link = Path(source).readlink()
+        target_path = Path(target)
+        # A symlink copied before the move was interrupted is kept if it still points to the same place
+        if not (target_path.is_symlink() and target_path.readlink() == link):
+            target_path.symlink_to(link)
+        Path(source).unlink()
+
+
+def move_tree(
+    source_dirpath: str,
+    target_dirpath: str,
+    workers: int = 8,
+    journal: MoveJournal | None = None,
+    verify: bool = True,
+) -> None:
+    """Move a directory tree to another filesystem, copying files on a pool of threads.
+
+    The directory skeleton is created first, then each file is copied, checked against its source, recorded in the
+    journal and only then deleted from the source. Source directories are removed once everything in them has been
+    moved. If the move is interrupted, calling this again with the same journal resumes it, skipping files whose
+    copies were already verified. A move is only resumed into the target directory it created itself.
+
+    Args:
+        source_dirpath (str): The directory to move.
+        target_dirpath (str): The path to move to, which must not exist unless the move is being resumed.
+        workers (int): The number of threads moving files. Defaults to 8.
+        journal (MoveJournal | None): The journal to record progress in and resume from. Defaults to None, for a
+            move that cannot be resumed.
+        verify (bool): Whether to compare the contents of each copy with its source, rather than only its size.
+            Defaults to True.
+
+    Raises:
+        ValueError: If workers is less than 1 or the journal belongs to a different move.
+        FileExistsError: If the target path already exists and is not the directory created by the move being resumed.
+        shutil.Error: If any files could not be moved, with the list of failures. The source directories that
+            still hold files are kept, and the move can be resumed.
+    """
+    if workers < 1:
+        msg = f"Number of workers must be at least 1: {workers}"
+        raise ValueError(msg)
+    if journal is None:
+        with MoveJournal() as default_journal:
+            _move_tree(_TreeMover(source_dirpath, target_dirpath, default_journal, verify), workers)
+    else:
+        _move_tree(_TreeMover(source_dirpath, target_dirpath, journal, verify), workers)
+
+
+def _get_dir_id(dirpath: str) -> tuple[int, int] | None:
+    """Get the device and inode of a directory, or None if there is no directory at the path."""
+    try:
+        dir_stat = os.lstat(dirpath)
+    except FileNotFoundError:
+        return None
+    return (dir_stat.st_dev, dir_stat.st_ino) if stat.S_ISDIR(dir_stat.st_mode) else None
+
+
+def _move_tree(mover: _TreeMover, workers: int) -> None:
+    # The journal is only bound once the target is created, so an existing directory is never mistaken for the
+    # target of an interrupted move and merged into
+    if not mover.journal.is_resumable(mover.source_dirpath, mover.target_dirpath):
+        Path(mover.target_dirpath).mkdir()
+        mover.journal.bind(mover.source_dirpath, mover.target_dirpath)
+    errors: list[CopyError] = []
+    dirpaths, filepaths = mover.create_skeleton(errors)
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="dirstuff-move") as executor:
+        errors.extend(error for error in executor.map(mover.move_file, filepaths) if error is not None)
+    if errors:
+        raise shutil.Error(errors)
+
+    # Directories are finished deepest first, once everything inside them has been moved
+    for relative_dirpath in reversed(dirpaths):
+        source, target = mover.get_paths(relative_dirpath)
+        try:
+            shutil.copystat(source, target)
+            Path(source).rmdir()
+        except OSError as error:
+            errors.append((source, target, str(error)))
+    if errors:
+        raise shutil.Error(errors)
@@ -0,0 +1,269 @@
+import heapq
+import os
+import sys
+from array import array
+from collections.abc import Collection, Iterator
+from pathlib import Path
+
+from dirstuff.summary.filter_criteria import FilterCriteria
+from dirstuff.summary.name_index import NameIndex, NameMatch
+from dirstuff.summary.path_utilities import join_path
+from dirstuff.summary.records import (
+    CompactRecords,
+    TreeRecords,
+    index_children,
+    load_compact_snapshot,
+    save_snapshot,
+)
+from dirstuff.summary.render import RenderEntry, largest_first, render
+from dirstuff.summary.tree import Tree
+
+
+class ArrayTree:
+    """A compact tree of directories stored as columns rather than one object per directory.
+
+    Directories are identified by index, with the root at index 0 and every parent stored before its children. Names
+    are kept once each in a shared string table, and each directory costs a few dozen bytes of array storage, so
+    scans of millions of directories fit in a few hundred megabytes.
+    """
+
+    def __init__(self, root_path: Path, records: CompactRecords):
+        """Construct an ArrayTree object.
+
+        Args:
+            root_path (Path): The path of the root directory.
+            records (CompactRecords): The columns of the tree: the string table of directory names, the index into it
+                of each directory's name, the index of each directory's parent (or -1 for the root), the size of each
+                directory in bytes, and the offsets and indices that list the children of each directory.
+        """
+        self.root_path = root_path
+        self.names = records.names
+        self.name_ids = records.name_ids
+        self.parents = records.parents
+        self.sizes = records.sizes
+        self.child_offsets = records.child_offsets
+        self.child_indices = records.child_indices
+        self._name_index: NameIndex[int] | None = None
+
+    @classmethod
+    def from_records(cls, root_path: Path, records: TreeRecords) -> "ArrayTree":
+        """Construct a compact tree from preorder records.
+
+        Args:
+            root_path (Path): The path of the root directory.
+            records (TreeRecords): The records to load.
+
+        Returns:
+            ArrayTree: The compact tree.
+        """
+        return cls(root_path, CompactRecords.from_records(records))
+
+    @classmethod
+    def from_tree(cls, tree: Tree) -> "ArrayTree":
+        """Construct a compact tree from a tree.
+
+        Args:
+            tree (Tree): The tree to convert.
+
+        Returns:
+            ArrayTree: The compact tree.
+        """
+        return cls.from_records(tree.path, tree.to_records())
+
+    def to_records(self) -> TreeRecords:
+        """Flatten the tree into records.
+
+        Returns:
+            TreeRecords: The records of every directory in the tree.
+        """
+        names = [self.names[name_id] for name_id in self.name_ids]
+        return TreeRecords(names=names, parents=array("q", self.parents), sizes=array("Q", self.sizes))
+
+    def save(self, path: Path) -> None:
+        """Save the tree to a snapshot file.
+
+        Args:
+            path (Path): The snapshot file to write.
+        """
+        records = CompactRecords(
+            self.names, self.name_ids, self.parents, self.sizes, self.child_offsets, self.child_indices
+        )
+        save_snapshot(path, self.root_path, records)
+
+    @classmethod
+    def load(cls, path: Path) -> "ArrayTree":
+        """Load a compact tree from a snapshot file.
+
+        Args:
+            path (Path): The snapshot file to read.
+
+        Returns:
+            ArrayTree: The loaded tree.
+        """
+        root_path, records = load_compact_snapshot(path)
+        return cls(root_path, records)
+
+    def __len__(self) -> int:
+        """Get the number of directories in the tree."""
+        return len(self.parents)
+
+    def get_size(self, index: int = 0) -> int:
+        """Get the size of a directory in bytes.
+
+        Args:
+            index (int): The index of the directory. Defaults to 0, the root.
+
+        Returns:
+            int: The size of the directory in bytes.
+        """
+        return self.sizes[index]
+
+    def get_name(self, index: int) -> str:
+        """Get the name of a directory.
+
+        Args:
+            index (int): The index of the directory.
+
+        Returns:
+            str: The name of the directory.
+        """
+        if index == 0:
+            return self.root_path.name
+        return self.names[self.name_ids[index]]
+
+    def get_path(self, index: int) -> Path:
+        """Rebuild the absolute path of a directory from its ancestors' names.
+
+        Args:
+            index (int): The index of the directory.
+
+        Returns:
+            Path: The path of the directory.
+        """
+        names: list[str] = []
+        while index > 0:
+            names.append(self.names[self.name_ids[index]])
+            index = self.parents[index]
+        return self.root_path.joinpath(*reversed(names))
+
+    def get_children(self, index: int) -> memoryview:
+        """Get the indices of the children of a directory without copying them.
+
+        Args:
+            index (int): The index of the directory.
+
+        Returns:
+            memoryview: The indices of the children.
+        """
+        return memoryview(self.child_indices)[self.child_offsets[index] : self.child_offsets[index + 1]]
+
+    def filter(self, filter_criteria: FilterCriteria) -> "ArrayTree":
+        """Filter the tree based on the filter criteria.
+
+        Args:
+            filter_criteria (FilterCriteria): The filter criteria to apply.
+
+        Returns:
+            ArrayTree: The filtered tree, sharing this tree's string table.
+        """
+        new_indices = array("q", [-1]) * len(self)
+        name_ids, parents, sizes = array("I"), array("q"), array("Q")
+        for index in range(len(self)):
+            parent = self.parents[index]
+            if index > 0 and (new_indices[parent] < 0 or self.sizes[index] < filter_criteria.min_bytes):
+                continue
+            new_indices[index] = len(parents)
+            name_ids.append(self.name_ids[index])
+            parents.append(new_indices[parent] if index > 0 else -1)
+            sizes.append(self.sizes[index])
+        return ArrayTree(self.root_path, CompactRecords(self.names, name_ids, parents, sizes, *index_children(parents)))
+
+    def walk(
+        self,
+        absolute: bool = False,
+        max_depth: int | None = None,
+        limit: int | None = None,
+    ) -> Iterator[RenderEntry]:
+        """Walk the tree in display order, with each directory's children largest first.
+
+        Args:
+            absolute (bool): Label directories with their absolute paths rather than their names. Defaults to False.
+            max_depth (int | None): The deepest level to walk, where the children of the root are at depth 1.
+                Defaults to None, for no limit.
+            limit (int | None): The number of largest children to walk in each directory. Defaults to None, for all.
+
+        Returns:
+            Iterator[RenderEntry]: The label, size and depth of each directory, in preorder.
+        """
+        root_label = str(self.root_path) if absolute else str(Path(os.path.split(str(self.root_path))[1]))
+        stack = [(0, root_label, 0)]
+        while stack:
+            index, label, depth = stack.pop()
+            yield label, self.sizes[index], depth
+            if max_depth is not None and depth >= max_depth:
+                continue
+            children = largest_first(self.get_children(index), key=self.sizes.__getitem__, limit=limit)
+            for child in reversed(children):
+                name = self.names[self.name_ids[child]]
+                stack.append((child, join_path(label, name) if absolute else name, depth + 1))
+
+    def print(self, absolute: bool = False) -> None:
+        """Print the tree structure.
+
+        Args:
+            absolute (bool): Print the absolute directory paths. Defaults to False.
+        """
+        render(self.walk(absolute=absolute), sys.stdout)
+
+    def top_k(self, k: int, max_depth: int | None = None) -> list[int]:
+        """Find the largest directories below the root, largest first, with a best-first walk.
+
+        Args:
+            k (int): The number of directories to find.
+            max_depth (int | None): The deepest level to include, where the children of the root are at depth 1.
+                Defaults to None, for no limit.
+
+        Returns:
+            list[int]: The indices of up to k of the largest directories, not including the root.
+        """
+        heap = [(-self.sizes[child], child, 1) for child in self.get_children(0)]
+        heapq.heapify(heap)
+        largest: list[int] = []
+        while heap and len(largest) < k:
+            _, index, depth = heapq.heappop(heap)
+            largest.append(index)
+            if max_depth is None or depth < max_depth:
+                for child in self.get_children(index):
+                    heapq.heappush(heap, (-self.sizes[child], child, depth + 1))
+        return largest
+
+    def get_name_index(self) -> NameIndex[int]:
+        """Get the index of directory names, building it on first use.
+
+        Returns:
+            NameIndex[int]: The index of the directories in the tree by name.
+        """
+        if self._name_index is None:
+            indices_by_name_id: dict[int, list[int]] = {}
+            for index in range(1, len(self)):
+                indices_by_name_id.setdefault(self.name_ids[index], []).append(index)
+            indices_by_name = {self.names[name_id]: indices for name_id, indices in indices_by_name_id.items()}
+            # The root is named after its path rather than its entry in the string table
+            root_indices = indices_by_name.setdefault(self.get_name(0), [])
+            root_indices.insert(0, 0)
+            self._name_index = NameIndex(indices_by_name)
+        return self._name_index
+
+    def print_search(self, *, dir_name: str | Collection[str], match: NameMatch = "exact") -> None:
+        """Print all directories with the given name.
+
+        Args:
+            dir_name (str | Collection[str]): The name of the directory to search for, or several names to search
+                for at once.
+            match (NameMatch): How to match names: "exact", or "glob" or "regex" to treat them as patterns. Defaults
+                to "exact".
+        """
+        dir_names = [dir_name] if isinstance(dir_name, str) else dir_name
+        matches = self.get_name_index().search(dir_names, match=match)
+        indices = sorted(matches, key=lambda index: -self.sizes[index])
+        render(((str(self.get_path(index)), self.sizes[index], 0) for index in indices), sys.stdout)
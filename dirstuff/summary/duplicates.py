@@ -0,0 +1,165 @@
+import hashlib
+import os
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+from dirstuff.os.digest_cache import DigestCache
+from dirstuff.os.filesystem import Dir, File
+from dirstuff.summary.path_utilities import join_path
+
+# Size of the blocks hashed at the start and end of each file before any file is hashed in full
+_EDGE_BLOCK_SIZE = 64 * 1024
+
+
+@dataclass
+class DuplicateGroup:
+    """Files with identical contents."""
+
+    size: int
+    files: list[File]
+
+    @property
+    def reclaimable_bytes(self) -> int:
+        """Get the space freed by keeping only one of the files.
+
+        Returns:
+            int: The size of every file but one.
+        """
+        return self.size * (len(self.files) - 1)
+
+
+class DuplicateFinder:
+    """A finder of files with identical contents, which reads as little of each file as it can.
+
+    Files are first grouped by size, which needs no reads at all. Within each group of equal sizes, files are
+    compared by a hash of their first and last blocks, and only files that still match are hashed in full. Files
+    that are hardlinks to the same inode share their contents by construction, so only one of them is compared.
+    """
+
+    def __init__(
+        self,
+        *,
+        workers: int = 8,
+        min_size: int = 1,
+        algorithm: str = "blake2b",
+        cache: DigestCache | None = None,
+    ):
+        """Construct a DuplicateFinder object.
+
+        Args:
+            workers (int): The number of threads hashing files concurrently. Defaults to 8.
+            min_size (int): The size in bytes of the smallest files to compare. Defaults to 1, to skip empty files.
+            algorithm (str): The hashlib algorithm to hash files with. Defaults to "blake2b".
+            cache (DigestCache | None): A persistent cache of full file digests to reuse for unchanged files.
+                Defaults to None.
+
+        Raises:
+            ValueError: If workers is less than 1.
+        """
+        if workers < 1:
+            msg = f"Number of workers must be at least 1: {workers}"
+            raise ValueError(msg)
+        self.workers = workers
+        self.min_size = min_size
+        self.algorithm = algorithm
+        self.cache = cache
+
+    def find(self, root: Dir) -> list[DuplicateGroup]:
+        """Find the groups of duplicate files under a directory.
+
+        Args:
+            root (Dir): The directory to search.
+
+        Returns:
+            list[DuplicateGroup]: The groups of duplicate files, with the most reclaimable space first.
+        """
+        paths_by_size = self._group_by_size(str(root.libpath))
+        candidates = [(size, paths) for size, paths in paths_by_size.items() if len(paths) > 1]
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="dirstuff-hash") as executor:
+            candidates = self._split_by_hash(executor, candidates, self._hash_edges)
+            # Files no bigger than their two edge blocks have already been hashed in full
+            matched = [(size, paths) for size, paths in candidates if size <= 2 * _EDGE_BLOCK_SIZE]
+            needs_full_hash = [(size, paths) for size, paths in candidates if size > 2 * _EDGE_BLOCK_SIZE]
+            matched.extend(self._split_by_hash(executor, needs_full_hash, self._hash_file))
+
+        groups = [DuplicateGroup(size, [File(path) for path in sorted(paths)]) for size, paths in matched]
+        groups.sort(key=lambda group: -group.reclaimable_bytes)
+        return groups
+
+    def _group_by_size(self, root_dirpath: str) -> dict[int, list[str]]:
+        """Walk the tree once, grouping regular files by size and keeping one path per inode."""
+        paths_by_size: dict[int, list[str]] = {}
+        seen_inodes: set[tuple[int, int]] = set()
+        stack = [root_dirpath]
+        while stack:
+            dirpath = stack.pop()
+            try:
+                entries = list(os.scandir(dirpath))
+            except OSError:
+                continue
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(join_path(dirpath, entry.name))
+                elif entry.is_file(follow_symlinks=False):
+                    stat = entry.stat(follow_symlinks=False)
+                    inode = (stat.st_dev, stat.st_ino)
+                    if stat.st_size < self.min_size or inode in seen_inodes:
+                        continue
+                    seen_inodes.add(inode)
+                    paths_by_size.setdefault(stat.st_size, []).append(entry.path)
+        return paths_by_size
+
+    def _split_by_hash(
+        self,
+        executor: ThreadPoolExecutor,
+        candidates: list[tuple[int, list[str]]],
+        hash_file: Callable[[str], str | None],
+    ) -> list[tuple[int, list[str]]]:
+        """Hash every candidate file concurrently and split each group by hash, keeping groups that still match."""
+        paths = [path for _, group in candidates for path in group]
+        hashes = dict(zip(paths, executor.map(hash_file, paths), strict=True))
+        matched: list[tuple[int, list[str]]] = []
+        for size, group in candidates:
+            paths_by_hash: dict[str, list[str]] = {}
+            for path in group:
+                file_hash = hashes[path]
+                if file_hash is not None:
+                    paths_by_hash.setdefault(file_hash, []).append(path)
+            matched.extend((size, paths) for paths in paths_by_hash.values() if len(paths) > 1)
+        return matched
+
+    def _hash_edges(self, path: str) -> str | None:
+        """Hash the first and last blocks of a file, or None if it cannot be read."""
+        hasher = hashlib.new(self.algorithm)
+        try:
+            with Path(path).open("rb") as file:
+                hasher.update(file.read(_EDGE_BLOCK_SIZE))
+                size = os.fstat(file.fileno()).st_size
+                if size > _EDGE_BLOCK_SIZE:
+                    file.seek(max(size - _EDGE_BLOCK_SIZE, _EDGE_BLOCK_SIZE))
+                    hasher.update(file.read(_EDGE_BLOCK_SIZE))
+        except OSError:
+            return None
+        return hasher.hexdigest()
+
+    def _hash_file(self, path: str) -> str | None:
+        """Hash the whole of a file, or None if it cannot be read."""
+        try:
+            return File(path).digest(self.algorithm, cache=self.cache)
+        except OSError:
+            return None
+
+
+def total_reclaimable_bytes(groups: Iterable[DuplicateGroup]) -> int:
+    """Get the space freed by keeping only one file of each group.
+
+    Args:
+        groups (Iterable[DuplicateGroup]): The groups of duplicate files.
+
+    Returns:
+        int: The total reclaimable space in bytes.
+    """
+    return sum(group.reclaimable_bytes for group in groups)
@@ -0,0 +1,91 @@
+from dataclasses import dataclass
+
+from dirstuff.summary.render import largest_first
+
+
+@dataclass
+class ExtensionSummary:
+    """The total size and number of files with one extension."""
+
+    extension: str
+    size: int
+    n_files: int
+
+
+def get_extension(name: str) -> str:
+    """Get the extension of a file name the way pathlib does, without building a path.
+
+    Only the last suffix counts, so "logs.tar.gz" has the extension ".gz", and names that start with a dot and have
+    no other dot, like ".bashrc", have no extension.
+
+    Args:
+        name (str): The file name.
+
+    Returns:
+        str: The extension, including its leading dot, or an empty string.
+    """
+    index = name.rfind(".")
+    if 0 < index < len(name) - 1:
+        return name[index:]
+    return ""
+
+
+class ExtensionHistogram:
+    """The bytes and number of files for each file extension in a directory tree."""
+
+    __slots__ = ("counts", "sizes")
+
+    def __init__(self) -> None:
+        """Construct an empty ExtensionHistogram object."""
+        self.sizes: dict[str, int] = {}
+        self.counts: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        """Get the number of distinct extensions."""
+        return len(self.sizes)
+
+    def add_files(self, files: list[tuple[str, int]]) -> None:
+        """Count files into the histogram.
+
+        Args:
+            files (list[tuple[str, int]]): The name and size of each file.
+        """
+        sizes, counts = self.sizes, self.counts
+        for name, size in files:
+            extension = get_extension(name)
+            sizes[extension] = sizes.get(extension, 0) + size
+            counts[extension] = counts.get(extension, 0) + 1
+
+    def merge(self, other: "ExtensionHistogram") -> None:
+        """Add the counts of another histogram, such as one for a subdirectory.
+
+        Args:
+            other (ExtensionHistogram): The histogram to add.
+        """
+        sizes, counts = self.sizes, self.counts
+        for extension, size in other.sizes.items():
+            sizes[extension] = sizes.get(extension, 0) + size
+            counts[extension] = counts.get(extension, 0) + other.counts[extension]
+
+    def get(self, extension: str) -> ExtensionSummary:
+        """Get the total size and number of files with one extension.
+
+        Args:
+            extension (str): The extension, including its leading dot.
+
+        Returns:
+            ExtensionSummary: The total size and number of files, which are zero if there are no such files.
+        """
+        return ExtensionSummary(extension, self.sizes.get(extension, 0), self.counts.get(extension, 0))
+
+    def get_largest(self, limit: int | None = None) -> list[ExtensionSummary]:
+        """Get the extensions that use the most space, largest first.
+
+        Args:
+            limit (int | None): The number of extensions to get. Defaults to None, for all of them.
+
+        Returns:
+            list[ExtensionSummary]: The total size and number of files of each extension.
+        """
+        extensions = largest_first(self.sizes, key=self.sizes.__getitem__, limit=limit)
+        return [ExtensionSummary(extension, self.sizes[extension], self.counts[extension]) for extension in extensions]
@@ -0,0 +1,109 @@
+import heapq
+import threading
+from dataclasses import dataclass
+
+from dirstuff.summary.path_utilities import join_path
+
+
+@dataclass
+class FileSummary:
+    """The path and size of a single file."""
+
+    path: str
+    size: int
+
+
+class LargestFiles:
+    """The largest files seen during a scan, kept in bounded min-heaps.
+
+    Each heap holds at most the number of files asked for, with the smallest of them on top, so a file is kept or
+    rejected with one comparison against the top in the common case, and memory does not grow with the number of
+    files scanned.
+    """
+
+    def __init__(self, n_files: int, n_files_per_dir: int | None = None):
+        """Construct a LargestFiles object.
+
+        Args:
+            n_files (int): The number of largest files to keep across the whole scan.
+            n_files_per_dir (int | None): The number of largest files to also keep for each directory. Defaults to
+                None, to keep only the files across the whole scan.
+
+        Raises:
+            ValueError: If a number of files is less than 1.
+        """
+        if n_files < 1 or (n_files_per_dir is not None and n_files_per_dir < 1):
+            msg = f"Number of files must be at least 1: {n_files}, {n_files_per_dir}"
+            raise ValueError(msg)
+        self.n_files = n_files
+        self.n_files_per_dir = n_files_per_dir
+        # A min-heap of (size, path) across the scan, and the (size, name) of the largest files in each directory
+        self.heap: list[tuple[int, str]] = []
+        self.dir_files: dict[str, list[tuple[int, str]]] = {}
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> dict:
+        """Get the state to pickle, leaving out the lock."""
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        """Restore the state from a pickle, with a new lock."""
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def add(self, dirpath: str, files: list[tuple[str, int]]) -> None:
+        """Offer the files of one directory.
+
+        Args:
+            dirpath (str): The path of the directory.
+            files (list[tuple[str, int]]): The name and size of each file directly in the directory.
+        """
+        if not files:
+            return
+        if self.n_files_per_dir is not None:
+            dir_files = [(size, name) for name, size in heapq.nlargest(self.n_files_per_dir, files, key=_get_size)]
+        with self._lock:
+            heap = self.heap
+            for name, size in files:
+                if len(heap) < self.n_files:
+                    heapq.heappush(heap, (size, join_path(dirpath, name)))
+                elif size > heap[0][0]:
+                    heapq.heapreplace(heap, (size, join_path(dirpath, name)))
+            if self.n_files_per_dir is not None:
+                self.dir_files[dirpath] = dir_files
+
+    def merge(self, other: "LargestFiles") -> None:
+        """Add the files kept by another tracker, such as one filled in a worker process.
+
+        Args:
+            other (LargestFiles): The tracker to merge in.
+        """
+        with self._lock:
+            self.heap = heapq.nlargest(self.n_files, [*self.heap, *other.heap])
+            heapq.heapify(self.heap)
+            self.dir_files.update(other.dir_files)
+
+    def get_largest(self) -> list[FileSummary]:
+        """Get the largest files across the whole scan, largest first.
+
+        Returns:
+            list[FileSummary]: The largest files.
+        """
+        return [FileSummary(path, size) for size, path in sorted(self.heap, reverse=True)]
+
+    def get_largest_by_dir(self) -> dict[str, list[FileSummary]]:
+        """Get the largest files of each directory, largest first, for the directories holding any files.
+
+        Returns:
+            dict[str, list[FileSummary]]: The largest files of each directory, keyed by directory path.
+        """
+        return {
+            dirpath: [FileSummary(join_path(dirpath, name), size) for size, name in files]
+            for dirpath, files in self.dir_files.items()
+        }
+
+
+def _get_size(file: tuple[str, int]) -> int:
+    return file[1]
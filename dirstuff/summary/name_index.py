@@ -0,0 +1,96 @@
+import fnmatch
+import re
+from collections.abc import Collection
+from typing import Generic, Literal, TypeVar
+
+NodeT = TypeVar("NodeT")
+
+NameMatch = Literal["exact", "glob", "regex"]
+
+
+def _combine_patterns(patterns: Collection[str]) -> re.Pattern[str]:
+    """Compile regular expressions into one expression that matches wherever any of them does."""
+    return re.compile("|".join(f"(?:{pattern})" for pattern in patterns))
+
+
+class NameIndex(Generic[NodeT]):
+    """An index from directory names to the directories with that name.
+
+    Exact lookups are a single dictionary access. Glob and regex lookups compile their patterns into one expression
+    and test each distinct name once, which is typically orders of magnitude fewer tests than visiting every
+    directory, since names like node_modules or __pycache__ repeat throughout a tree.
+    """
+
+    def __init__(self, nodes_by_name: dict[str, list[NodeT]]):
+        """Construct a NameIndex object.
+
+        Args:
+            nodes_by_name (dict[str, list[NodeT]]): The directories with each name, in tree order.
+        """
+        self.nodes_by_name = nodes_by_name
+
+    def __len__(self) -> int:
+        """Get the number of distinct names in the index."""
+        return len(self.nodes_by_name)
+
+    def find(self, names: Collection[str]) -> list[NodeT]:
+        """Find the directories with any of the given names.
+
+        Args:
+            names (Collection[str]): The names to look up.
+
+        Returns:
+            list[NodeT]: The matching directories.
+        """
+        return [node for name in dict.fromkeys(names) for node in self.nodes_by_name.get(name, [])]
+
+    def find_glob(self, patterns: Collection[str]) -> list[NodeT]:
+        """Find the directories whose names match any of the given glob patterns.
+
+        Args:
+            patterns (Collection[str]): The glob patterns, such as "*.egg-info".
+
+        Returns:
+            list[NodeT]: The matching directories.
+        """
+        if not patterns:
+            return []
+        # Translated globs are only anchored at the end, so whole names are matched rather than searched
+        combined = _combine_patterns([fnmatch.translate(pattern) for pattern in patterns])
+        return self.find([name for name in self.nodes_by_name if combined.fullmatch(name)])
+
+    def find_regex(self, patterns: Collection[str]) -> list[NodeT]:
+        """Find the directories whose names contain a match for any of the given regular expressions.
+
+        Args:
+            patterns (Collection[str]): The regular expressions.
+
+        Returns:
+            list[NodeT]: The matching directories.
+        """
+        if not patterns:
+            return []
+        combined = _combine_patterns(patterns)
+        return self.find([name for name in self.nodes_by_name if combined.search(name)])
+
+    def search(self, names: Collection[str], match: NameMatch = "exact") -> list[NodeT]:
+        """Find the directories matching any of the given names or patterns.
+
+        Args:
+            names (Collection[str]): The names or patterns to look up.
+            match (NameMatch): How to match names: "exact", "glob" or "regex". Defaults to "exact".
+
+        Returns:
+            list[NodeT]: The matching directories.
+
+        Raises:
+            ValueError: If the match type is not supported.
+        """
+        if match == "exact":
+            return self.find(names)
+        if match == "glob":
+            return self.find_glob(names)
+        if match == "regex":
+            return self.find_regex(names)
+        msg = f"Name match type not supported: {match}"
+        raise ValueError(msg)
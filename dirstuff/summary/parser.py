@@ -1,45 +1,570 @@
-from pathlib import Path, PurePath
+import asyncio
+import os
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from queue import SimpleQueue
+from typing import TYPE_CHECKING, Iterator, Optional
 
+from dirstuff.os.mounts import read_mount_points
+from dirstuff.summary.extension_histogram import ExtensionHistogram
 from dirstuff.summary.filter_criteria import FilterCriteria
+from dirstuff.summary.largest_files import LargestFiles
+from dirstuff.summary.path_utilities import join_path
+from dirstuff.summary.records import TreeRecords
+from dirstuff.summary.scan_boundaries import ScanBoundaries
 from dirstuff.summary.tree import Tree
 
+if TYPE_CHECKING:
+    from dirstuff.summary.scan_cache import ScanCache
+
+# Target number of subtrees handed to each process, so that one large subtree does not leave other processes idle
+_SHARDS_PER_PROCESS = 4
+
+# Number of subdirectories an async scan registers before yielding control back to the event loop
+_ASYNC_YIELD_INTERVAL = 1024
+
+
+@dataclass
+class DirSummary:
+    """The total size of a directory whose subtree has been fully scanned."""
+
+    path: str
+    size: int
+    depth: int
+
+
+@dataclass
+class _StreamFrame:
+    """A directory on the scan stack of a streaming scan."""
+
+    path: str
+    depth: int
+    total_size: int
+    subdir_names: list[str]
+    next_index: int = field(default=0)
+
+
+@dataclass
+class _Frame:
+    """A directory on the scan stack whose subdirectories have not all been visited yet."""
+
+    tree: Tree
+    path: str
+    total_size: int
+    subdir_names: list[str]
+    next_index: int = field(default=0)
+
+
+@dataclass
+class _RecordFrame:
+    """A directory on the scan stack of a records scan, identified by its record index."""
+
+    index: int
+    path: str
+    total_size: int
+    subdir_names: list[str]
+    next_index: int = field(default=0)
+
+
+@dataclass
+class _PendingDir:
+    """A directory in a parallel scan whose subtree has not been fully sized yet."""
+
+    tree: Tree
+    path: str
+    parent: Optional["_PendingDir"]
+    total_size: int = field(default=0)
+    n_pending: int = field(default=0)
+
+    def expand(self, files_size: int, subdir_names: list[str], min_bytes: int) -> list["_PendingDir"]:
+        """Record the listing of this directory and create pending entries for its subdirectories.
+
+        Args:
+            files_size (int): The total size of the files directly in the directory.
+            subdir_names (list[str]): The names of the subdirectories.
+            min_bytes (int): The minimum size of a subdirectory to keep once it is complete.
+
+        Returns:
+            list[_PendingDir]: The pending subdirectories, which still need to be read.
+        """
+        self.total_size += files_size
+        self.n_pending = len(subdir_names)
+        children: list[_PendingDir] = []
+        for subdir_name in subdir_names:
+            child = _PendingDir(Tree(subdir_name), join_path(self.path, subdir_name), self)
+            self.tree.add_child(child.tree)
+            children.append(child)
+        if not children:
+            self.complete(min_bytes)
+        return children
+
+    def complete(self, min_bytes: int) -> None:
+        """Set the size of this fully scanned directory and propagate it to every ancestor it completes.
+
+        Each completed directory drops the subdirectories smaller than min_bytes, keeping only their contribution
+        to its size.
+
+        Args:
+            min_bytes (int): The minimum size of a subdirectory to keep.
+        """
+        current = self
+        while True:
+            current.tree.set_size(current.total_size)
+            if min_bytes > 0:
+                current.tree.children = [child for child in current.tree.children if child.size >= min_bytes]
+            parent = current.parent
+            if parent is None:
+                return
+            parent.total_size += current.total_size
+            if current.tree.extensions is not None and parent.tree.extensions is not None:
+                parent.tree.extensions.merge(current.tree.extensions)
+            parent.n_pending -= 1
+            if parent.n_pending:
+                return
+            current = parent
+
+
+def read_dir(dirpath: str | Path) -> tuple[int, list[str]]:
+    """Read a single directory with one scandir call.
+
+    Files are sized with the stat information cached on each directory entry, and entry types come from the
+    directory listing itself, so regular files cost a single stat and directories cost none. Symlinks to files
+    are sized by their target, symlinks to directories are skipped.
+
+    Args:
+        dirpath (str | Path): The path of the directory to read.
+
+    Returns:
+        tuple[int, list[str]]: The total size of the files directly in the directory and the names of its
+            subdirectories.
+    """
+    files_size = 0
+    subdir_names: list[str] = []
+    with os.scandir(dirpath) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                subdir_names.append(entry.name)
+            elif entry.is_file():
+                files_size += entry.stat().st_size
+    return files_size, subdir_names
+
+
+def read_dir_files(dirpath: str | Path) -> tuple[int, list[str], list[tuple[str, int]]]:
+    """Read a single directory with one scandir call, keeping the name and size of each file.
+
+    Args:
+        dirpath (str | Path): The path of the directory to read.
+
+    Returns:
+        tuple[int, list[str], list[tuple[str, int]]]: The total size of the files directly in the directory, the
+            names of its subdirectories, and the name and size of each file.
+    """
+    files: list[tuple[str, int]] = []
+    subdir_names: list[str] = []
+    with os.scandir(dirpath) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                subdir_names.append(entry.name)
+            elif entry.is_file():
+                files.append((entry.name, entry.stat().st_size))
+    return sum(size for _, size in files), subdir_names, files
+
+
+# Results of parsing a batch of subtrees in a worker process: the records and extension histograms of each subtree,
+# and the largest files of the whole batch
+_ShardBatchResult = tuple[list[tuple[TreeRecords, list[ExtensionHistogram | None] | None]], LargestFiles | None]
+
+# The parser of the current worker process, which is sent once when the process starts rather than with every batch
+_shard_parser: Optional["Parser"] = None
+
+
+def _init_shard_worker(parser: "Parser") -> None:
+    """Keep the parser a worker process uses for every batch of subtrees it is given."""
+    global _shard_parser  # noqa: PLW0603
+    _shard_parser = parser
+
+
+def _scan_shards(dirpaths: list[str]) -> _ShardBatchResult:
+    """Parse a batch of subtrees in a worker process and return them flattened for cheap transfer back to the parent.
+
+    Extension histograms, if counted, are returned in the same preorder as the records.
+    """
+    parser = _shard_parser
+    if parser is None:
+        msg = "Shard worker was not initialized with a parser"
+        raise RuntimeError(msg)
+    # Each batch reports its own largest files, which the parent merges once
+    if parser.largest_files is not None:
+        parser.largest_files = LargestFiles(parser.largest_files.n_files, parser.largest_files.n_files_per_dir)
+    results = []
+    for dirpath in dirpaths:
+        tree = parser.parse(Path(dirpath))
+        extensions = [subtree.extensions for subtree in tree.iter_trees()] if parser.count_extensions else None
+        results.append((tree.to_records(), extensions))
+    return results, parser.largest_files
+
 
 class Parser:
     """A parser to parse a directory into a tree structure."""
 
-    def __init__(self, *, filter_criteria: FilterCriteria):
+    def __init__(
+        self,
+        *,
+        filter_criteria: FilterCriteria,
+        workers: int = 1,
+        processes: int = 1,
+        cache: Optional["ScanCache"] = None,
+        boundaries: ScanBoundaries | None = None,
+        largest_files: LargestFiles | None = None,
+        count_extensions: bool = False,
+    ):
         """Construct a Parser object.
 
         Args:
             filter_criteria (FilterCriteria): The filter criteria to apply.
+            workers (int): The number of threads reading directories concurrently. Defaults to 1.
+            processes (int): The number of processes scanning subtrees concurrently. Defaults to 1.
+            cache (ScanCache | None): A cache of directory listings to reuse for unchanged directories. Defaults to
+                None.
+            boundaries (ScanBoundaries | None): Devices, paths and filesystem types the scan does not cross.
+                Defaults to None, to scan everything under the root.
+            largest_files (LargestFiles | None): A tracker to offer every scanned file to. Defaults to None.
+            count_extensions (bool): Give each directory in a parsed tree a histogram of the bytes and files of
+                each file extension in its subtree. Defaults to False.
+
+        Raises:
+            ValueError: If workers or processes is less than 1, or a cache is used with multiple processes or
+                largest files or extension counts.
         """
+        if workers < 1:
+            msg = f"Number of workers must be at least 1: {workers}"
+            raise ValueError(msg)
+        if processes < 1:
+            msg = f"Number of processes must be at least 1: {processes}"
+            raise ValueError(msg)
+        if cache is not None and processes > 1:
+            msg = "A scan cache cannot be shared between multiple processes"
+            raise ValueError(msg)
+        if cache is not None and (largest_files is not None or count_extensions):
+            msg = "A scan cache does not list files, so it cannot be used to track largest files or count extensions"
+            raise ValueError(msg)
         self.filter_criteria = filter_criteria
+        self.workers = workers
+        self.processes = processes
+        self.cache = cache
+        self.boundaries = boundaries or ScanBoundaries()
+        self.largest_files = largest_files
+        self.count_extensions = count_extensions
+        self._excluded_dirpaths = {str(Path(path).absolute()) for path in self.boundaries.exclude_paths}
+        if self.boundaries.exclude_fs_types:
+            self._excluded_dirpaths |= read_mount_points(self.boundaries.exclude_fs_types)
+        self._root_device: int | None = None
+        self._read_listing = read_dir if cache is None else cache.read_dir
+        self._is_bounded = self.boundaries.one_filesystem or bool(self._excluded_dirpaths)
+
+    def _read_dir(self, dirpath: str | Path, tree: Tree | None = None) -> tuple[int, list[str]]:
+        """Read a directory, leaving out subdirectories across boundaries.
+
+        The directory's files are offered to the largest files tracker, and counted into the tree's extension
+        histogram if one is given.
+        """
+        if self.largest_files is not None or self.count_extensions:
+            files_size, subdir_names, files = read_dir_files(dirpath)
+            if self.largest_files is not None:
+                self.largest_files.add(str(dirpath), files)
+            if self.count_extensions and tree is not None:
+                tree.extensions = ExtensionHistogram()
+                tree.extensions.add_files(files)
+        else:
+            files_size, subdir_names = self._read_listing(dirpath)
+        if self._is_bounded:
+            subdir_names = [name for name in subdir_names if self._is_within_bounds(join_path(str(dirpath), name))]
+        return files_size, subdir_names
+
+    def _is_within_bounds(self, dirpath: str) -> bool:
+        """Check that a directory is not excluded and, for a one-filesystem scan, is on the root's device."""
+        if self._excluded_dirpaths and str(Path(dirpath).absolute()) in self._excluded_dirpaths:
+            return False
+        return self._root_device is None or os.lstat(dirpath).st_dev == self._root_device
+
+    def _start_scan(self, root_dirpath: Path) -> None:
+        """Record the device of the root directory for a one-filesystem scan."""
+        self._root_device = root_dirpath.stat().st_dev if self.boundaries.one_filesystem else None
 
     def parse(self, root_dirpath: Path) -> Tree:
         """Parse a directory into a tree structure.
 
+        With a single worker the directory is walked depth-first with an explicit stack rather than recursion, so
+        arbitrarily deep trees can be parsed. With more workers, directory reads are farmed out to a thread pool.
+        With more processes, the top levels of the tree are read until there are enough subtrees to share out, then
+        each subtree is parsed in its own process (using the configured number of workers) and stitched back in.
+        Each directory is read with a single scandir call.
+
+        The filter criteria are applied as each subtree completes: a subdirectory smaller than the minimum size is
+        discarded at once and only its size is kept, so memory scales with the directories that will be shown.
+
         Args:
             root_dirpath (Path): The root directory path.
+
+        Returns:
+            Tree: The tree of directories under the root directory that pass the filter criteria.
+        """
+        self._start_scan(root_dirpath)
+        if self.processes > 1:
+            return self._parse_sharded(root_dirpath)
+        if self.workers > 1:
+            return self._parse_parallel(root_dirpath)
+        return self._parse_serial(root_dirpath)
+
+    def parse_records(self, root_dirpath: Path) -> TreeRecords:
+        """Parse a directory into preorder records without building a tree of objects.
+
+        A single-worker scan writes each directory straight into the record columns, so memory grows by a few dozen
+        bytes per directory, and truncates a subtree's records as soon as it completes below the filter criteria.
+        Parallel scans build a tree first and flatten it.
+
+        Args:
+            root_dirpath (Path): The root directory path.
+
+        Returns:
+            TreeRecords: The records of the directories under the root directory.
         """
-        tree = Tree(root_dirpath)
-        child_paths = [PurePath.joinpath(root_dirpath, f) for f in Path.iterdir(root_dirpath)]
+        if self.processes > 1 or self.workers > 1:
+            return self.parse(root_dirpath).to_records()
 
-        total_files_size = 0
-        child_files = [p for p in child_paths if Path.is_file(p)]
-        for child_file in child_files:
-            child_file_size = Path(child_file).stat().st_size
-            total_files_size += child_file_size
+        self._start_scan(root_dirpath)
+        records = TreeRecords(names=[root_dirpath.name])
+        records.parents.append(-1)
+        records.sizes.append(0)
+        root_files_size, root_subdir_names = self._read_dir(root_dirpath)
+        stack = [_RecordFrame(0, str(root_dirpath), root_files_size, root_subdir_names)]
 
-        total_size = 0
-        child_paths = [p for p in child_paths if Path.is_dir(p)]
-        for child_path in child_paths:
-            if Path.is_symlink(child_path):
+        while stack:
+            frame = stack[-1]
+            if frame.next_index < len(frame.subdir_names):
+                subdir_name = frame.subdir_names[frame.next_index]
+                frame.next_index += 1
+                child_path = join_path(frame.path, subdir_name)
+                files_size, subdir_names = self._read_dir(child_path)
+                stack.append(_RecordFrame(len(records), child_path, files_size, subdir_names))
+                records.names.append(subdir_name)
+                records.parents.append(frame.index)
+                records.sizes.append(0)
                 continue
-            child_tree = self.parse(child_path)
-            if child_tree is None:
+
+            stack.pop()
+            records.sizes[frame.index] = frame.total_size
+            if stack:
+                stack[-1].total_size += frame.total_size
+                if frame.total_size < self.filter_criteria.min_bytes:
+                    # A completed subtree is the tail of the preorder records, so dropping it is a truncation
+                    del records.names[frame.index :]
+                    del records.parents[frame.index :]
+                    del records.sizes[frame.index :]
+
+        return records
+
+    def stream(self, root_dirpath: Path) -> Iterator[DirSummary]:
+        """Scan a directory and yield each directory as soon as its subtree is complete.
+
+        Directories are yielded in post-order, so every directory comes after all of its subdirectories and the root
+        comes last. Directories smaller than the filter criteria are dropped as soon as they are complete, and no
+        tree is built, so memory only grows with the depth of the walk. Streaming scans use a single worker.
+
+        Args:
+            root_dirpath (Path): The root directory path.
+
+        Yields:
+            Iterator[DirSummary]: The completed directories that pass the filter criteria, and the root.
+        """
+        self._start_scan(root_dirpath)
+        root_files_size, root_subdir_names = self._read_dir(root_dirpath)
+        stack = [_StreamFrame(str(root_dirpath), 0, root_files_size, root_subdir_names)]
+
+        while stack:
+            frame = stack[-1]
+            if frame.next_index < len(frame.subdir_names):
+                child_path = join_path(frame.path, frame.subdir_names[frame.next_index])
+                frame.next_index += 1
+                files_size, subdir_names = self._read_dir(child_path)
+                stack.append(_StreamFrame(child_path, frame.depth + 1, files_size, subdir_names))
                 continue
-            total_size += child_tree.get_size()
-            tree.add_child(child_tree)
 
-        tree.set_size(total_files_size + total_size)
-        return tree
+            stack.pop()
+            if stack:
+                stack[-1].total_size += frame.total_size
+            if frame.depth == 0 or frame.total_size >= self.filter_criteria.min_bytes:
+                yield DirSummary(path=frame.path, size=frame.total_size, depth=frame.depth)
+
+    def _parse_serial(self, root_dirpath: Path) -> Tree:
+        root = Tree(root_dirpath)
+        root_files_size, root_subdir_names = self._read_dir(root_dirpath, root)
+        stack = [_Frame(root, str(root_dirpath), root_files_size, root_subdir_names)]
+
+        while stack:
+            frame = stack[-1]
+            if frame.next_index < len(frame.subdir_names):
+                subdir_name = frame.subdir_names[frame.next_index]
+                frame.next_index += 1
+                child_path = join_path(frame.path, subdir_name)
+                child = Tree(subdir_name)
+                files_size, subdir_names = self._read_dir(child_path, child)
+                stack.append(_Frame(child, child_path, files_size, subdir_names))
+                continue
+
+            stack.pop()
+            frame.tree.set_size(frame.total_size)
+            if stack:
+                parent_frame = stack[-1]
+                parent_frame.total_size += frame.total_size
+                if frame.tree.extensions is not None and parent_frame.tree.extensions is not None:
+                    parent_frame.tree.extensions.merge(frame.tree.extensions)
+                if frame.total_size >= self.filter_criteria.min_bytes:
+                    parent_frame.tree.add_child(frame.tree)
+
+        return root
+
+    def _parse_parallel(self, root_dirpath: Path) -> Tree:
+        root = _PendingDir(Tree(root_dirpath), str(root_dirpath), None)
+        results: SimpleQueue[tuple[_PendingDir, Future[tuple[int, list[str]]]]] = SimpleQueue()
+        executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="dirstuff-scan")
+
+        def submit(pending_dir: _PendingDir) -> None:
+            future = executor.submit(self._read_dir, pending_dir.path, pending_dir.tree)
+            future.add_done_callback(lambda f: results.put((pending_dir, f)))
+
+        try:
+            submit(root)
+            n_outstanding = 1
+            while n_outstanding:
+                pending_dir, future = results.get()
+                n_outstanding -= 1
+                for child in pending_dir.expand(*future.result(), self.filter_criteria.min_bytes):
+                    submit(child)
+                    n_outstanding += 1
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+        return root.tree
+
+    def _empty_largest_files(self) -> LargestFiles | None:
+        """Make an empty tracker like this parser's, for a worker process to fill in."""
+        if self.largest_files is None:
+            return None
+        return LargestFiles(self.largest_files.n_files, self.largest_files.n_files_per_dir)
+
+    def _parse_sharded(self, root_dirpath: Path) -> Tree:
+        root = _PendingDir(Tree(root_dirpath), str(root_dirpath), None)
+        n_target_shards = self.processes * _SHARDS_PER_PROCESS
+
+        # Expand the tree breadth-first in this process until there are enough subtrees to shard
+        level = [root]
+        while level and len(level) < n_target_shards:
+            next_level: list[_PendingDir] = []
+            for pending_dir in level:
+                listing = self._read_dir(pending_dir.path, pending_dir.tree)
+                next_level.extend(pending_dir.expand(*listing, self.filter_criteria.min_bytes))
+            level = next_level
+
+        if level:
+            shard_parser = Parser(
+                filter_criteria=self.filter_criteria,
+                workers=self.workers,
+                boundaries=self.boundaries,
+                largest_files=self._empty_largest_files(),
+                count_extensions=self.count_extensions,
+            )
+            # A wide level is dealt out round-robin into as many batches as shards, so that each task parses many
+            # small subtrees rather than paying the cost of a task for each one
+            n_batches = min(n_target_shards, len(level))
+            batches = [level[batch_index::n_batches] for batch_index in range(n_batches)]
+            with ProcessPoolExecutor(
+                max_workers=self.processes, initializer=_init_shard_worker, initargs=(shard_parser,)
+            ) as executor:
+                batch_dirpaths = [[pending_dir.path for pending_dir in batch] for batch in batches]
+                batch_results = executor.map(_scan_shards, batch_dirpaths)
+                for batch, (shard_results, shard_largest_files) in zip(batches, batch_results, strict=True):
+                    if self.largest_files is not None and shard_largest_files is not None:
+                        self.largest_files.merge(shard_largest_files)
+                    for pending_dir, (records, extensions) in zip(batch, shard_results, strict=True):
+                        pending_dir.tree.load_records(records)
+                        if extensions is not None:
+                            for subtree, subtree_extensions in zip(
+                                pending_dir.tree.iter_trees(), extensions, strict=True
+                            ):
+                                subtree.extensions = subtree_extensions
+                        pending_dir.total_size = pending_dir.tree.get_size()
+                        pending_dir.complete(self.filter_criteria.min_bytes)
+
+        return root.tree
+
+
+class AsyncParser:
+    """A parser to parse a directory into a tree structure without blocking an asyncio event loop."""
+
+    def __init__(self, *, filter_criteria: FilterCriteria, concurrency: int = 8, executor: Executor | None = None):
+        """Construct an AsyncParser object.
+
+        Args:
+            filter_criteria (FilterCriteria): The filter criteria to apply.
+            concurrency (int): The maximum number of directory reads in flight at once. Defaults to 8.
+            executor (Executor | None): The executor to read directories on. Defaults to the event loop's default
+                executor.
+
+        Raises:
+            ValueError: If concurrency is less than 1.
+        """
+        if concurrency < 1:
+            msg = f"Concurrency must be at least 1: {concurrency}"
+            raise ValueError(msg)
+        self.filter_criteria = filter_criteria
+        self.concurrency = concurrency
+        self.executor = executor
+
+    async def parse(self, root_dirpath: Path) -> Tree:
+        """Parse a directory into a tree structure.
+
+        Directory reads are offloaded to an executor by a fixed number of worker tasks, so the event loop stays free
+        to serve other requests. Cancelling the calling task stops the scan once in-flight reads return. As with
+        Parser.parse, subdirectories smaller than the filter criteria are discarded as each subtree completes.
+
+        Args:
+            root_dirpath (Path): The root directory path.
+
+        Returns:
+            Tree: The tree of directories under the root directory.
+
+        Raises:
+            OSError: If a directory cannot be read, such as FileNotFoundError if the root directory does not exist.
+        """
+        loop = asyncio.get_running_loop()
+        root = _PendingDir(Tree(root_dirpath), str(root_dirpath), None)
+        queue: asyncio.Queue[_PendingDir] = asyncio.Queue()
+        queue.put_nowait(root)
+
+        async def work() -> None:
+            while True:
+                pending_dir = await queue.get()
+                try:
+                    listing = await loop.run_in_executor(self.executor, read_dir, pending_dir.path)
+                    children = pending_dir.expand(*listing, self.filter_criteria.min_bytes)
+                    for index, child in enumerate(children, start=1):
+                        queue.put_nowait(child)
+                        if index % _ASYNC_YIELD_INTERVAL == 0:
+                            await asyncio.sleep(0)
+                finally:
+                    queue.task_done()
+
+        try:
+            async with asyncio.TaskGroup() as task_group:
+                workers = [task_group.create_task(work()) for _ in range(self.concurrency)]
+                await queue.join()
+                for worker in workers:
+                    worker.cancel()
+        except ExceptionGroup as group:
+            # Each worker stops at its first failure, so the group only holds plain exceptions, of which the first is
+            # raised like a failed read would be by Parser.parse
+            raise group.exceptions[0] from None
+
+        return root.tree
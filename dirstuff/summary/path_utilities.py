@@ -0,0 +1,16 @@
+import os
+
+
+def join_path(dirpath: str, name: str) -> str:
+    """Join a directory path and an entry name as strings, which is much cheaper than building a pathlib path.
+
+    Args:
+        dirpath (str): The directory path.
+        name (str): The name of the entry in the directory.
+
+    Returns:
+        str: The path of the entry.
+    """
+    if dirpath.endswith(os.sep):
+        return dirpath + name
+    return dirpath + os.sep + name
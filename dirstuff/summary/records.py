@@ -0,0 +1,211 @@
+import collections
+import itertools
+import struct
+import sys
+from array import array
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import BinaryIO
+
+# Snapshot header: magic and format version, then what the version needs to read the rest of the file
+_SNAPSHOT_MAGIC = b"DSTF"
+_SNAPSHOT_VERSION = 2
+_SNAPSHOT_PREFIX = struct.Struct("<4sH")
+
+# Version 1: number of records, root path length and names blob length, followed by one name per record
+_SNAPSHOT_V1_HEADER = struct.Struct("<QIQ")
+
+# Version 2: number of records, root path length, string table blob length and number of distinct names, followed by
+# the string table, name ids and the child index, so that a compact tree is loaded with bulk reads alone
+_SNAPSHOT_V2_HEADER = struct.Struct("<QIQQ")
+
+# Directory names cannot contain a null byte, so it is safe to separate them with one
+_NAME_SEPARATOR = "\0"
+
+
+@dataclass
+class TreeRecords:
+    """A tree flattened into columns in preorder.
+
+    Each record holds the name of a directory, the index of its parent record and its size. The first record is the
+    root, whose parent index is -1. The columns are compact to serialize and cheap to send between processes.
+    """
+
+    names: list[str] = field(default_factory=list)
+    parents: array = field(default_factory=lambda: array("q"))
+    sizes: array = field(default_factory=lambda: array("Q"))
+
+    def __len__(self) -> int:
+        """Get the number of records."""
+        return len(self.names)
+
+
+@dataclass
+class CompactRecords:
+    """Preorder records with each distinct name stored once and the children of each record indexed.
+
+    These are the columns of an ArrayTree, laid out so that they can be written and read as contiguous blocks.
+    """
+
+    names: list[str]
+    name_ids: array
+    parents: array
+    sizes: array
+    child_offsets: array
+    child_indices: array
+
+    def __len__(self) -> int:
+        """Get the number of records."""
+        return len(self.parents)
+
+    @classmethod
+    def from_records(cls, records: TreeRecords) -> "CompactRecords":
+        """Deduplicate the names of records and index their children.
+
+        Args:
+            records (TreeRecords): The records to compact.
+
+        Returns:
+            CompactRecords: The compact records.
+        """
+        ids_by_name = {name: name_id for name_id, name in enumerate(dict.fromkeys(records.names))}
+        name_ids = array("I", map(ids_by_name.__getitem__, records.names))
+        child_offsets, child_indices = index_children(records.parents)
+        return cls(list(ids_by_name), name_ids, records.parents, records.sizes, child_offsets, child_indices)
+
+    def to_records(self) -> TreeRecords:
+        """Expand the records into one name per record.
+
+        Returns:
+            TreeRecords: The records.
+        """
+        return TreeRecords(
+            names=list(map(self.names.__getitem__, self.name_ids)), parents=self.parents, sizes=self.sizes
+        )
+
+
+def index_children(parents: array) -> tuple[array, array]:
+    """Build the offsets and indices that list the children of each record contiguously, in index order.
+
+    Args:
+        parents (array): The index of each record's parent, or -1 for the root.
+
+    Returns:
+        tuple[array, array]: The offset of each record's children, with one extra offset for the end, and the indices
+            of the children.
+    """
+    n_nodes = len(parents)
+    # A stable sort by parent groups each record's children together while keeping them in index order
+    child_indices = array("Q", sorted(range(1, n_nodes), key=parents.__getitem__))
+    n_children = collections.Counter(itertools.islice(parents, 1, None))
+    child_offsets = array("Q", itertools.accumulate(map(n_children.__getitem__, range(n_nodes)), initial=0))
+    return child_offsets, child_indices
+
+
+def save_snapshot(path: Path, root_path: Path, records: TreeRecords | CompactRecords) -> None:
+    """Save tree records to a snapshot file.
+
+    The columns are written as contiguous blocks, along with the index of each record's children, so that loading
+    them is a handful of bulk reads rather than a parse per record.
+
+    Args:
+        path (Path): The snapshot file to write.
+        root_path (Path): The path of the root directory of the tree.
+        records (TreeRecords | CompactRecords): The records to save.
+    """
+    if isinstance(records, TreeRecords):
+        records = CompactRecords.from_records(records)
+    root_bytes = str(root_path).encode("utf-8", "surrogateescape")
+    names_bytes = _NAME_SEPARATOR.join(records.names).encode("utf-8", "surrogateescape")
+    columns = [records.name_ids, records.parents, records.sizes, records.child_offsets, records.child_indices]
+    if sys.byteorder != "little":
+        columns = [array(column.typecode, column) for column in columns]
+        for column in columns:
+            column.byteswap()
+
+    header = _SNAPSHOT_PREFIX.pack(_SNAPSHOT_MAGIC, _SNAPSHOT_VERSION) + _SNAPSHOT_V2_HEADER.pack(
+        len(records), len(root_bytes), len(names_bytes), len(records.names)
+    )
+    tmp_path = path.with_name(path.name + ".tmp")
+    with tmp_path.open("wb") as file:
+        file.write(header)
+        file.write(root_bytes)
+        file.write(names_bytes)
+        for column in columns:
+            column.tofile(file)
+    tmp_path.replace(path)
+
+
+def load_snapshot(path: Path) -> tuple[Path, TreeRecords]:
+    """Load tree records from a snapshot file.
+
+    Args:
+        path (Path): The snapshot file to read.
+
+    Returns:
+        tuple[Path, TreeRecords]: The path of the root directory of the tree and its records.
+
+    Raises:
+        ValueError: If the file is not a snapshot or was written by an incompatible version.
+    """
+    root_path, records = load_compact_snapshot(path)
+    return root_path, records.to_records()
+
+
+def load_compact_snapshot(path: Path) -> tuple[Path, CompactRecords]:
+    """Load compact tree records from a snapshot file.
+
+    Snapshots of the current version are read in bulk. Snapshots of version 1, which hold one name per record and no
+    child index, are compacted after they are read.
+
+    Args:
+        path (Path): The snapshot file to read.
+
+    Returns:
+        tuple[Path, CompactRecords]: The path of the root directory of the tree and its compact records.
+
+    Raises:
+        ValueError: If the file is not a snapshot or was written by an incompatible version.
+    """
+    with path.open("rb") as file:
+        prefix = file.read(_SNAPSHOT_PREFIX.size)
+        if len(prefix) < _SNAPSHOT_PREFIX.size or prefix[: len(_SNAPSHOT_MAGIC)] != _SNAPSHOT_MAGIC:
+            msg = f"File is not a dirstuff snapshot: {path}"
+            raise ValueError(msg)
+        _, version = _SNAPSHOT_PREFIX.unpack(prefix)
+        if version == 1:
+            n_records, root_length, names_length = _SNAPSHOT_V1_HEADER.unpack(file.read(_SNAPSHOT_V1_HEADER.size))
+            root_path = _read_root_path(file, root_length)
+            names = _read_names(file, names_length)
+            parents, sizes = _read_column(file, "q", n_records), _read_column(file, "Q", n_records)
+            return root_path, CompactRecords.from_records(TreeRecords(names=names, parents=parents, sizes=sizes))
+        if version != _SNAPSHOT_VERSION:
+            msg = f"Snapshot version not supported: {version}"
+            raise ValueError(msg)
+        n_records, root_length, names_length, _ = _SNAPSHOT_V2_HEADER.unpack(file.read(_SNAPSHOT_V2_HEADER.size))
+        root_path = _read_root_path(file, root_length)
+        names = _read_names(file, names_length)
+        return root_path, CompactRecords(
+            names=names,
+            name_ids=_read_column(file, "I", n_records),
+            parents=_read_column(file, "q", n_records),
+            sizes=_read_column(file, "Q", n_records),
+            child_offsets=_read_column(file, "Q", n_records + 1),
+            child_indices=_read_column(file, "Q", max(n_records - 1, 0)),
+        )
+
+
+def _read_root_path(file: BinaryIO, length: int) -> Path:
+    return Path(file.read(length).decode("utf-8", "surrogateescape"))
+
+
+def _read_names(file: BinaryIO, length: int) -> list[str]:
+    return file.read(length).decode("utf-8", "surrogateescape").split(_NAME_SEPARATOR)
+
+
+def _read_column(file: BinaryIO, typecode: str, length: int) -> array:
+    column = array(typecode)
+    column.fromfile(file, length)
+    if sys.byteorder != "little":
+        column.byteswap()
+    return column
@@ -0,0 +1,123 @@
+import csv
+import heapq
+import io
+import json
+from collections.abc import Callable, Iterable, Iterator
+from typing import Literal, TextIO, TypeVar
+
+from colorama import Fore
+
+from dirstuff.summary.memory_utilities import to_size_str
+
+ItemT = TypeVar("ItemT")
+
+OutputFormat = Literal["text", "json", "ndjson", "csv"]
+
+# A directory to render as its label (a name or a path), its size in bytes and its depth, in preorder
+RenderEntry = tuple[str, int, int]
+
+# Number of entries rendered into memory before they are written out together
+_WRITE_BATCH_SIZE = 4096
+
+# Lines of the text format, filled in with the indent, the formatted size and the label
+_COLOR_TEXT_TEMPLATE = f"{{}} |-> {Fore.BLUE}{{}}{Fore.RESET} > {Fore.GREEN}{{}}{Fore.RESET}\n"
+_PLAIN_TEXT_TEMPLATE = "{} |-> {} > {}\n"
+
+
+def largest_first(items: Iterable[ItemT], key: Callable[[ItemT], int], limit: int | None = None) -> list[ItemT]:
+    """Order items by descending size, keeping only the largest few if there is a limit.
+
+    Args:
+        items (Iterable[ItemT]): The items to order.
+        key (Callable[[ItemT], int]): The size of an item.
+        limit (int | None): The number of items to keep. Defaults to None, to keep every item.
+
+    Returns:
+        list[ItemT]: The items, largest first.
+    """
+    if limit is not None:
+        return heapq.nlargest(limit, items, key=key)
+    return sorted(items, key=lambda item: -key(item))
+
+
+def render(
+    entries: Iterable[RenderEntry],
+    out: TextIO,
+    output_format: OutputFormat = "text",
+    color: bool | None = None,
+) -> None:
+    """Render directories to a stream, writing many entries at a time.
+
+    Args:
+        entries (Iterable[RenderEntry]): The directories to render, in preorder.
+        out (TextIO): The stream to write to.
+        output_format (OutputFormat): The format to render: an indented "text" tree, a nested "json" document,
+            "ndjson" with one object per line, or "csv" with a header row. Defaults to "text".
+        color (bool | None): Color the text format. Defaults to None, to color only when writing to a terminal.
+
+    Raises:
+        ValueError: If the output format is not supported.
+    """
+    if output_format == "text":
+        _render_text(entries, out, out.isatty() if color is None else color)
+    elif output_format == "json":
+        _render_json(entries, out)
+    elif output_format == "ndjson":
+        _render_ndjson(entries, out)
+    elif output_format == "csv":
+        _render_csv(entries, out)
+    else:
+        msg = f"Output format not supported: {output_format}"
+        raise ValueError(msg)
+    out.flush()
+
+
+def _write_batched(lines: Iterable[str], out: TextIO) -> None:
+    batch: list[str] = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) >= _WRITE_BATCH_SIZE:
+            out.write("".join(batch))
+            batch.clear()
+    out.write("".join(batch))
+
+
+def _render_text(entries: Iterable[RenderEntry], out: TextIO, color: bool) -> None:
+    template = _COLOR_TEXT_TEMPLATE if color else _PLAIN_TEXT_TEMPLATE
+    _write_batched((template.format("  " * depth, to_size_str(size), label) for label, size, depth in entries), out)
+
+
+def _render_ndjson(entries: Iterable[RenderEntry], out: TextIO) -> None:
+    lines = (json.dumps({"path": label, "size": size, "depth": depth}) + "\n" for label, size, depth in entries)
+    _write_batched(lines, out)
+
+
+def _render_json(entries: Iterable[RenderEntry], out: TextIO) -> None:
+    # Nesting is recovered from the preorder depths, so the document is written as it goes without building a tree
+    def iter_tokens() -> Iterator[str]:
+        open_depths: list[int] = []
+        for label, size, depth in entries:
+            n_closed = 0
+            while open_depths and open_depths[-1] >= depth:
+                open_depths.pop()
+                n_closed += 1
+            # A directory follows its parent's opening bracket directly, and its previous sibling after a comma
+            yield "]}" * n_closed + ("," if n_closed else "")
+            yield f'{{"path":{json.dumps(label)},"size":{size},"children":['
+            open_depths.append(depth)
+        yield "]}" * len(open_depths) + "\n"
+
+    _write_batched(iter_tokens(), out)
+
+
+def _render_csv(entries: Iterable[RenderEntry], out: TextIO) -> None:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(["path", "size", "depth"])
+    for index, entry in enumerate(entries, start=1):
+        writer.writerow(entry)
+        if index % _WRITE_BATCH_SIZE == 0:
+            out.write(buffer.getvalue())
+            buffer.seek(0)
+            buffer.truncate()
+    out.write(buffer.getvalue())
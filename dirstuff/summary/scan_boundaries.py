@@ -0,0 +1,10 @@
+from dataclasses import dataclass, field
+
+
+@dataclass
+class ScanBoundaries:
+    """Boundaries a scan does not cross."""
+
+    one_filesystem: bool = False
+    exclude_paths: list[str] = field(default_factory=list)
+    exclude_fs_types: list[str] = field(default_factory=list)
@@ -0,0 +1,144 @@
+import json
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from dirstuff.summary.parser import read_dir
+
+# Version of the on-disk cache format, bumped whenever the format changes
+_CACHE_VERSION = 1
+
+
+@dataclass
+class CachedDir:
+    """The cached listing of a single directory."""
+
+    device: int
+    inode: int
+    mtime_ns: int
+    files_size: int
+    subdir_names: list[str]
+
+
+class ScanCache:
+    """A persistent cache of directory listings keyed by directory identity and modification time.
+
+    A directory whose device, inode and mtime are unchanged since the last scan has the same entries, so its files
+    size and subdirectory names are reused and it costs a single stat instead of a full read. Files rewritten in
+    place change size without touching their directory's mtime, so their new size is picked up only once the
+    directory itself changes.
+    """
+
+    def __init__(
+        self,
+        path: Path | None = None,
+        entries: dict[str, CachedDir] | None = None,
+        racy_window_ns: int = 2 * 10**9,
+    ):
+        """Construct a ScanCache object.
+
+        Args:
+            path (Path | None): The file the cache is loaded from and saved to. Defaults to None, for an in-memory
+                cache.
+            entries (dict[str, CachedDir] | None): Listings from a previous scan, keyed by directory path. Defaults
+                to None.
+            racy_window_ns (int): Directories modified this recently before they were read are not cached, since a
+                change in the same mtime tick would go unnoticed. Defaults to two seconds.
+        """
+        self.path = path
+        self.racy_window_ns = racy_window_ns
+        self.hits = 0
+        self.misses = 0
+        self._previous = entries or {}
+        self._current: dict[str, CachedDir] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: Path) -> "ScanCache":
+        """Load a cache from a file, starting empty if the file does not exist.
+
+        Args:
+            path (Path): The cache file.
+
+        Returns:
+            ScanCache: The loaded cache.
+
+        Raises:
+            ValueError: If the file was written by an incompatible version.
+        """
+        if not path.exists():
+            return cls(path)
+        with path.open(encoding="utf-8") as file:
+            data = json.load(file)
+        if data.get("version") != _CACHE_VERSION:
+            msg = f"Scan cache version not supported: {data.get('version')}"
+            raise ValueError(msg)
+        entries = {dirpath: CachedDir(*fields) for dirpath, fields in data["dirs"].items()}
+        return cls(path, entries=entries)
+
+    def save(self, path: Path | None = None) -> None:
+        """Save the directories read since the cache was constructed, dropping any that were not seen.
+
+        Args:
+            path (Path | None): The file to save to. Defaults to the path the cache was constructed with.
+
+        Raises:
+            ValueError: If no path was given.
+        """
+        path = path or self.path
+        if path is None:
+            msg = "No path to save scan cache to"
+            raise ValueError(msg)
+        data = {
+            "version": _CACHE_VERSION,
+            "dirs": {
+                dirpath: [d.device, d.inode, d.mtime_ns, d.files_size, d.subdir_names]
+                for dirpath, d in self._current.items()
+            },
+        }
+        tmp_path = path.with_name(path.name + ".tmp")
+        with tmp_path.open("w", encoding="utf-8") as file:
+            json.dump(data, file, separators=(",", ":"))
+        tmp_path.replace(path)
+
+    @property
+    def hit_rate(self) -> float:
+        """Get the fraction of directory reads served from the cache.
+
+        Returns:
+            float: The hit rate between 0 and 1, or 0 if no directories were read.
+        """
+        n_reads = self.hits + self.misses
+        return self.hits / n_reads if n_reads else 0.0
+
+    def read_dir(self, dirpath: str | Path) -> tuple[int, list[str]]:
+        """Read a directory, reusing the cached listing if the directory is unchanged.
+
+        Args:
+            dirpath (str | Path): The path of the directory to read.
+
+        Returns:
+            tuple[int, list[str]]: The total size of the files directly in the directory and the names of its
+                subdirectories.
+        """
+        key = str(dirpath)
+        stat = Path(dirpath).stat()
+        cached = self._current.get(key) or self._previous.get(key)
+        if cached is not None and (cached.device, cached.inode, cached.mtime_ns) == (
+            stat.st_dev,
+            stat.st_ino,
+            stat.st_mtime_ns,
+        ):
+            with self._lock:
+                self.hits += 1
+                self._current[key] = cached
+            return cached.files_size, list(cached.subdir_names)
+
+        read_time_ns = time.time_ns()
+        files_size, subdir_names = read_dir(dirpath)
+        with self._lock:
+            self.misses += 1
+            if stat.st_mtime_ns < read_time_ns - self.racy_window_ns:
+                self._current[key] = CachedDir(stat.st_dev, stat.st_ino, stat.st_mtime_ns, files_size, subdir_names)
+        return files_size, list(subdir_names)
@@ -0,0 +1,39 @@
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+
+from colorama import Fore
+
+from dirstuff.summary.memory_utilities import to_size_str
+
+# ruff: noqa: T201
+
+
+@dataclass
+class SizeDelta:
+    """The change in size of a directory between two scans."""
+
+    path: Path
+    old_size: int
+    new_size: int
+
+    @property
+    def delta(self) -> int:
+        """Get the change in size in bytes, positive if the directory grew.
+
+        Returns:
+            int: The new size minus the old size.
+        """
+        return self.new_size - self.old_size
+
+    def print(self) -> None:
+        """Print the change in size, then the old and new sizes and the path of the directory."""
+        sign = "+" if self.delta >= 0 else "-"
+        formatted_delta = f"{sign}{to_size_str(abs(self.delta)).strip()}"
+        formatted_sizes = f"{to_size_str(self.old_size)} -> {to_size_str(self.new_size)}"
+        if sys.stdout.isatty():
+            color = Fore.RED if self.delta >= 0 else Fore.GREEN
+            formatted_delta = f"{color}{formatted_delta:>10}{Fore.RESET}"
+            print(f" |-> {formatted_delta} ({formatted_sizes}) > {Fore.GREEN}{self.path}{Fore.RESET}")
+        else:
+            print(f" |-> {formatted_delta:>10} ({formatted_sizes}) > {self.path}")
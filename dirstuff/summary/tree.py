@@ -1,28 +1,100 @@
+import gc
+import heapq
+import itertools
 import os
+import sys
+from collections.abc import Collection, Iterator
 from pathlib import Path
-from typing import Iterator
-
-from colorama import Fore
+from typing import TYPE_CHECKING, Literal, overload
 
 from dirstuff.summary.filter_criteria import FilterCriteria
-from dirstuff.summary.memory_utilities import to_size_str
+from dirstuff.summary.name_index import NameIndex, NameMatch
+from dirstuff.summary.path_utilities import join_path
+from dirstuff.summary.records import TreeRecords, load_snapshot, save_snapshot
+from dirstuff.summary.render import RenderEntry, largest_first, render
+from dirstuff.summary.size_delta import SizeDelta
+
+if TYPE_CHECKING:
+    from dirstuff.summary.extension_histogram import ExtensionHistogram
+
+
+def _walk_trees(
+    root: "Tree",
+    absolute: bool,
+    max_depth: int | None,
+    limit: int | None,
+    min_bytes: int,
+) -> Iterator[RenderEntry]:
+    root_label = str(root.path) if absolute else str(Path(root.name))
+    stack = [(root, root_label, 0)]
+    while stack:
+        tree, label, tree_depth = stack.pop()
+        yield label, tree.size, tree_depth
+        if max_depth is not None and tree_depth >= max_depth:
+            continue
+        children = largest_first(
+            (child for child in tree.children if child.size >= min_bytes), key=lambda child: child.size, limit=limit
+        )
+        for child in reversed(children):
+            child_label = join_path(label, child.name) if absolute else child.name
+            stack.append((child, child_label, tree_depth + 1))
+
 
-# ruff: noqa: T201
+def _have_same_children(old_children: dict[str, "Tree"], new_children: list["Tree"]) -> bool:
+    """Check whether two directories have children with the same names and sizes."""
+    if len(old_children) != len(new_children):
+        return False
+    for new_child in new_children:
+        old_child = old_children.get(new_child.name)
+        if old_child is None or old_child.size != new_child.size:
+            return False
+    return True
+
+
+def _index_trees_by_name(trees: Iterator["Tree"]) -> NameIndex["Tree"]:
+    trees_by_name: dict[str, list[Tree]] = {}
+    for tree in trees:
+        trees_by_name.setdefault(tree.name, []).append(tree)
+    return NameIndex(trees_by_name)
 
 
 class Tree:
-    """A tree structure to represent a directory and its children."""
+    """A tree structure to represent a directory and its children.
+
+    Each tree stores only its interned name and a reference to its parent, and its path is rebuilt from its
+    ancestors on demand. A root also remembers the directory that contains it.
+    """
+
+    __slots__ = ("children", "dirname", "extensions", "name", "parent", "size")
 
-    def __init__(self, path: Path, size: int = 0):
+    def __init__(self, path: Path | str, size: int = 0):
         """Construct a Tree object.
 
         Args:
-            path (Path): The path of the directory.
+            path (Path | str): The path of the directory. A tree that will only be used as a child can be given just
+                its name.
             size (int): The size of the directory in bytes. Defaults to 0.
         """
         self.size = size
-        self.path = path
+        self.dirname, name = os.path.split(str(path))
+        self.name = sys.intern(name)
+        self.parent: Tree | None = None
         self.children: list[Tree] = []
+        self.extensions: ExtensionHistogram | None = None
+
+    @property
+    def path(self) -> Path:
+        """Get the path of the directory, rebuilt from the names of its ancestors.
+
+        Returns:
+            Path: The path of the directory.
+        """
+        names: list[str] = []
+        tree = self
+        while tree.parent is not None:
+            names.append(tree.name)
+            tree = tree.parent
+        return Path(tree.dirname, tree.name, *reversed(names))
 
     def set_size(self, n_bytes: int) -> None:
         """Manually set the size of the directory in bytes.
@@ -43,28 +115,155 @@ class Tree:
     def add_child(self, child: "Tree") -> None:
         """Add a child to the directory.
 
+        The child keeps only its name, and its path is rebuilt relative to this tree.
+
         Args:
             child (Tree): The child tree to add as a subtree.
         """
+        child.dirname = ""
+        child.parent = self
         self.children.append(child)
 
-    def filter(self, filter_criteria: FilterCriteria) -> "Tree":
+    def to_records(self) -> TreeRecords:
+        """Flatten the tree into preorder records.
+
+        Returns:
+            TreeRecords: The records of every directory in the tree.
+        """
+        records = TreeRecords()
+        stack: list[tuple[Tree, int]] = [(self, -1)]
+        while stack:
+            tree, parent_index = stack.pop()
+            index = len(records.names)
+            records.names.append(tree.name)
+            records.parents.append(parent_index)
+            records.sizes.append(tree.size)
+            stack.extend((child, index) for child in reversed(tree.children))
+        return records
+
+    def load_records(self, records: TreeRecords) -> None:
+        """Add the subtree described by preorder records below this tree.
+
+        The first record describes this tree itself, so only its size is used and its name is ignored.
+
+        Args:
+            records (TreeRecords): The records to load.
+        """
+        self.size = records.sizes[0]
+        nodes = [self]
+        # Children are built without the constructor, since their names need no splitting, and the cyclic garbage
+        # collector is paused, since it would otherwise rescan the growing tree many times over
+        new_tree, intern = Tree.__new__, sys.intern
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            for name, parent_index, size in zip(
+                itertools.islice(records.names, 1, None),
+                itertools.islice(records.parents, 1, None),
+                itertools.islice(records.sizes, 1, None),
+            ):
+                parent = nodes[parent_index]
+                child = new_tree(Tree)
+                child.size = size
+                child.dirname = ""
+                child.name = intern(name)
+                child.parent = parent
+                child.children = []
+                child.extensions = None
+                parent.children.append(child)
+                nodes.append(child)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+
+    @classmethod
+    def from_records(cls, path: Path, records: TreeRecords) -> "Tree":
+        """Construct a tree from preorder records.
+
+        Args:
+            path (Path): The path of the root directory.
+            records (TreeRecords): The records to load.
+
+        Returns:
+            Tree: The reconstructed tree.
+        """
+        tree = cls(path)
+        tree.load_records(records)
+        return tree
+
+    def save(self, path: Path) -> None:
+        """Save the tree to a snapshot file.
+
+        Args:
+            path (Path): The snapshot file to write.
+        """
+        save_snapshot(path, self.path, self.to_records())
+
+    @classmethod
+    def load(cls, path: Path) -> "Tree":
+        """Load a tree from a snapshot file.
+
+        Args:
+            path (Path): The snapshot file to read.
+
+        Returns:
+            Tree: The loaded tree.
+        """
+        root_path, records = load_snapshot(path)
+        return cls.from_records(root_path, records)
+
+    @overload
+    def filter(self, filter_criteria: FilterCriteria, *, lazy: Literal[False] = False) -> "Tree": ...
+
+    @overload
+    def filter(self, filter_criteria: FilterCriteria, *, lazy: Literal[True]) -> "TreeView": ...
+
+    def filter(self, filter_criteria: FilterCriteria, *, lazy: bool = False) -> "Tree | TreeView":
         """Filter the tree based on the filter criteria.
 
         Args:
             filter_criteria (FilterCriteria): The filter criteria to apply.
+            lazy (bool): Return a view that applies the criteria as it is walked instead of copying the directories
+                that pass. Defaults to False.
 
         Returns:
-            Tree: The filtered tree.
+            Tree | TreeView: The filtered tree, or a view of this tree if lazy.
         """
+        if lazy:
+            return TreeView(self, (filter_criteria,))
         filtered_tree = Tree(self.path, size=self.size)
-        for child in self.children:
-            if child.size >= filter_criteria.min_bytes:
-                filtered_child = child.filter(filter_criteria)
-                filtered_tree.add_child(filtered_child)
+        filtered_tree.extensions = self.extensions
+        stack = [(self, filtered_tree)]
+        while stack:
+            tree, filtered = stack.pop()
+            for child in tree.children:
+                if child.size >= filter_criteria.min_bytes:
+                    filtered_child = Tree(child.name, size=child.size)
+                    filtered_child.extensions = child.extensions
+                    filtered.add_child(filtered_child)
+                    stack.append((child, filtered_child))
 
         return filtered_tree
 
+    def walk(
+        self,
+        absolute: bool = False,
+        max_depth: int | None = None,
+        limit: int | None = None,
+    ) -> Iterator[RenderEntry]:
+        """Walk the tree in display order, with each directory's children largest first.
+
+        Args:
+            absolute (bool): Label directories with their absolute paths rather than their names. Defaults to False.
+            max_depth (int | None): The deepest level to walk, where the children of this tree are at depth 1.
+                Defaults to None, for no limit.
+            limit (int | None): The number of largest children to walk in each directory. Defaults to None, for all.
+
+        Returns:
+            Iterator[RenderEntry]: The label, size and depth of each directory, in preorder.
+        """
+        return _walk_trees(self, absolute, max_depth, limit, min_bytes=0)
+
     def print(self, absolute: bool = False, depth: int = 0, recursive: bool = True) -> None:
         """Print the tree structure.
 
@@ -73,38 +272,298 @@ class Tree:
             depth (int): The depth of the tree. Defaults to 0.
             recursive (bool): Print the tree recursively. Defaults to True.
         """
-        formatted_size = to_size_str(self.size)
-        indent = "  " * depth
-        _, dir_str = os.path.split(str(self.path))
-        directory = Path(dir_str)
+        entries = self.walk(absolute=absolute, max_depth=None if recursive else 0)
+        render(((label, size, depth + entry_depth) for label, size, entry_depth in entries), sys.stdout)
+
+    def top_k(self, k: int, max_depth: int | None = None) -> list["Tree"]:
+        """Find the largest directories under this tree, largest first.
+
+        A directory is never larger than its parent, so a best-first walk that always expands the largest directory
+        seen so far produces directories in descending order of size. The walk stops after k directories, having
+        visited only them and their children rather than the whole tree.
+
+        Args:
+            k (int): The number of directories to find.
+            max_depth (int | None): The deepest level to include, where the children of this tree are at depth 1.
+                Defaults to None, for no limit.
+
+        Returns:
+            list[Tree]: Up to k of the largest directories, not including this tree itself.
+        """
+        tiebreaker = itertools.count()
+        heap = [(-child.size, next(tiebreaker), 1, child) for child in self.children]
+        heapq.heapify(heap)
+        largest: list[Tree] = []
+        while heap and len(largest) < k:
+            _, _, depth, tree = heapq.heappop(heap)
+            largest.append(tree)
+            if max_depth is None or depth < max_depth:
+                for child in tree.children:
+                    heapq.heappush(heap, (-child.size, next(tiebreaker), depth + 1, child))
+        return largest
+
+    def diff(self, other: "Tree", limit: int | None = None) -> list[SizeDelta]:
+        """Compare this tree with a later scan of the same directory.
+
+        Both trees are walked together, matching children by name. A directory with the same size in both trees, and
+        whose children have the same names and sizes too, is taken to be unchanged and is not descended into, so the
+        walk only visits the parts of the trees that changed. A directory whose size is unchanged because growth in
+        one child offsets shrinkage in another is still descended into, though it is not reported itself. Changes
+        that offset each other deeper down than its children are not found. A directory present in only one tree is
+        reported as a whole, without its subdirectories.
+
+        Args:
+            other (Tree): The later tree.
+            limit (int | None): The number of changes to return. Defaults to None, for all of them.
+
+        Returns:
+            list[SizeDelta]: The directories that changed size, ranked by the absolute change in size.
+        """
+        deltas: list[SizeDelta] = []
+        stack: list[tuple[Tree, Tree]] = [(self, other)]
+        while stack:
+            old, new = stack.pop()
+            old_children = {child.name: child for child in old.children}
+            if old.size == new.size:
+                if _have_same_children(old_children, new.children):
+                    continue
+            else:
+                deltas.append(SizeDelta(new.path, old.size, new.size))
+            for new_child in new.children:
+                old_child = old_children.pop(new_child.name, None)
+                if old_child is not None:
+                    stack.append((old_child, new_child))
+                elif new_child.size > 0:
+                    deltas.append(SizeDelta(new_child.path, 0, new_child.size))
+            deltas.extend(SizeDelta(child.path, child.size, 0) for child in old_children.values() if child.size > 0)
+
+        if limit is not None:
+            return heapq.nlargest(limit, deltas, key=lambda delta: abs(delta.delta))
+        return sorted(deltas, key=lambda delta: -abs(delta.delta))
+
+    def iter_trees(self) -> Iterator["Tree"]:
+        """Iterate over this tree and every directory below it, in preorder.
+
+        Returns:
+            Iterator[Tree]: The directories in the tree, starting with this tree.
+        """
+        stack = [self]
+        while stack:
+            tree = stack.pop()
+            yield tree
+            stack.extend(reversed(tree.children))
 
-        if absolute:
-            directory = self.path
+    def get_name_index(self) -> NameIndex["Tree"]:
+        """Index every directory in the tree by name, in a single pass.
 
-        print(f"{indent} |-> ", end="")
-        print(f"{Fore.BLUE}{formatted_size}", end="")
-        print(f"{Fore.RESET} > ", end="")
-        print(f"{Fore.GREEN}{directory}", end="")
-        print(f"{Fore.RESET}")
+        The index is built again on every call rather than cached, since the tree can change after it is indexed.
+        Build the index once and reuse it, such as by passing it to print_search, to answer many searches over the same
+        tree.
 
-        if recursive:
-            for child in sorted(self.children, key=lambda tree: -tree.get_size()):
-                child.print(absolute=absolute, depth=depth + 1)
+        Returns:
+            NameIndex[Tree]: The index of the directories in the tree.
+        """
+        return _index_trees_by_name(self.iter_trees())
 
-    def print_search(self, *, dir_name: str) -> None:
+    def print_search(
+        self,
+        *,
+        dir_name: str | Collection[str],
+        match: NameMatch = "exact",
+        name_index: NameIndex["Tree"] | None = None,
+    ) -> None:
         """Print all directories with the given name.
 
         Args:
-            dir_name (str): The name of the directory to search for.
+            dir_name (str | Collection[str]): The name of the directory to search for, or several names to search
+                for at once.
+            match (NameMatch): How to match names: "exact", or "glob" or "regex" to treat them as patterns. Defaults
+                to "exact".
+            name_index (NameIndex[Tree] | None): An index from get_name_index to search, so that many searches
+                index the directories only once. Defaults to None, to index them for this search.
         """
-        trees = self._iter_trees_with_name(self, dir_name)
-        for tree in sorted(trees, key=lambda t: -t.get_size()):
-            tree.print(absolute=True, recursive=False)
+        dir_names = [dir_name] if isinstance(dir_name, str) else dir_name
+        if name_index is None:
+            name_index = self.get_name_index()
+        trees = name_index.search(dir_names, match=match)
+        entries = ((str(tree.path), tree.size, 0) for tree in sorted(trees, key=lambda t: -t.size))
+        render(entries, sys.stdout)
 
-    @classmethod
-    def _iter_trees_with_name(cls, tree: "Tree", dir_name: str) -> Iterator["Tree"]:
-        if tree.path.name == dir_name:
+
+class TreeView:
+    """A filtered view of a tree that applies its criteria while it is walked, without copying any directories.
+
+    A view holds only the tree it looks at and its criteria, so views are cheap to create and can be chained to
+    narrow the criteria further. The root of the view is always shown, like the root of a filtered tree.
+    """
+
+    __slots__ = ("criteria", "min_bytes", "tree")
+
+    def __init__(self, tree: Tree, criteria: tuple[FilterCriteria, ...]):
+        """Construct a TreeView object.
+
+        Args:
+            tree (Tree): The tree to view.
+            criteria (tuple[FilterCriteria, ...]): The filter criteria that every directory below the root must pass.
+        """
+        self.tree = tree
+        self.criteria = criteria
+        self.min_bytes = max((filter_criteria.min_bytes for filter_criteria in criteria), default=0)
+
+    @property
+    def name(self) -> str:
+        """Get the name of the directory."""
+        return self.tree.name
+
+    @property
+    def path(self) -> Path:
+        """Get the path of the directory."""
+        return self.tree.path
+
+    def get_size(self) -> int:
+        """Get the size of the directory in bytes.
+
+        Returns:
+            int: The size of the directory in bytes.
+        """
+        return self.tree.size
+
+    @property
+    def children(self) -> list["TreeView"]:
+        """Get views of the children that pass the criteria."""
+        return [TreeView(child, self.criteria) for child in self.tree.children if child.size >= self.min_bytes]
+
+    def filter(self, filter_criteria: FilterCriteria) -> "TreeView":
+        """Narrow the view with further filter criteria.
+
+        Args:
+            filter_criteria (FilterCriteria): The filter criteria to add.
+
+        Returns:
+            TreeView: A view of the same tree that applies both the existing and the new criteria.
+        """
+        return TreeView(self.tree, (*self.criteria, filter_criteria))
+
+    def iter_trees(self) -> Iterator[Tree]:
+        """Iterate over the underlying directories that pass the criteria, in preorder.
+
+        Returns:
+            Iterator[Tree]: The directories in the view, starting with its root.
+        """
+        stack = [self.tree]
+        while stack:
+            tree = stack.pop()
             yield tree
+            stack.extend(child for child in reversed(tree.children) if child.size >= self.min_bytes)
+
+    def get_name_index(self) -> NameIndex[Tree]:
+        """Index the directories in the view by name, in a single pass.
+
+        Like Tree.get_name_index, the index is built again on every call, so build it once to answer many searches.
+
+        Returns:
+            NameIndex[Tree]: The index of the underlying directories that pass the criteria.
+        """
+        return _index_trees_by_name(self.iter_trees())
 
-        for child in tree.children:
-            yield from cls._iter_trees_with_name(child, dir_name)
+    def to_tree(self) -> Tree:
+        """Copy the directories in the view into a new tree.
+
+        Returns:
+            Tree: The filtered tree.
+        """
+        return self.tree.filter(FilterCriteria(min_bytes=self.min_bytes))
+
+    def to_records(self) -> TreeRecords:
+        """Flatten the view into preorder records.
+
+        Returns:
+            TreeRecords: The records of every directory in the view.
+        """
+        records = TreeRecords()
+        stack: list[tuple[Tree, int]] = [(self.tree, -1)]
+        while stack:
+            tree, parent_index = stack.pop()
+            index = len(records.names)
+            records.names.append(tree.name)
+            records.parents.append(parent_index)
+            records.sizes.append(tree.size)
+            stack.extend((child, index) for child in reversed(tree.children) if child.size >= self.min_bytes)
+        return records
+
+    def save(self, path: Path) -> None:
+        """Save the view to a snapshot file.
+
+        Args:
+            path (Path): The snapshot file to write.
+        """
+        save_snapshot(path, self.tree.path, self.to_records())
+
+    def top_k(self, k: int, max_depth: int | None = None) -> list["TreeView"]:
+        """Find the largest directories in the view, largest first.
+
+        Directories below the criteria are smaller than every directory that passes, so they are never reached
+        before the walk stops unless the view has fewer than k directories.
+
+        Args:
+            k (int): The number of directories to find.
+            max_depth (int | None): The deepest level to include. Defaults to None, for no limit.
+
+        Returns:
+            list[TreeView]: Up to k of the largest directories, not including the root of the view.
+        """
+        largest = self.tree.top_k(k, max_depth=max_depth)
+        return [TreeView(tree, self.criteria) for tree in largest if tree.size >= self.min_bytes]
+
+    def walk(
+        self,
+        absolute: bool = False,
+        max_depth: int | None = None,
+        limit: int | None = None,
+    ) -> Iterator[RenderEntry]:
+        """Walk the view in display order, with each directory's children largest first.
+
+        Args:
+            absolute (bool): Label directories with their absolute paths rather than their names. Defaults to False.
+            max_depth (int | None): The deepest level to walk. Defaults to None, for no limit.
+            limit (int | None): The number of largest children to walk in each directory. Defaults to None, for all.
+
+        Returns:
+            Iterator[RenderEntry]: The label, size and depth of each directory, in preorder.
+        """
+        return _walk_trees(self.tree, absolute, max_depth, limit, self.min_bytes)
+
+    def print(self, absolute: bool = False, depth: int = 0, recursive: bool = True) -> None:
+        """Print the directories in the view.
+
+        Args:
+            absolute (bool): Print the absolute directory paths. Defaults to False.
+            depth (int): The depth of the root of the view. Defaults to 0.
+            recursive (bool): Print the directories below the root. Defaults to True.
+        """
+        entries = self.walk(absolute=absolute, max_depth=None if recursive else 0)
+        render(((label, size, depth + entry_depth) for label, size, entry_depth in entries), sys.stdout)
+
+    def print_search(
+        self,
+        *,
+        dir_name: str | Collection[str],
+        match: NameMatch = "exact",
+        name_index: NameIndex[Tree] | None = None,
+    ) -> None:
+        """Print all directories in the view with the given name.
+
+        Args:
+            dir_name (str | Collection[str]): The name of the directory to search for, or several names to search
+                for at once.
+            match (NameMatch): How to match names: "exact", or "glob" or "regex" to treat them as patterns. Defaults
+                to "exact".
+            name_index (NameIndex[Tree] | None): An index from get_name_index to search, so that many searches
+                index the directories only once. Defaults to None, to index them for this search.
+        """
+        dir_names = [dir_name] if isinstance(dir_name, str) else dir_name
+        if name_index is None:
+            name_index = self.get_name_index()
+        trees = name_index.search(dir_names, match=match)
+        entries = ((str(tree.path), tree.size, 0) for tree in sorted(trees, key=lambda t: -t.size))
+        render(entries, sys.stdout)
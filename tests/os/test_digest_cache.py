@@ -0,0 +1,54 @@
+import hashlib
+import os
+
+import pytest
+from dirstuff import DigestCache, File
+from tests.utilities.temp_utilities import create_file
+
+# A modification time safely outside the cache's racy window
+OLD_MTIME_NS = 10**18
+
+
+class TestDigestCache:
+    def test_digest_is_reused_for_unchanged_file(self, tmp_path_factory: pytest.TempPathFactory) -> None:
+        # Set up file system
+        parent_libpath = tmp_path_factory.mktemp("parent")
+        libpath_file = create_file(parent_libpath, "file.txt", text="content")
+        os.utime(libpath_file, ns=(OLD_MTIME_NS, OLD_MTIME_NS))
+
+        # Hash the file twice through a persistent cache
+        cache_libpath = parent_libpath / "digests.db"
+        with DigestCache(cache_libpath) as cache:
+            first = File(libpath_file).digest(cache=cache)
+        with DigestCache(cache_libpath) as cache:
+            second = File(libpath_file).digest(cache=cache)
+            hits = cache.hits
+
+        # Check the second run was served from the cache
+        assert first == second == hashlib.sha256(b"content").hexdigest()
+        assert hits == 1
+
+    def test_digest_is_recomputed_for_changed_file(self, tmp_path_factory: pytest.TempPathFactory) -> None:
+        # Set up file system
+        parent_libpath = tmp_path_factory.mktemp("parent")
+        libpath_file = create_file(parent_libpath, "file.txt", text="content")
+        os.utime(libpath_file, ns=(OLD_MTIME_NS, OLD_MTIME_NS))
+
+        # Hash, change and hash the file again
+        with DigestCache() as cache:
+            File(libpath_file).digest(cache=cache)
+            libpath_file.write_text("changed")
+            os.utime(libpath_file, ns=(OLD_MTIME_NS + 1, OLD_MTIME_NS + 1))
+            digest = File(libpath_file).digest(cache=cache)
+
+            # Check the stale digest was not used
+            assert digest == hashlib.sha256(b"changed").hexdigest()
+            assert (cache.hits, cache.misses) == (0, 2)
+
+    def test_recently_modified_file_is_not_cached(self, tmp_path_factory: pytest.TempPathFactory) -> None:
+        parent_libpath = tmp_path_factory.mktemp("parent")
+        libpath_file = create_file(parent_libpath, "file.txt", text="content")
+        with DigestCache() as cache:
+            File(libpath_file).digest(cache=cache)
+            File(libpath_file).digest(cache=cache)
+            assert cache.hits == 0
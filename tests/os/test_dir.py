@@ -2,7 +2,7 @@ from typing import Iterator
 
 import pytest
 from dirstuff import Dir, Path
-from tests.utilities.temp_utilities import create_directory, create_file
+from tests.utilities.temp_utilities import create_directory, create_file, file_has_text
 
 
 class TestDir:
@@ -197,6 +197,74 @@ class TestDir:
         assert libpath_a.exists()
         assert new_libpath.exists()
 
+    def test_copy_to_copies_dir_with_workers(self, tmp_path_factory: pytest.TempPathFactory) -> None:
+        # Set up file system
+        parent_libpath = tmp_path_factory.mktemp("parent")
+        libpath_a = create_directory(parent_libpath, "folder-a")
+        create_file(libpath_a, "a.txt", text="a")
+        create_file(create_directory(libpath_a, "sub"), "b.txt", text="b")
+        libpath_b = parent_libpath / "folder-b"
+
+        # Copy dir to path on several threads
+        copied_dir = Dir(libpath_a).copy_to(Path(libpath_b), workers=4)
+
+        # Check files were copied
+        assert copied_dir.libpath == libpath_b
+        assert file_has_text(libpath_b / "a.txt", "a")
+        assert file_has_text(libpath_b / "sub" / "b.txt", "b")
+
+    def test_copy_into_copies_dir_with_workers(self, tmp_path_factory: pytest.TempPathFactory) -> None:
+        # Set up file system
+        parent_libpath = tmp_path_factory.mktemp("parent")
+        libpath_a = create_directory(parent_libpath, "folder-a")
+        create_file(libpath_a, "a.txt", text="a")
+        libpath_b = create_directory(parent_libpath, "folder-b")
+
+        # Copy dir into dir on several threads
+        copied_dir = Dir(libpath_a).copy_into(Dir(libpath_b), workers=4)
+
+        # Check files were copied
+        new_libpath = libpath_b / "folder-a"
+        assert copied_dir.libpath == new_libpath
+        assert file_has_text(new_libpath / "a.txt", "a")
+
+    @pytest.mark.parametrize("workers", [1, 4])
+    def test_copy_into_follows_symlinks_with_any_workers(
+        self,
+        tmp_path_factory: pytest.TempPathFactory,
+        workers: int,
+    ) -> None:
+        # Set up file system
+        libpath_a = tmp_path_factory.mktemp("a")
+        libpath_b = tmp_path_factory.mktemp("b")
+        create_file(libpath_a, "file.txt", text="test")
+        (libpath_a / "link").symlink_to("file.txt")
+
+        # Copy dir into dir
+        copied_dir = Dir(libpath_a).copy_into(Dir(libpath_b), workers=workers)
+
+        # Check the symlink was replaced by the file it points to
+        assert not (copied_dir.libpath / "link").is_symlink()
+        assert file_has_text(copied_dir.libpath / "link", "test")
+
+    @pytest.mark.parametrize("workers", [1, 4])
+    def test_copy_into_copies_symlinks_with_any_workers(
+        self,
+        tmp_path_factory: pytest.TempPathFactory,
+        workers: int,
+    ) -> None:
+        # Set up file system
+        libpath_a = tmp_path_factory.mktemp("a")
+        libpath_b = tmp_path_factory.mktemp("b")
+        create_file(libpath_a, "file.txt", text="test")
+        (libpath_a / "link").symlink_to("file.txt")
+
+        # Copy dir into dir keeping symlinks
+        copied_dir = Dir(libpath_a).copy_into(Dir(libpath_b), workers=workers, symlinks=True)
+
+        # Check the symlink was copied as a symlink
+        assert (copied_dir.libpath / "link").readlink().name == "file.txt"
+
     def test_copy_into_raises_when_dir_does_not_exist(self, tmp_path_factory: pytest.TempPathFactory) -> None:
         # Set up file system
         parent_libpath = tmp_path_factory.mktemp("parent")
@@ -221,6 +289,18 @@ class TestDir:
         # Check dir is gone
         assert not libpath.exists()
 
+    def test_delete_removes_dir_with_workers(self, tmp_path_factory: pytest.TempPathFactory) -> None:
+        # Set up file system
+        parent_libpath = tmp_path_factory.mktemp("parent")
+        libpath = create_directory(parent_libpath, "folder")
+        create_file(create_directory(libpath, "sub"), "a.txt")
+
+        # Delete dir on several threads
+        Dir(libpath).delete(workers=4)
+
+        # Check dir no longer exists
+        assert not libpath.exists()
+
     def test_delete_raises_on_not_found(self) -> None:
         # Set up file system
         libpath = Path("folder")
@@ -0,0 +1,117 @@
+import errno
+import os
+import sys
+
+import pytest
+from dirstuff.os import fast_copy
+from dirstuff.os.fast_copy import copy_file, copy_range
+
+
+def raise_cross_device(*_: int) -> int:
+    raise OSError(errno.EXDEV, os.strerror(errno.EXDEV))
+
+
+def raise_type_error(*_: int | None) -> int:
+    msg = "offset must be an integer"
+    raise TypeError(msg)
+
+
+def never_reflink(*_: int) -> bool:
+    return False
+
+
+class TestFastCopy:
+    def test_copy_file_copies_data(self, tmp_path_factory: pytest.TempPathFactory) -> None:
+        # Set up file system
+        parent_libpath = tmp_path_factory.mktemp("parent")
+        data = os.urandom(300_000)
+        (parent_libpath / "a.bin").write_bytes(data)
+
+        # Copy with the best strategy available
+        strategy = copy_file(parent_libpath / "a.bin", parent_libpath / "b.bin")
+        assert strategy in ("reflink", "copy_file_range", "sendfile", "buffered")
+        assert (parent_libpath / "b.bin").read_bytes() == data
+
+    def test_copy_file_falls_back_to_sendfile(
+        self,
+        tmp_path_factory: pytest.TempPathFactory,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        # Set up file system
+        if sys.platform != "linux" or not hasattr(os, "sendfile"):
+            pytest.skip("sendfile only copies between files on Linux")
+        monkeypatch.setattr(fast_copy, "_try_reflink", never_reflink)
+        monkeypatch.setattr(os, "copy_file_range", raise_cross_device, raising=False)
+        parent_libpath = tmp_path_factory.mktemp("parent")
+        data = os.urandom(300_000)
+        (parent_libpath / "a.bin").write_bytes(data)
+
+        # Copy without copy_file_range
+        assert copy_file(parent_libpath / "a.bin", parent_libpath / "b.bin") == "sendfile"
+        assert (parent_libpath / "b.bin").read_bytes() == data
+
+    def test_copy_file_falls_back_to_buffered(
+        self,
+        tmp_path_factory: pytest.TempPathFactory,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        # Set up file system
+        monkeypatch.setattr(fast_copy, "_try_reflink", never_reflink)
+        monkeypatch.delattr(os, "copy_file_range", raising=False)
+        monkeypatch.delattr(os, "sendfile", raising=False)
+        parent_libpath = tmp_path_factory.mktemp("parent")
+        data = os.urandom(3_000_000)
+        (parent_libpath / "a.bin").write_bytes(data)
+
+        # Copy through a buffer
+        assert copy_file(parent_libpath / "a.bin", parent_libpath / "b.bin") == "buffered"
+        assert (parent_libpath / "b.bin").read_bytes() == data
+
+    def test_copy_file_copies_buffered_on_other_platforms(
+        self,
+        tmp_path_factory: pytest.TempPathFactory,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        # Set up file system
+        monkeypatch.setattr(sys, "platform", "darwin")
+        monkeypatch.setattr(os, "sendfile", raise_type_error, raising=False)
+        parent_libpath = tmp_path_factory.mktemp("parent")
+        data = os.urandom(300_000)
+        (parent_libpath / "a.bin").write_bytes(data)
+
+        # Copy where sendfile cannot write to files
+        assert copy_file(parent_libpath / "a.bin", parent_libpath / "b.bin") == "buffered"
+        assert (parent_libpath / "b.bin").read_bytes() == data
+
+    def test_copy_file_copies_empty_file(self, tmp_path_factory: pytest.TempPathFactory) -> None:
+        # Set up file system
+        parent_libpath = tmp_path_factory.mktemp("parent")
+        (parent_libpath / "a.bin").write_bytes(b"")
+        (parent_libpath / "b.bin").write_bytes(b"old")
+
+        # Copy over an existing file
+        copy_file(parent_libpath / "a.bin", parent_libpath / "b.bin")
+        assert (parent_libpath / "b.bin").read_bytes() == b""
+
+    @pytest.mark.parametrize("kernel_copy", [True, False])
+    def test_copy_range_copies_range_at_same_offset(
+        self,
+        tmp_path_factory: pytest.TempPathFactory,
+        monkeypatch: pytest.MonkeyPatch,
+        kernel_copy: bool,
+    ) -> None:
+        # Set up file system
+        if not kernel_copy:
+            monkeypatch.setattr(os, "copy_file_range", raise_cross_device, raising=False)
+        parent_libpath = tmp_path_factory.mktemp("parent")
+        data = os.urandom(10_000)
+        (parent_libpath / "a.bin").write_bytes(data)
+        (parent_libpath / "b.bin").write_bytes(bytes(10_000))
+
+        # Copy the middle of the file
+        with (parent_libpath / "a.bin").open("rb", buffering=0) as source_file, (parent_libpath / "b.bin").open(
+            "r+b", buffering=0
+        ) as target_file:
+            copy_range(source_file, target_file, 2000, 5000)
+        copied = (parent_libpath / "b.bin").read_bytes()
+        assert copied == bytes(2000) + data[2000:7000] + bytes(3000)
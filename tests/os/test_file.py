@@ -1,3 +1,6 @@
+import hashlib
+import shutil
+
 import pytest
 from dirstuff import Dir, File, Path
 from tests.utilities.temp_utilities import create_directory, create_file, file_has_text
@@ -157,6 +160,20 @@ class TestFile:
         assert file_has_text(libpath_file_a, "content")
         assert file_has_text(libpath_file_b, "content")
 
+    def test_copy_to_copies_permissions(self, tmp_path_factory: pytest.TempPathFactory) -> None:
+        # Set up file system
+        parent_libpath = tmp_path_factory.mktemp("parent")
+        libpath_file_a = create_file(parent_libpath, "a.sh", text="content")
+        libpath_file_a.chmod(0o750)
+        libpath_file_b = parent_libpath / "b.sh"
+
+        # Copy file
+        File(libpath_file_a).copy_to(Path(libpath_file_b))
+
+        # Check the permissions were copied with the content
+        assert file_has_text(libpath_file_b, "content")
+        assert libpath_file_b.stat().st_mode & 0o777 == 0o750
+
     def test_copy_to_raises_on_existing_destination(self, tmp_path_factory: pytest.TempPathFactory) -> None:
         # Set up file system
         parent_libpath = tmp_path_factory.mktemp("parent")
@@ -206,6 +223,44 @@ class TestFile:
         assert file_has_text(new_libpath, "content")
         assert file_has_text(libpath_file, "content")
 
+    def test_copy_into_raises_on_same_file(self, tmp_path_factory: pytest.TempPathFactory) -> None:
+        # Set up file system
+        parent_libpath = tmp_path_factory.mktemp("parent")
+        libpath = create_file(parent_libpath, "same.txt", text="content")
+
+        # Copy file into its own directory
+        with pytest.raises(shutil.SameFileError, match="are the same file"):
+            File(libpath).copy_into(Dir(parent_libpath))
+
+        # Check the file was left alone
+        assert file_has_text(libpath, "content")
+
+    def test_copy_into_raises_on_hardlink_to_same_file(self, tmp_path_factory: pytest.TempPathFactory) -> None:
+        # Set up file system
+        parent_libpath = tmp_path_factory.mktemp("parent")
+        libpath = create_file(create_directory(parent_libpath, "folder-a"), "a.txt", text="content")
+        libpath_folder_b = create_directory(parent_libpath, "folder-b")
+        (libpath_folder_b / "a.txt").hardlink_to(libpath)
+
+        # Copy file onto a hardlink to itself
+        with pytest.raises(shutil.SameFileError, match="are the same file"):
+            File(libpath).copy_into(Dir(libpath_folder_b))
+
+        # Check the file was left alone
+        assert file_has_text(libpath, "content")
+
+    def test_copy_to_raises_on_same_file_with_overwrite(self, tmp_path_factory: pytest.TempPathFactory) -> None:
+        # Set up file system
+        parent_libpath = tmp_path_factory.mktemp("parent")
+        libpath = create_file(parent_libpath, "same.txt", text="content")
+
+        # Copy file onto itself
+        with pytest.raises(shutil.SameFileError, match="are the same file"):
+            File(libpath).copy_to(Path(libpath), overwrite_ok=True)
+
+        # Check the file was left alone
+        assert file_has_text(libpath, "content")
+
     def test_copy_into_raises_when_dir_does_not_exist(self, tmp_path_factory: pytest.TempPathFactory) -> None:
         # Set up file system
         parent_libpath = tmp_path_factory.mktemp("parent")
@@ -297,3 +352,19 @@ class TestFile:
         path = file.path
         assert isinstance(path, Path)
         assert path.libpath == libpath_file
+
+    def test_digest_hashes_file_contents(self, tmp_path_factory: pytest.TempPathFactory) -> None:
+        # Set up file system
+        parent_libpath = tmp_path_factory.mktemp("parent")
+        libpath_file = create_file(parent_libpath, "file.txt", text="content")
+
+        # Check digest matches hashlib
+        file = File(libpath_file)
+        assert file.digest() == hashlib.sha256(b"content").hexdigest()
+        assert file.digest("blake2b") == hashlib.blake2b(b"content").hexdigest()
+
+    def test_digest_raises_on_missing_file(self, tmp_path_factory: pytest.TempPathFactory) -> None:
+        parent_libpath = tmp_path_factory.mktemp("parent")
+        file = File(parent_libpath / "missing.txt")
+        with pytest.raises(FileNotFoundError, match="File does not exist"):
+            file.digest()
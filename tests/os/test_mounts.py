@@ -0,0 +1,31 @@
+from pathlib import Path
+
+import pytest
+from dirstuff.os.mounts import read_mount_points
+from tests.utilities.temp_utilities import create_file
+
+
+class TestMounts:
+    def test_read_mount_points_matches_fs_types(self, tmp_path_factory: pytest.TempPathFactory) -> None:
+        # Set up mount table
+        table_libpath = tmp_path_factory.mktemp("proc")
+        mount_table_path = create_file(
+            table_libpath,
+            "mounts",
+            text=(
+                "/dev/sda1 / ext4 rw,relatime 0 0\n"
+                "server:/export /mnt/nfs nfs rw 0 0\n"
+                "sshfs#host: /mnt/remote\\040drive fuse.sshfs rw 0 0\n"
+            ),
+        )
+
+        # Read the mount points of network filesystems
+        mount_points = read_mount_points(["nfs", "fuse.sshfs"], mount_table_path=mount_table_path)
+
+        # Check matching mount points are returned with escapes decoded
+        assert mount_points == {"/mnt/nfs", "/mnt/remote drive"}
+
+    def test_read_mount_points_without_mount_table_raises(self, tmp_path_factory: pytest.TempPathFactory) -> None:
+        table_libpath = tmp_path_factory.mktemp("proc")
+        with pytest.raises(FileNotFoundError, match="Mount table does not exist"):
+            read_mount_points(["nfs"], mount_table_path=Path(table_libpath, "mounts"))
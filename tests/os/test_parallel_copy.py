@@ -0,0 +1,116 @@
+import os
+import shutil
+
+import pytest
+from dirstuff.os import parallel_copy
+from dirstuff.os.parallel_copy import copy_tree
+from tests.utilities.temp_utilities import create_directory, create_file, file_has_text
+
+
+class TestParallelCopy:
+    def test_copy_tree_copies_files_and_metadata(self, tmp_path_factory: pytest.TempPathFactory) -> None:
+        # Set up file system
+        parent_libpath = tmp_path_factory.mktemp("parent")
+        source_libpath = create_directory(parent_libpath, "source")
+        libpath_a = create_file(source_libpath, "a.txt", text="a")
+        sub_libpath = create_directory(source_libpath, "sub")
+        create_file(sub_libpath, "b.txt", text="b")
+        create_directory(source_libpath, "empty")
+        os.utime(libpath_a, ns=(1_000_000_000, 2_000_000_000))
+        libpath_a.chmod(0o640)
+        os.utime(sub_libpath, ns=(3_000_000_000, 4_000_000_000))
+
+        # Copy tree
+        target_libpath = parent_libpath / "target"
+        copy_tree(str(source_libpath), str(target_libpath), workers=4)
+
+        # Check contents and metadata were copied
+        assert file_has_text(target_libpath / "a.txt", "a")
+        assert file_has_text(target_libpath / "sub" / "b.txt", "b")
+        assert (target_libpath / "empty").is_dir()
+        assert (target_libpath / "a.txt").stat().st_mtime_ns == 2_000_000_000
+        assert (target_libpath / "a.txt").stat().st_mode & 0o777 == 0o640
+        assert (target_libpath / "sub").stat().st_mtime_ns == 4_000_000_000
+
+    def test_copy_tree_follows_symlinks(self, tmp_path_factory: pytest.TempPathFactory) -> None:
+        # Set up file system
+        parent_libpath = tmp_path_factory.mktemp("parent")
+        source_libpath = create_directory(parent_libpath, "source")
+        create_file(source_libpath, "a.txt", text="a")
+        create_file(create_directory(source_libpath, "sub"), "b.txt", text="b")
+        (source_libpath / "link").symlink_to("a.txt")
+        (source_libpath / "sub_link").symlink_to("sub")
+
+        # Copy tree
+        target_libpath = parent_libpath / "target"
+        copy_tree(str(source_libpath), str(target_libpath), workers=2)
+
+        # Check symlinks were replaced by what they point to
+        assert not (target_libpath / "link").is_symlink()
+        assert file_has_text(target_libpath / "link", "a")
+        assert not (target_libpath / "sub_link").is_symlink()
+        assert file_has_text(target_libpath / "sub_link" / "b.txt", "b")
+
+    def test_copy_tree_copies_symlinks_as_symlinks(self, tmp_path_factory: pytest.TempPathFactory) -> None:
+        # Set up file system
+        parent_libpath = tmp_path_factory.mktemp("parent")
+        source_libpath = create_directory(parent_libpath, "source")
+        create_file(source_libpath, "a.txt", text="a")
+        (source_libpath / "link").symlink_to("a.txt")
+        (source_libpath / "dangling").symlink_to("missing.txt")
+
+        # Copy tree keeping symlinks
+        target_libpath = parent_libpath / "target"
+        copy_tree(str(source_libpath), str(target_libpath), workers=2, symlinks=True)
+
+        # Check symlinks were copied as symlinks
+        assert (target_libpath / "link").readlink().name == "a.txt"
+        assert (target_libpath / "dangling").readlink().name == "missing.txt"
+
+    def test_copy_tree_copies_large_files_in_chunks(
+        self,
+        tmp_path_factory: pytest.TempPathFactory,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        # Set up file system
+        monkeypatch.setattr(parallel_copy, "_CHUNK_SIZE", 1000)
+        parent_libpath = tmp_path_factory.mktemp("parent")
+        source_libpath = create_directory(parent_libpath, "source")
+        data = os.urandom(4500)
+        (source_libpath / "large.bin").write_bytes(data)
+        os.utime(source_libpath / "large.bin", ns=(1_000_000_000, 2_000_000_000))
+
+        # Copy tree
+        target_libpath = parent_libpath / "target"
+        copy_tree(str(source_libpath), str(target_libpath), workers=3)
+
+        # Check the file was copied whole
+        assert (target_libpath / "large.bin").read_bytes() == data
+        assert (target_libpath / "large.bin").stat().st_mtime_ns == 2_000_000_000
+
+    def test_copy_tree_reports_errors_after_copying_the_rest(self, tmp_path_factory: pytest.TempPathFactory) -> None:
+        # Set up file system
+        parent_libpath = tmp_path_factory.mktemp("parent")
+        source_libpath = create_directory(parent_libpath, "source")
+        create_file(source_libpath, "a.txt", text="a")
+        os.mkfifo(source_libpath / "pipe")
+
+        # Copy tree with a file that cannot be copied
+        target_libpath = parent_libpath / "target"
+        with pytest.raises(shutil.Error) as error_info:
+            copy_tree(str(source_libpath), str(target_libpath), workers=2)
+
+        # Check the error names the file and the other file was copied
+        (error,) = error_info.value.args[0]
+        assert error[0] == str(source_libpath / "pipe")
+        assert file_has_text(target_libpath / "a.txt", "a")
+
+    def test_copy_tree_raises_on_existing_target(self, tmp_path_factory: pytest.TempPathFactory) -> None:
+        # Set up file system
+        parent_libpath = tmp_path_factory.mktemp("parent")
+        source_libpath = create_directory(parent_libpath, "source")
+        target_libpath = create_directory(parent_libpath, "target")
+
+        # Copy onto an existing directory
+        with pytest.raises(FileExistsError):
+            copy_tree(str(source_libpath), str(target_libpath))
@@ -0,0 +1,103 @@
+import os
+import shutil
+from typing import Any
+
+import pytest
+from dirstuff.os import parallel_delete
+from dirstuff.os.parallel_delete import DeleteStats, delete_tree
+from tests.utilities.temp_utilities import create_directory, create_file
+
+
+class TestParallelDelete:
+    def test_delete_tree_removes_everything(
+        self,
+        tmp_path_factory: pytest.TempPathFactory,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        # Set up file system
+        monkeypatch.setattr(parallel_delete, "_SUBTREES_PER_WORKER", 1)
+        parent_libpath = tmp_path_factory.mktemp("parent")
+        root_libpath = create_directory(parent_libpath, "root")
+        create_file(root_libpath, "a.txt")
+        for i in range(5):
+            libpath = create_directory(root_libpath, f"sub-{i}")
+            create_file(libpath, "b.txt")
+            create_file(create_directory(libpath, "deeper"), "c.txt")
+
+        # Delete tree
+        stats = delete_tree(str(root_libpath), workers=2)
+
+        # Check every entry was counted and removed
+        assert stats == DeleteStats(n_files=11, n_dirs=11)
+        assert not root_libpath.exists()
+        assert parent_libpath.exists()
+
+    def test_delete_tree_removes_symlinks_without_following(self, tmp_path_factory: pytest.TempPathFactory) -> None:
+        # Set up file system
+        parent_libpath = tmp_path_factory.mktemp("parent")
+        outside_libpath = create_directory(parent_libpath, "outside")
+        create_file(outside_libpath, "keep.txt")
+        root_libpath = create_directory(parent_libpath, "root")
+        (root_libpath / "link").symlink_to(outside_libpath)
+
+        # Delete tree
+        delete_tree(str(root_libpath), workers=2)
+
+        # Check the symlink target was left alone
+        assert not root_libpath.exists()
+        assert (outside_libpath / "keep.txt").exists()
+
+    def test_delete_tree_reports_progress(self, tmp_path_factory: pytest.TempPathFactory) -> None:
+        # Set up file system
+        parent_libpath = tmp_path_factory.mktemp("parent")
+        root_libpath = create_directory(parent_libpath, "root")
+        for i in range(3):
+            create_file(create_directory(root_libpath, f"sub-{i}"), "a.txt")
+
+        # Delete tree
+        reports: list[DeleteStats] = []
+        delete_tree(str(root_libpath), workers=2, progress=reports.append)
+
+        # Check the last report has the totals
+        assert reports[-1] == DeleteStats(n_files=3, n_dirs=4)
+
+    def test_delete_tree_reports_errors_after_deleting_the_rest(
+        self,
+        tmp_path_factory: pytest.TempPathFactory,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        # Set up file system
+        parent_libpath = tmp_path_factory.mktemp("parent")
+        root_libpath = create_directory(parent_libpath, "root")
+        create_file(create_directory(root_libpath, "sub-a"), "stuck.txt")
+        create_file(create_directory(root_libpath, "sub-b"), "a.txt")
+        unlink = os.unlink
+
+        def unlink_unless_stuck(path: str, *args: Any, **kwargs: Any) -> None:
+            if path == "stuck.txt":
+                msg = "Operation not permitted"
+                raise PermissionError(msg)
+            unlink(path, *args, **kwargs)
+
+        monkeypatch.setattr(os, "unlink", unlink_unless_stuck)
+
+        # Delete tree with a file that cannot be removed
+        with pytest.raises(shutil.Error) as error_info:
+            delete_tree(str(root_libpath), workers=2)
+
+        # Check the file, its directories and nothing else failed
+        failed_paths = {path for path, _ in error_info.value.args[0]}
+        assert failed_paths == {
+            str(root_libpath / "sub-a" / "stuck.txt"),
+            str(root_libpath / "sub-a"),
+            str(root_libpath),
+        }
+        assert not (root_libpath / "sub-b").exists()
+
+    def test_delete_tree_raises_on_not_found(self, tmp_path_factory: pytest.TempPathFactory) -> None:
+        # Set up file system
+        parent_libpath = tmp_path_factory.mktemp("parent")
+
+        # Delete a directory that does not exist
+        with pytest.raises(FileNotFoundError, match="Dir does not exist"):
+            delete_tree(str(parent_libpath / "missing"))
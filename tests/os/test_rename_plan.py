@@ -0,0 +1,75 @@
+import pytest
+from dirstuff import Dir
+from dirstuff.os.rename_plan import plan_rename
+from tests.utilities.temp_utilities import create_directory, create_file
+
+
+class TestRenamePlan:
+    def test_plan_renames_files_in_subdirectories(self, tmp_path_factory: pytest.TempPathFactory) -> None:
+        # Set up file system
+        root_libpath = tmp_path_factory.mktemp("root")
+        create_file(root_libpath, "a.jpeg")
+        sub_libpath = create_directory(root_libpath, "photos.jpeg")
+        create_file(sub_libpath, "b.jpeg")
+        create_file(sub_libpath, "c.png")
+
+        # Plan renames without changing anything
+        plan = Dir(root_libpath).plan_rename_regex(r"\.jpeg$", ".jpg")
+        assert not plan.conflicts
+        assert sorted((rename.source, rename.target) for rename in plan.renames) == [
+            (str(root_libpath / "a.jpeg"), str(root_libpath / "a.jpg")),
+            (str(sub_libpath / "b.jpeg"), str(sub_libpath / "b.jpg")),
+        ]
+        assert (root_libpath / "a.jpeg").exists()
+
+        # Apply the plan
+        assert plan.apply() == 2
+        assert (root_libpath / "a.jpg").exists()
+        assert (sub_libpath / "b.jpg").exists()
+        assert (sub_libpath / "c.png").exists()
+
+    def test_plan_renames_dirs_after_their_contents(self, tmp_path_factory: pytest.TempPathFactory) -> None:
+        # Set up file system
+        root_libpath = tmp_path_factory.mktemp("root")
+        outer_libpath = create_directory(root_libpath, "old-outer")
+        inner_libpath = create_directory(outer_libpath, "old-inner")
+        create_file(inner_libpath, "old-file.txt")
+
+        # Rename files and directories
+        plan = plan_rename(str(root_libpath), r"^old-", "new-", targets="all")
+        assert plan.apply() == 3
+        assert (root_libpath / "new-outer" / "new-inner" / "new-file.txt").exists()
+
+    def test_plan_skips_subdirectories_when_not_recursive(self, tmp_path_factory: pytest.TempPathFactory) -> None:
+        # Set up file system
+        root_libpath = tmp_path_factory.mktemp("root")
+        create_file(root_libpath, "a.txt")
+        sub_libpath = create_directory(root_libpath, "sub")
+        create_file(sub_libpath, "b.txt")
+
+        # Plan renames of the top level only
+        plan = plan_rename(str(root_libpath), r"\.txt$", ".md", recursive=False)
+        assert [rename.target for rename in plan.renames] == [str(root_libpath / "a.md")]
+
+    def test_plan_reports_conflicts(self, tmp_path_factory: pytest.TempPathFactory) -> None:
+        # Set up file system
+        root_libpath = tmp_path_factory.mktemp("root")
+        create_file(root_libpath, "a-1.txt")
+        create_file(root_libpath, "a-2.txt")
+        create_file(root_libpath, "b-1.txt")
+        create_file(root_libpath, "b.txt")
+
+        # Plan renames that collide with each other and with an existing file
+        plan = plan_rename(str(root_libpath), r"-\d", "")
+        assert len(plan.renames) == 1
+        assert len(plan.conflicts) == 2
+        assert {rename.target for rename in plan.conflicts} == {
+            str(root_libpath / "a.txt"),
+            str(root_libpath / "b.txt"),
+        }
+
+        # Applying a plan with conflicts renames nothing
+        with pytest.raises(FileExistsError, match="Rename plan has 2 conflicts"):
+            plan.apply()
+        assert (root_libpath / "a-1.txt").exists()
+        assert (root_libpath / "a-2.txt").exists()
@@ -0,0 +1,174 @@
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+from dirstuff.os import resumable_move
+from dirstuff.os.resumable_move import MoveJournal, move_tree
+from tests.utilities.temp_utilities import create_directory, create_file, file_has_text
+
+
+class TestResumableMove:
+    def test_move_tree_moves_files_and_removes_source(self, tmp_path_factory: pytest.TempPathFactory) -> None:
+        # Set up file system
+        parent_libpath = tmp_path_factory.mktemp("parent")
+        source_libpath = create_directory(parent_libpath, "source")
+        libpath_a = create_file(source_libpath, "a.txt", text="a")
+        sub_libpath = create_directory(source_libpath, "sub")
+        create_file(sub_libpath, "b.txt", text="b")
+        (source_libpath / "link").symlink_to("a.txt")
+        os.utime(libpath_a, ns=(1_000_000_000, 2_000_000_000))
+
+        # Move tree
+        target_libpath = parent_libpath / "target"
+        move_tree(str(source_libpath), str(target_libpath), workers=4)
+
+        # Check everything was moved with its metadata
+        assert not source_libpath.exists()
+        assert file_has_text(target_libpath / "a.txt", "a")
+        assert file_has_text(target_libpath / "sub" / "b.txt", "b")
+        assert (target_libpath / "link").readlink().name == "a.txt"
+        assert (target_libpath / "a.txt").stat().st_mtime_ns == 2_000_000_000
+
+    def test_move_tree_resumes_after_failure(self, tmp_path_factory: pytest.TempPathFactory) -> None:
+        # Set up file system
+        parent_libpath = tmp_path_factory.mktemp("parent")
+        source_libpath = create_directory(parent_libpath, "source")
+        create_file(source_libpath, "a.txt", text="a")
+        sub_libpath = create_directory(source_libpath, "sub")
+        create_file(sub_libpath, "b.txt", text="b")
+        os.mkfifo(sub_libpath / "pipe")
+        target_libpath = parent_libpath / "target"
+        journal_path = parent_libpath / "move.db"
+
+        # Move tree with a file that cannot be moved
+        with MoveJournal(journal_path) as journal, pytest.raises(shutil.Error) as error_info:
+            move_tree(str(source_libpath), str(target_libpath), journal=journal)
+
+        # Check the other files were moved and the failure was kept
+        ((path, _, _),) = error_info.value.args[0]
+        assert path == str(sub_libpath / "pipe")
+        assert not (source_libpath / "a.txt").exists()
+        assert file_has_text(target_libpath / "sub" / "b.txt", "b")
+
+        # Resume the move once the file is gone
+        (sub_libpath / "pipe").unlink()
+        with MoveJournal(journal_path) as journal:
+            move_tree(str(source_libpath), str(target_libpath), journal=journal)
+        assert not source_libpath.exists()
+        assert file_has_text(target_libpath / "a.txt", "a")
+
+    def test_move_tree_skips_copies_verified_before_interruption(
+        self,
+        tmp_path_factory: pytest.TempPathFactory,
+    ) -> None:
+        # Set up file system
+        parent_libpath = tmp_path_factory.mktemp("parent")
+        source_libpath = create_directory(parent_libpath, "source")
+        libpath_a = create_file(source_libpath, "a.txt", text="new")
+        target_libpath = create_directory(parent_libpath, "target")
+        create_file(target_libpath, "a.txt", text="old")
+
+        # Record a verified copy of the file, as if the move stopped before deleting the source
+        journal = MoveJournal()
+        journal.bind(str(source_libpath), str(target_libpath))
+        stat = libpath_a.stat()
+        journal.mark_copied("a.txt", stat.st_size, stat.st_mtime_ns)
+
+        # Resume the move
+        move_tree(str(source_libpath), str(target_libpath), journal=journal)
+
+        # Check the recorded copy was kept rather than copied again
+        assert not source_libpath.exists()
+        assert file_has_text(target_libpath / "a.txt", "old")
+
+    def test_move_tree_keeps_source_when_copy_differs(
+        self,
+        tmp_path_factory: pytest.TempPathFactory,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        # Set up file system
+        parent_libpath = tmp_path_factory.mktemp("parent")
+        source_libpath = create_directory(parent_libpath, "source")
+        create_file(source_libpath, "a.txt", text="abc")
+
+        def copy_corrupted(source: Path, target: Path) -> str:
+            target.write_bytes(bytes(source.stat().st_size))
+            return "buffered"
+
+        monkeypatch.setattr(resumable_move, "copy_file", copy_corrupted)
+
+        # Move tree with a copy that does not match its source
+        with pytest.raises(shutil.Error, match="Copy has different contents from its source"):
+            move_tree(str(source_libpath), str(parent_libpath / "target"))
+        assert file_has_text(source_libpath / "a.txt", "abc")
+
+    def test_move_tree_raises_on_journal_of_other_move(self, tmp_path_factory: pytest.TempPathFactory) -> None:
+        # Set up file system
+        parent_libpath = tmp_path_factory.mktemp("parent")
+        source_libpath = create_directory(parent_libpath, "source")
+        create_directory(parent_libpath, "target")
+        journal = MoveJournal()
+        journal.bind(str(parent_libpath / "other"), str(parent_libpath / "target"))
+
+        # Move tree with the wrong journal
+        with pytest.raises(ValueError, match="Journal belongs to a different move"):
+            move_tree(str(source_libpath), str(parent_libpath / "target"), journal=journal)
+
+    def test_move_tree_never_resumes_into_existing_target(self, tmp_path_factory: pytest.TempPathFactory) -> None:
+        # Set up file system
+        parent_libpath = tmp_path_factory.mktemp("parent")
+        source_libpath = create_directory(parent_libpath, "source")
+        create_file(source_libpath, "a.txt", text="new")
+        target_libpath = create_directory(parent_libpath, "target")
+        create_file(target_libpath, "a.txt", text="old")
+        journal_path = parent_libpath / "move.db"
+
+        # Move tree onto an existing directory twice with the same journal
+        for _ in range(2):
+            with MoveJournal(journal_path) as journal, pytest.raises(FileExistsError):
+                move_tree(str(source_libpath), str(target_libpath), journal=journal)
+
+        # Check nothing was moved into the existing directory
+        assert file_has_text(source_libpath / "a.txt", "new")
+        assert file_has_text(target_libpath / "a.txt", "old")
+
+    def test_move_tree_does_not_resume_into_replaced_target(self, tmp_path_factory: pytest.TempPathFactory) -> None:
+        # Set up file system
+        parent_libpath = tmp_path_factory.mktemp("parent")
+        source_libpath = create_directory(parent_libpath, "source")
+        create_file(source_libpath, "a.txt", text="new")
+        os.mkfifo(source_libpath / "pipe")
+        target_libpath = parent_libpath / "target"
+        journal_path = parent_libpath / "move.db"
+
+        # Interrupt a move, then replace its target with another directory
+        with MoveJournal(journal_path) as journal, pytest.raises(shutil.Error):
+            move_tree(str(source_libpath), str(target_libpath), journal=journal)
+        target_libpath.rename(parent_libpath / "moved")
+        create_file(create_directory(parent_libpath, "target"), "b.txt", text="old")
+
+        # Check the move is not resumed into the other directory
+        with MoveJournal(journal_path) as journal, pytest.raises(FileExistsError):
+            move_tree(str(source_libpath), str(target_libpath), journal=journal)
+        assert file_has_text(target_libpath / "b.txt", "old")
+
+    def test_move_tree_closes_default_journal_on_failure(
+        self,
+        tmp_path_factory: pytest.TempPathFactory,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        # Set up file system
+        parent_libpath = tmp_path_factory.mktemp("parent")
+        source_libpath = create_directory(parent_libpath, "source")
+        target_libpath = create_directory(parent_libpath, "target")
+        closed: list[MoveJournal] = []
+        close = MoveJournal.close
+        monkeypatch.setattr(MoveJournal, "close", lambda journal: (closed.append(journal), close(journal)))
+
+        # Move tree onto an existing directory without a journal
+        with pytest.raises(FileExistsError):
+            move_tree(str(source_libpath), str(target_libpath))
+
+        # Check the journal created for the move was closed
+        assert len(closed) == 1
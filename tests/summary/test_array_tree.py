@@ -0,0 +1,76 @@
+from pathlib import Path
+
+import pytest
+from dirstuff.summary.array_tree import ArrayTree
+from dirstuff.summary.filter_criteria import FilterCriteria
+from dirstuff.summary.parser import Parser
+from dirstuff.summary.tree import Tree
+from tests.utilities.temp_utilities import create_directory, create_file
+
+
+def build_tree() -> Tree:
+    root = Tree(Path("/data"), size=100)
+    for name, size, nested_size in [("logs", 60, 50), ("src", 30, 5), ("tmp", 10, 10)]:
+        child = Tree(Path("/data") / name, size=size)
+        child.add_child(Tree(Path("/data") / name / "cache", size=nested_size))
+        root.add_child(child)
+    return root
+
+
+class TestArrayTree:
+    def test_from_tree_shares_repeated_names(self) -> None:
+        array_tree = ArrayTree.from_tree(build_tree())
+        assert len(array_tree) == 7
+        assert array_tree.names == ["data", "logs", "cache", "src", "tmp"]
+        assert array_tree.get_size() == 100
+
+    def test_children_and_paths(self) -> None:
+        array_tree = ArrayTree.from_tree(build_tree())
+        children = list(array_tree.get_children(0))
+        assert [array_tree.get_name(child) for child in children] == ["logs", "src", "tmp"]
+        grandchild = array_tree.get_children(children[1])[0]
+        assert array_tree.get_path(grandchild) == Path("/data/src/cache")
+        assert array_tree.get_size(grandchild) == 5
+
+    def test_filter_drops_small_subtrees(self) -> None:
+        array_tree = ArrayTree.from_tree(build_tree())
+        filtered = array_tree.filter(FilterCriteria(min_bytes=10))
+        expected = build_tree().filter(FilterCriteria(min_bytes=10))
+        assert filtered.to_records() == expected.to_records()
+        assert filtered.names is array_tree.names
+
+    def test_print_matches_tree_print(self, capsys: pytest.CaptureFixture) -> None:
+        tree = build_tree()
+        tree.print()
+        tree.print_search(dir_name="cache")
+        expected = capsys.readouterr().out
+
+        array_tree = ArrayTree.from_tree(tree)
+        array_tree.print()
+        array_tree.print_search(dir_name="cache")
+        assert capsys.readouterr().out == expected
+
+    def test_parse_records_matches_parse(self, tmp_path_factory: pytest.TempPathFactory) -> None:
+        # Set up file system
+        root_libpath = tmp_path_factory.mktemp("root")
+        for i in range(3):
+            sub_libpath = create_directory(root_libpath, f"sub-{i}")
+            create_file(sub_libpath, "file.txt", text="x" * i)
+            nested_libpath = create_directory(sub_libpath, "nested")
+            create_file(nested_libpath, "file.txt", text="y" * i)
+
+        # Parse straight to records and through a tree
+        parser = Parser(filter_criteria=FilterCriteria(min_bytes=0))
+        records = parser.parse_records(root_libpath)
+
+        # Check both produce the same records
+        assert records == parser.parse(root_libpath).to_records()
+        assert ArrayTree.from_records(root_libpath, records).get_size() == 6
+
+    def test_top_k_matches_tree_top_k(self) -> None:
+        tree = build_tree()
+        array_tree = ArrayTree.from_tree(tree)
+        for max_depth in [None, 1]:
+            expected = [subtree.path for subtree in tree.top_k(4, max_depth=max_depth)]
+            top_indices = array_tree.top_k(4, max_depth=max_depth)
+            assert [array_tree.get_path(index) for index in top_indices] == expected
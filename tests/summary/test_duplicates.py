@@ -0,0 +1,48 @@
+import os
+
+import pytest
+from dirstuff.os.filesystem import Dir
+from dirstuff.summary.duplicates import DuplicateFinder, total_reclaimable_bytes
+from tests.utilities.temp_utilities import create_directory, create_file
+
+
+class TestDuplicateFinder:
+    def test_find_groups_identical_files(self, tmp_path_factory: pytest.TempPathFactory) -> None:
+        # Set up file system
+        root_libpath = tmp_path_factory.mktemp("root")
+        a_libpath = create_directory(root_libpath, "a")
+        b_libpath = create_directory(root_libpath, "b")
+        big_text = "x" * 200_000
+        create_file(a_libpath, "big.txt", text=big_text)
+        create_file(b_libpath, "big-copy.txt", text=big_text)
+        # Same size and edges as the big files, but different in the middle
+        create_file(b_libpath, "big-changed.txt", text=big_text[:100_000] + "y" + big_text[100_001:])
+        create_file(a_libpath, "small.txt", text="same")
+        create_file(b_libpath, "small-copy.txt", text="same")
+        create_file(b_libpath, "other.txt", text="diff")
+        create_file(a_libpath, "empty.txt")
+        create_file(b_libpath, "empty-copy.txt")
+
+        # Find duplicates
+        groups = DuplicateFinder(workers=2).find(Dir(root_libpath))
+
+        # Check only identical non-empty files are grouped, with the most reclaimable space first
+        assert [[file.libpath for file in group.files] for group in groups] == [
+            [a_libpath / "big.txt", b_libpath / "big-copy.txt"],
+            [a_libpath / "small.txt", b_libpath / "small-copy.txt"],
+        ]
+        assert [group.reclaimable_bytes for group in groups] == [200_000, 4]
+        assert total_reclaimable_bytes(groups) == 200_004
+
+    def test_find_skips_hardlinks(self, tmp_path_factory: pytest.TempPathFactory) -> None:
+        # Set up file system
+        root_libpath = tmp_path_factory.mktemp("root")
+        file_libpath = create_file(root_libpath, "file.txt", text="contents")
+        os.link(file_libpath, root_libpath / "link.txt")
+
+        # Check hardlinks to the same inode are not reported as duplicates
+        assert DuplicateFinder().find(Dir(root_libpath)) == []
+
+    def test_construct_finder_with_no_workers_raises(self) -> None:
+        with pytest.raises(ValueError, match="Number of workers must be at least 1: 0"):
+            DuplicateFinder(workers=0)
@@ -0,0 +1,61 @@
+import pytest
+from dirstuff.summary.extension_histogram import ExtensionHistogram, ExtensionSummary, get_extension
+from dirstuff.summary.filter_criteria import FilterCriteria
+from dirstuff.summary.parser import Parser
+from tests.utilities.temp_utilities import create_directory, create_file
+
+
+class TestExtensionHistogram:
+    @pytest.mark.parametrize(
+        ("name", "extension"),
+        [("data.parquet", ".parquet"), ("logs.tar.gz", ".gz"), (".bashrc", ""), ("README", ""), ("odd.", "")],
+    )
+    def test_get_extension_matches_file_extension(self, name: str, extension: str) -> None:
+        assert get_extension(name) == extension
+
+    def test_add_files_and_merge(self) -> None:
+        histogram = ExtensionHistogram()
+        histogram.add_files([("a.log", 5), ("b.log", 7), ("c.csv", 3)])
+        other = ExtensionHistogram()
+        other.add_files([("d.csv", 20)])
+        histogram.merge(other)
+        assert histogram.get_largest() == [ExtensionSummary(".csv", 23, 2), ExtensionSummary(".log", 12, 2)]
+        assert histogram.get_largest(1) == [ExtensionSummary(".csv", 23, 2)]
+        assert histogram.get(".txt") == ExtensionSummary(".txt", 0, 0)
+
+    @pytest.mark.parametrize(("workers", "processes"), [(1, 1), (2, 1), (1, 2)])
+    def test_parse_counts_extensions_per_subtree(
+        self,
+        tmp_path_factory: pytest.TempPathFactory,
+        workers: int,
+        processes: int,
+    ) -> None:
+        # Set up file system
+        root_libpath = tmp_path_factory.mktemp("root")
+        create_file(root_libpath, "notes.txt", text="abc")
+        for i in range(3):
+            sub_libpath = create_directory(root_libpath, f"sub-{i}")
+            create_file(sub_libpath, "data.parquet", text="p" * 10)
+            nested_libpath = create_directory(sub_libpath, "nested")
+            create_file(nested_libpath, "run.log", text="l" * i)
+
+        # Parse the directory, pruning the small nested directories
+        parser = Parser(
+            filter_criteria=FilterCriteria(min_bytes=5),
+            workers=workers,
+            processes=processes,
+            count_extensions=True,
+        )
+        tree = parser.parse(root_libpath)
+
+        # Check the root and each subtree count every file, including those in pruned directories
+        assert tree.extensions is not None
+        assert tree.extensions.get_largest() == [
+            ExtensionSummary(".parquet", 30, 3),
+            ExtensionSummary(".txt", 3, 1),
+            ExtensionSummary(".log", 3, 3),
+        ]
+        sub_tree = next(child for child in tree.children if child.name == "sub-2")
+        assert sub_tree.children == []
+        assert sub_tree.extensions is not None
+        assert sub_tree.extensions.get(".log") == ExtensionSummary(".log", 2, 1)
@@ -0,0 +1,60 @@
+import pickle
+
+import pytest
+from dirstuff.summary.filter_criteria import FilterCriteria
+from dirstuff.summary.largest_files import FileSummary, LargestFiles
+from dirstuff.summary.parser import Parser
+from tests.utilities.temp_utilities import create_directory, create_file
+
+
+class TestLargestFiles:
+    def test_add_keeps_largest_files(self) -> None:
+        largest_files = LargestFiles(2, n_files_per_dir=1)
+        largest_files.add("/a", [("x", 5), ("y", 1), ("z", 9)])
+        largest_files.add("/b", [("w", 7)])
+        assert largest_files.get_largest() == [FileSummary("/a/z", 9), FileSummary("/b/w", 7)]
+        assert largest_files.get_largest_by_dir() == {"/a": [FileSummary("/a/z", 9)], "/b": [FileSummary("/b/w", 7)]}
+
+    def test_merge_and_pickle(self) -> None:
+        largest_files = LargestFiles(2)
+        largest_files.add("/a", [("x", 5)])
+        other = pickle.loads(pickle.dumps(LargestFiles(2)))
+        other.add("/b", [("y", 3), ("z", 8)])
+        largest_files.merge(other)
+        assert [file.path for file in largest_files.get_largest()] == ["/b/z", "/a/x"]
+
+    def test_construct_with_no_files_raises(self) -> None:
+        with pytest.raises(ValueError, match="Number of files must be at least 1"):
+            LargestFiles(0)
+
+    @pytest.mark.parametrize(("workers", "processes"), [(1, 1), (2, 1), (1, 2)])
+    def test_parse_tracks_largest_files(
+        self,
+        tmp_path_factory: pytest.TempPathFactory,
+        workers: int,
+        processes: int,
+    ) -> None:
+        # Set up file system
+        root_libpath = tmp_path_factory.mktemp("root")
+        create_file(root_libpath, "top.txt", text="x" * 4)
+        for i in range(3):
+            sub_libpath = create_directory(root_libpath, f"sub-{i}")
+            nested_libpath = create_directory(sub_libpath, "nested")
+            create_file(nested_libpath, "big.bin", text="y" * (10 + i))
+            create_file(nested_libpath, "small.bin", text="z")
+
+        # Parse the directory while tracking the largest files
+        largest_files = LargestFiles(3, n_files_per_dir=1)
+        parser = Parser(
+            filter_criteria=FilterCriteria(min_bytes=100),
+            workers=workers,
+            processes=processes,
+            largest_files=largest_files,
+        )
+        parser.parse(root_libpath)
+
+        # Check files are tracked even in subtrees pruned from the tree
+        assert [(file.path, file.size) for file in largest_files.get_largest()] == [
+            (str(root_libpath / f"sub-{i}" / "nested" / "big.bin"), 10 + i) for i in [2, 1, 0]
+        ]
+        assert largest_files.get_largest_by_dir()[str(root_libpath)] == [FileSummary(str(root_libpath / "top.txt"), 4)]
@@ -0,0 +1,102 @@
+import io
+import sys
+from pathlib import Path
+
+import pytest
+from dirstuff.summary.array_tree import ArrayTree
+from dirstuff.summary.name_index import NameIndex
+from dirstuff.summary.tree import Tree
+
+
+class FlushCountingStream(io.StringIO):
+    def __init__(self) -> None:
+        super().__init__()
+        self.n_flushes = 0
+
+    def flush(self) -> None:
+        self.n_flushes += 1
+        super().flush()
+
+
+def build_tree() -> Tree:
+    root = Tree(Path("/code"), size=100)
+    for project, size in [("web", 60), ("api", 40)]:
+        child = Tree(project, size=size)
+        child.add_child(Tree("node_modules", size=size // 2))
+        child.add_child(Tree(".venv", size=size // 4))
+        child.add_child(Tree("__pycache__", size=1))
+        root.add_child(child)
+    return root
+
+
+class TestNameIndex:
+    def test_find_several_names_in_one_pass(self) -> None:
+        name_index = build_tree().get_name_index()
+        matches = name_index.find(["node_modules", ".venv", "missing"])
+        assert [str(tree.path) for tree in matches] == [
+            "/code/web/node_modules",
+            "/code/api/node_modules",
+            "/code/web/.venv",
+            "/code/api/.venv",
+        ]
+
+    def test_find_glob(self) -> None:
+        name_index = build_tree().get_name_index()
+        matches = name_index.find_glob(["__*__", "*.venv"])
+        assert sorted(str(tree.path) for tree in matches) == [
+            "/code/api/.venv",
+            "/code/api/__pycache__",
+            "/code/web/.venv",
+            "/code/web/__pycache__",
+        ]
+        assert name_index.find_glob(["venv", "*modules_"]) == []
+
+    def test_find_glob_matches_whole_names(self) -> None:
+        root = Tree(Path("/code"), size=3)
+        for name in ["node_x", "my_node_x", "foo", "xa.egg-info"]:
+            root.add_child(Tree(name, size=1))
+        name_index = root.get_name_index()
+        assert [tree.name for tree in name_index.find_glob(["node_*"])] == ["node_x"]
+        assert name_index.find_glob(["o", "*.egg"]) == []
+
+    def test_find_regex(self) -> None:
+        name_index = build_tree().get_name_index()
+        assert {tree.name for tree in name_index.find_regex(["^(web|api)$"])} == {"web", "api"}
+        assert name_index.find_regex([]) == []
+
+    def test_search_with_unknown_match_raises(self) -> None:
+        with pytest.raises(ValueError, match="Name match type not supported: fuzzy"):
+            NameIndex({}).search(["a"], match="fuzzy")  # type: ignore[arg-type]
+
+    def test_array_tree_index_matches_tree_index(self) -> None:
+        tree = build_tree()
+        array_tree = ArrayTree.from_tree(tree)
+        names = ["code", "node_modules", "__pycache__"]
+        expected = [tree.path for tree in tree.get_name_index().find(names)]
+        assert [array_tree.get_path(index) for index in array_tree.get_name_index().find(names)] == expected
+        assert array_tree.get_name_index() is array_tree.get_name_index()
+
+    def test_print_search_with_glob(self, capsys: pytest.CaptureFixture) -> None:
+        tree = build_tree()
+        tree.print_search(dir_name=["node_*"], match="glob")
+        output = capsys.readouterr().out
+        assert output.index("/code/web/node_modules") < output.index("/code/api/node_modules")
+
+    def test_print_search_flushes_once(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        out = FlushCountingStream()
+        monkeypatch.setattr(sys, "stdout", out)
+        tree = build_tree()
+        tree.print_search(dir_name=["node_modules", ".venv"])
+        ArrayTree.from_tree(tree).print_search(dir_name=["node_modules", ".venv"])
+        assert out.getvalue().count("\n") == 8
+        assert out.n_flushes == 2
+
+    def test_print_search_with_prebuilt_index(self, capsys: pytest.CaptureFixture) -> None:
+        tree = build_tree()
+        name_index = tree.get_name_index()
+        # A tree indexed before a directory was added is searched as it was when indexed
+        tree.children[0].add_child(Tree("node_modules", size=1))
+        tree.print_search(dir_name="node_modules", name_index=name_index)
+        assert capsys.readouterr().out.count("node_modules") == 2
+        tree.print_search(dir_name="node_modules")
+        assert capsys.readouterr().out.count("node_modules") == 3
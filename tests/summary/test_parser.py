@@ -0,0 +1,324 @@
+import asyncio
+import os
+import sys
+
+import pytest
+from dirstuff.summary.filter_criteria import FilterCriteria
+from dirstuff.summary.largest_files import LargestFiles
+from dirstuff.summary.parser import AsyncParser, Parser, read_dir
+from dirstuff.summary.scan_boundaries import ScanBoundaries
+from dirstuff.summary.tree import Tree
+from tests.utilities.temp_utilities import create_directory, create_file
+
+
+def tree_to_dict(tree: Tree) -> dict:
+    return {
+        "name": tree.path.name,
+        "size": tree.get_size(),
+        "children": sorted((tree_to_dict(child) for child in tree.children), key=lambda d: d["name"]),
+    }
+
+
+class TestParser:
+    def test_read_dir_sizes_files_and_lists_subdirs(self, tmp_path_factory: pytest.TempPathFactory) -> None:
+        # Set up file system
+        root_libpath = tmp_path_factory.mktemp("root")
+        create_file(root_libpath, "a.txt", text="12345")
+        create_file(root_libpath, "b.txt", text="123")
+        create_directory(root_libpath, "sub")
+
+        # Read the directory
+        files_size, subdir_names = read_dir(root_libpath)
+
+        # Check only direct files are sized and subdirs are listed
+        assert files_size == 8
+        assert subdir_names == ["sub"]
+
+    def test_parse_sums_sizes_bottom_up(self, tmp_path_factory: pytest.TempPathFactory) -> None:
+        # Set up file system
+        root_libpath = tmp_path_factory.mktemp("root")
+        create_file(root_libpath, "a.txt", text="1")
+        sub_libpath = create_directory(root_libpath, "sub")
+        create_file(sub_libpath, "b.txt", text="22")
+        nested_libpath = create_directory(sub_libpath, "nested")
+        create_file(nested_libpath, "c.txt", text="333")
+        create_directory(root_libpath, "empty")
+
+        # Parse the directory
+        parser = Parser(filter_criteria=FilterCriteria(min_bytes=0))
+        tree = parser.parse(root_libpath)
+
+        # Check the tree structure and sizes
+        assert tree.path == root_libpath
+        assert tree_to_dict(tree) == {
+            "name": root_libpath.name,
+            "size": 6,
+            "children": [
+                {"name": "empty", "size": 0, "children": []},
+                {
+                    "name": "sub",
+                    "size": 5,
+                    "children": [{"name": "nested", "size": 3, "children": []}],
+                },
+            ],
+        }
+        sub_tree = next(child for child in tree.children if child.path.name == "sub")
+        assert sub_tree.path == sub_libpath
+
+    def test_parse_skips_symlinked_dirs(self, tmp_path_factory: pytest.TempPathFactory) -> None:
+        # Set up file system
+        root_libpath = tmp_path_factory.mktemp("root")
+        target_libpath = tmp_path_factory.mktemp("target")
+        create_file(target_libpath, "big.txt", text="x" * 100)
+        os.symlink(target_libpath, root_libpath / "link")
+
+        # Parse the directory
+        parser = Parser(filter_criteria=FilterCriteria(min_bytes=0))
+        tree = parser.parse(root_libpath)
+
+        # Check the symlinked directory was not followed
+        assert tree.get_size() == 0
+        assert tree.children == []
+
+    def test_parse_handles_trees_deeper_than_recursion_limit(self, tmp_path_factory: pytest.TempPathFactory) -> None:
+        # Set up file system
+        root_libpath = tmp_path_factory.mktemp("root")
+        depth = sys.getrecursionlimit() + 10
+        libpaths = [root_libpath]
+        for _ in range(depth):
+            libpaths.append(create_directory(libpaths[-1], "d"))
+        leaf_libpath = create_file(libpaths[-1], "leaf.txt", text="leaf")
+
+        try:
+            # Parse the directory
+            parser = Parser(filter_criteria=FilterCriteria(min_bytes=0))
+            tree = parser.parse(root_libpath)
+
+            # Check the leaf size propagated all the way up
+            assert tree.get_size() == 4
+            n_levels = 0
+            while tree.children:
+                tree = tree.children[0]
+                n_levels += 1
+            assert n_levels == depth
+        finally:
+            # Clean up bottom-up, since the recursive shutil.rmtree used by pytest cannot remove a tree this deep
+            leaf_libpath.unlink()
+            for libpath in reversed(libpaths[1:]):
+                libpath.rmdir()
+
+    def test_parse_with_workers_matches_serial_parse(self, tmp_path_factory: pytest.TempPathFactory) -> None:
+        # Set up file system
+        root_libpath = tmp_path_factory.mktemp("root")
+        for i in range(5):
+            sub_libpath = create_directory(root_libpath, f"sub-{i}")
+            create_file(sub_libpath, "file.txt", text="x" * i)
+            for j in range(3):
+                nested_libpath = create_directory(sub_libpath, f"nested-{j}")
+                create_file(nested_libpath, "file.txt", text="y" * j)
+
+        # Parse the directory serially and in parallel
+        serial_tree = Parser(filter_criteria=FilterCriteria(min_bytes=0)).parse(root_libpath)
+        parallel_tree = Parser(filter_criteria=FilterCriteria(min_bytes=0), workers=4).parse(root_libpath)
+
+        # Check both parses produce the same tree
+        assert tree_to_dict(parallel_tree) == tree_to_dict(serial_tree)
+        assert parallel_tree.get_size() == 5 * (0 + 1 + 2) + (0 + 1 + 2 + 3 + 4)
+
+    @pytest.mark.parametrize(
+        ("workers", "processes"),
+        [(1, 1), (3, 1), (1, 2)],
+    )
+    def test_parse_prunes_small_subtrees(
+        self, tmp_path_factory: pytest.TempPathFactory, workers: int, processes: int
+    ) -> None:
+        # Set up file system
+        root_libpath = tmp_path_factory.mktemp("root")
+        for i in range(4):
+            sub_libpath = create_directory(root_libpath, f"sub-{i}")
+            create_file(sub_libpath, "file.txt", text="x" * i)
+            nested_libpath = create_directory(sub_libpath, "nested")
+            create_file(nested_libpath, "file.txt", text="y" * 2 * i)
+
+        # Parse with and without pruning
+        filter_criteria = FilterCriteria(min_bytes=4)
+        full_tree = Parser(filter_criteria=FilterCriteria(min_bytes=0)).parse(root_libpath)
+        parser = Parser(filter_criteria=filter_criteria, workers=workers, processes=processes)
+        pruned_tree = parser.parse(root_libpath)
+
+        # Check pruning during the parse matches filtering afterwards, and sizes still include pruned dirs
+        assert tree_to_dict(pruned_tree) == tree_to_dict(full_tree.filter(filter_criteria))
+        assert pruned_tree.get_size() == 3 * (0 + 1 + 2 + 3)
+        assert "sub-1" not in [child.name for child in pruned_tree.children]
+
+    def test_parse_records_prunes_small_subtrees(self, tmp_path_factory: pytest.TempPathFactory) -> None:
+        # Set up file system
+        root_libpath = tmp_path_factory.mktemp("root")
+        for i in range(4):
+            sub_libpath = create_directory(root_libpath, f"sub-{i}")
+            nested_libpath = create_directory(sub_libpath, "nested")
+            create_file(nested_libpath, "file.txt", text="y" * i)
+
+        # Parse straight to records with pruning
+        filter_criteria = FilterCriteria(min_bytes=2)
+        records = Parser(filter_criteria=filter_criteria).parse_records(root_libpath)
+
+        # Check the records match a filtered tree
+        full_tree = Parser(filter_criteria=FilterCriteria(min_bytes=0)).parse(root_libpath)
+        assert records == full_tree.filter(filter_criteria).to_records()
+
+    def test_stream_yields_completed_dirs_in_post_order(self, tmp_path_factory: pytest.TempPathFactory) -> None:
+        # Set up file system
+        root_libpath = tmp_path_factory.mktemp("root")
+        big_libpath = create_directory(root_libpath, "big")
+        create_file(big_libpath, "file.txt", text="x" * 10)
+        nested_libpath = create_directory(big_libpath, "nested")
+        create_file(nested_libpath, "file.txt", text="y" * 5)
+        small_libpath = create_directory(root_libpath, "small")
+        create_file(small_libpath, "file.txt", text="z")
+
+        # Stream the scan
+        parser = Parser(filter_criteria=FilterCriteria(min_bytes=5))
+        summaries = list(parser.stream(root_libpath))
+
+        # Check small dirs were dropped and every dir follows its subdirs
+        assert [(summary.path, summary.size, summary.depth) for summary in summaries] == [
+            (str(nested_libpath), 5, 2),
+            (str(big_libpath), 15, 1),
+            (str(root_libpath), 16, 0),
+        ]
+
+    def test_construct_parser_with_no_workers_raises(self) -> None:
+        with pytest.raises(ValueError, match="Number of workers must be at least 1: 0"):
+            Parser(filter_criteria=FilterCriteria(min_bytes=0), workers=0)
+
+    def test_parse_with_processes_matches_serial_parse(self, tmp_path_factory: pytest.TempPathFactory) -> None:
+        # Set up file system
+        root_libpath = tmp_path_factory.mktemp("root")
+        create_file(root_libpath, "top.txt", text="top")
+        for i in range(3):
+            sub_libpath = create_directory(root_libpath, f"sub-{i}")
+            for j in range(4):
+                nested_libpath = create_directory(sub_libpath, f"nested-{j}")
+                create_file(nested_libpath, "file.txt", text="z" * (i + j))
+                create_directory(nested_libpath, "leaf")
+
+        # Parse the directory serially and with a process pool
+        serial_tree = Parser(filter_criteria=FilterCriteria(min_bytes=0)).parse(root_libpath)
+        sharded_tree = Parser(filter_criteria=FilterCriteria(min_bytes=0), processes=2).parse(root_libpath)
+
+        # Check both parses produce the same tree
+        assert tree_to_dict(sharded_tree) == tree_to_dict(serial_tree)
+        assert sharded_tree.path == root_libpath
+
+    def test_parse_wide_root_with_processes_matches_serial_parse(
+        self,
+        tmp_path_factory: pytest.TempPathFactory,
+    ) -> None:
+        # Set up file system with many more subdirectories than shards, so that each process parses batches of them
+        root_libpath = tmp_path_factory.mktemp("root")
+        for i in range(50):
+            sub_libpath = create_directory(root_libpath, f"sub-{i}")
+            create_file(sub_libpath, "file.txt", text="z" * i)
+            create_directory(sub_libpath, "leaf")
+
+        # Parse the directory serially and with a process pool, tracking every file
+        serial_tree = Parser(filter_criteria=FilterCriteria(min_bytes=0)).parse(root_libpath)
+        largest_files = LargestFiles(100)
+        sharded_tree = Parser(
+            filter_criteria=FilterCriteria(min_bytes=0),
+            processes=2,
+            largest_files=largest_files,
+        ).parse(root_libpath)
+
+        # Check both parses produce the same tree and each file is tracked once
+        assert tree_to_dict(sharded_tree) == tree_to_dict(serial_tree)
+        assert sorted(file.size for file in largest_files.get_largest()) == list(range(50))
+
+    def test_construct_parser_with_no_processes_raises(self) -> None:
+        with pytest.raises(ValueError, match="Number of processes must be at least 1: 0"):
+            Parser(filter_criteria=FilterCriteria(min_bytes=0), processes=0)
+
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_parse_skips_excluded_paths(self, tmp_path_factory: pytest.TempPathFactory, workers: int) -> None:
+        # Set up file system
+        root_libpath = tmp_path_factory.mktemp("root")
+        keep_libpath = create_directory(root_libpath, "keep")
+        create_file(keep_libpath, "a.txt", text="12")
+        skip_libpath = create_directory(root_libpath, "skip")
+        create_file(skip_libpath, "b.txt", text="12345")
+
+        # Parse the directory without the excluded subdirectory
+        boundaries = ScanBoundaries(exclude_paths=[str(skip_libpath)])
+        parser = Parser(filter_criteria=FilterCriteria(min_bytes=0), workers=workers, boundaries=boundaries)
+        tree = parser.parse(root_libpath)
+
+        # Check the excluded subdirectory is neither listed nor sized
+        assert tree_to_dict(tree) == {
+            "name": root_libpath.name,
+            "size": 2,
+            "children": [{"name": "keep", "size": 2, "children": []}],
+        }
+
+    def test_parse_on_one_filesystem_matches_serial_parse(self, tmp_path_factory: pytest.TempPathFactory) -> None:
+        # Set up file system
+        root_libpath = tmp_path_factory.mktemp("root")
+        sub_libpath = create_directory(root_libpath, "sub")
+        create_file(sub_libpath, "a.txt", text="123")
+        create_directory(sub_libpath, "nested")
+
+        # Parse the directory with and without the device boundary
+        serial_tree = Parser(filter_criteria=FilterCriteria(min_bytes=0)).parse(root_libpath)
+        boundaries = ScanBoundaries(one_filesystem=True)
+        bounded_parser = Parser(filter_criteria=FilterCriteria(min_bytes=0), boundaries=boundaries)
+        bounded_records = bounded_parser.parse_records(root_libpath)
+
+        # Check a tree on a single device is scanned in full
+        assert bounded_records == serial_tree.to_records()
+
+
+class TestAsyncParser:
+    def test_parse_matches_serial_parse(self, tmp_path_factory: pytest.TempPathFactory) -> None:
+        # Set up file system
+        root_libpath = tmp_path_factory.mktemp("root")
+        for i in range(4):
+            sub_libpath = create_directory(root_libpath, f"sub-{i}")
+            create_file(sub_libpath, "file.txt", text="x" * i)
+            nested_libpath = create_directory(sub_libpath, "nested")
+            create_file(nested_libpath, "file.txt", text="y" * i)
+
+        # Parse the directory serially and asynchronously
+        serial_tree = Parser(filter_criteria=FilterCriteria(min_bytes=0)).parse(root_libpath)
+        async_parser = AsyncParser(filter_criteria=FilterCriteria(min_bytes=0), concurrency=3)
+        async_tree = asyncio.run(async_parser.parse(root_libpath))
+
+        # Check both parses produce the same tree
+        assert tree_to_dict(async_tree) == tree_to_dict(serial_tree)
+        assert async_tree.get_size() == 2 * (0 + 1 + 2 + 3)
+
+    def test_parse_can_be_cancelled(self, tmp_path_factory: pytest.TempPathFactory) -> None:
+        # Set up file system
+        root_libpath = tmp_path_factory.mktemp("root")
+        for i in range(20):
+            create_directory(root_libpath, f"sub-{i}")
+
+        # Start a parse and cancel it before it finishes
+        async def parse_and_cancel() -> None:
+            async_parser = AsyncParser(filter_criteria=FilterCriteria(min_bytes=0))
+            task = asyncio.create_task(async_parser.parse(root_libpath))
+            await asyncio.sleep(0)
+            task.cancel()
+            await task
+
+        with pytest.raises(asyncio.CancelledError):
+            asyncio.run(parse_and_cancel())
+
+    def test_parse_raises_on_missing_root(self, tmp_path_factory: pytest.TempPathFactory) -> None:
+        root_libpath = tmp_path_factory.mktemp("root") / "missing"
+        async_parser = AsyncParser(filter_criteria=FilterCriteria(min_bytes=0))
+        with pytest.raises(FileNotFoundError):
+            asyncio.run(async_parser.parse(root_libpath))
+
+    def test_construct_async_parser_with_no_concurrency_raises(self) -> None:
+        with pytest.raises(ValueError, match="Concurrency must be at least 1: 0"):
+            AsyncParser(filter_criteria=FilterCriteria(min_bytes=0), concurrency=0)
@@ -0,0 +1,70 @@
+import struct
+from array import array
+from pathlib import Path
+
+import pytest
+from dirstuff.summary.records import (
+    CompactRecords,
+    TreeRecords,
+    index_children,
+    load_compact_snapshot,
+    load_snapshot,
+    save_snapshot,
+)
+
+
+class TestRecords:
+    def test_snapshot_round_trips(self, tmp_path_factory: pytest.TempPathFactory) -> None:
+        snapshot_libpath = tmp_path_factory.mktemp("snapshots") / "scan.snap"
+        records = TreeRecords(
+            names=["data", "café", "logs"],
+            parents=array("q", [-1, 0, 0]),
+            sizes=array("Q", [2**40, 2**40 - 5, 5]),
+        )
+
+        save_snapshot(snapshot_libpath, Path("/srv/data"), records)
+        root_path, loaded = load_snapshot(snapshot_libpath)
+
+        assert root_path == Path("/srv/data")
+        assert loaded == records
+
+    def test_load_snapshot_rejects_other_files(self, tmp_path_factory: pytest.TempPathFactory) -> None:
+        snapshot_libpath = tmp_path_factory.mktemp("snapshots") / "scan.snap"
+        snapshot_libpath.write_bytes(b"not a snapshot")
+        with pytest.raises(ValueError, match="File is not a dirstuff snapshot"):
+            load_snapshot(snapshot_libpath)
+
+    def test_compact_snapshot_round_trips(self, tmp_path_factory: pytest.TempPathFactory) -> None:
+        snapshot_libpath = tmp_path_factory.mktemp("snapshots") / "scan.snap"
+        records = TreeRecords(
+            names=["data", "logs", "logs", "old"],
+            parents=array("q", [-1, 0, 3, 0]),
+            sizes=array("Q", [10, 4, 1, 5]),
+        )
+        compact = CompactRecords.from_records(records)
+
+        save_snapshot(snapshot_libpath, Path("/srv/data"), compact)
+        root_path, loaded = load_compact_snapshot(snapshot_libpath)
+
+        assert root_path == Path("/srv/data")
+        assert loaded == compact
+        assert loaded.names == ["data", "logs", "old"]
+        assert list(loaded.child_offsets) == [0, 2, 2, 2, 3]
+        assert list(loaded.child_indices) == [1, 3, 2]
+        assert loaded.to_records() == records
+
+    def test_load_version_1_snapshot(self, tmp_path_factory: pytest.TempPathFactory) -> None:
+        snapshot_libpath = tmp_path_factory.mktemp("snapshots") / "scan.snap"
+        root_bytes, names_bytes = b"/srv/data", b"data\0logs\0logs"
+        with snapshot_libpath.open("wb") as file:
+            file.write(struct.pack("<4sHQIQ", b"DSTF", 1, 3, len(root_bytes), len(names_bytes)))
+            file.write(root_bytes + names_bytes)
+            array("q", [-1, 0, 1]).tofile(file)
+            array("Q", [3, 2, 1]).tofile(file)
+
+        root_path, loaded = load_compact_snapshot(snapshot_libpath)
+
+        assert root_path == Path("/srv/data")
+        assert loaded.names == ["data", "logs"]
+        assert list(loaded.name_ids) == [0, 1, 1]
+        assert (loaded.child_offsets, loaded.child_indices) == index_children(array("q", [-1, 0, 1]))
@@ -0,0 +1,52 @@
+import csv
+import io
+import json
+
+import pytest
+from dirstuff.summary.render import largest_first, render
+
+ENTRIES = [("/r", 10, 0), ("/r/a", 6, 1), ("/r/a/x", 3, 2), ("/r/a/y", 2, 2), ("/r/b", 4, 1)]
+
+
+class TestRender:
+    def test_render_text_without_color(self) -> None:
+        out = io.StringIO()
+        render(ENTRIES[:2], out)
+        assert out.getvalue() == " |->  10.0 B > /r\n   |->   6.0 B > /r/a\n"
+
+    def test_render_text_with_color(self) -> None:
+        out = io.StringIO()
+        render(ENTRIES[:1], out, color=True)
+        assert out.getvalue() == " |-> \x1b[34m 10.0 B\x1b[39m > \x1b[32m/r\x1b[39m\n"
+
+    def test_render_json_nests_children(self) -> None:
+        out = io.StringIO()
+        render(ENTRIES, out, output_format="json")
+        document = json.loads(out.getvalue())
+        assert [child["path"] for child in document["children"]] == ["/r/a", "/r/b"]
+        assert [child["size"] for child in document["children"][0]["children"]] == [3, 2]
+        assert document["children"][1]["children"] == []
+
+    def test_render_ndjson(self) -> None:
+        out = io.StringIO()
+        render(ENTRIES, out, output_format="ndjson")
+        records = [json.loads(line) for line in out.getvalue().splitlines()]
+        assert records[2] == {"path": "/r/a/x", "size": 3, "depth": 2}
+        assert len(records) == 5
+
+    def test_render_csv_in_batches(self) -> None:
+        entries = [(f"/r/{i}", i, 1) for i in range(10000)]
+        out = io.StringIO()
+        render(entries, out, output_format="csv")
+        rows = list(csv.reader(io.StringIO(out.getvalue())))
+        assert rows[0] == ["path", "size", "depth"]
+        assert rows[-1] == ["/r/9999", "9999", "1"]
+        assert len(rows) == 10001
+
+    def test_render_unknown_format_raises(self) -> None:
+        with pytest.raises(ValueError, match="Output format not supported: xml"):
+            render(ENTRIES, io.StringIO(), output_format="xml")  # type: ignore[arg-type]
+
+    def test_largest_first_with_limit(self) -> None:
+        assert largest_first([3, 9, 1, 7], key=lambda n: n) == [9, 7, 3, 1]
+        assert largest_first([3, 9, 1, 7], key=lambda n: n, limit=2) == [9, 7]
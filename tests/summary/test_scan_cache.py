@@ -0,0 +1,82 @@
+import os
+from pathlib import Path
+
+import pytest
+from dirstuff.summary.filter_criteria import FilterCriteria
+from dirstuff.summary.parser import Parser
+from dirstuff.summary.scan_cache import ScanCache
+from tests.utilities.temp_utilities import create_directory, create_file
+
+# A modification time safely outside the racy window of the cache
+OLD_MTIME_NS = 1_000_000_000 * 10**9
+
+
+def age_directories(root: Path) -> None:
+    for dirpath, _, _ in os.walk(root):
+        os.utime(dirpath, ns=(OLD_MTIME_NS, OLD_MTIME_NS))
+
+
+def build_root(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    root_libpath = tmp_path_factory.mktemp("root")
+    create_file(root_libpath, "a.txt", text="1")
+    for name in ["sub-a", "sub-b"]:
+        sub_libpath = create_directory(root_libpath, name)
+        create_file(sub_libpath, "b.txt", text="22")
+    age_directories(root_libpath)
+    return root_libpath
+
+
+class TestScanCache:
+    def test_rescan_of_unchanged_tree_hits_cache(self, tmp_path_factory: pytest.TempPathFactory) -> None:
+        root_libpath = build_root(tmp_path_factory)
+        cache_libpath = tmp_path_factory.mktemp("cache") / "cache.json"
+
+        # Scan once to populate the cache
+        cache = ScanCache.load(cache_libpath)
+        first_tree = Parser(filter_criteria=FilterCriteria(min_bytes=0), cache=cache).parse(root_libpath)
+        cache.save()
+        assert cache.hits == 0
+        assert cache.misses == 3
+
+        # Scan again with the persisted cache
+        cache = ScanCache.load(cache_libpath)
+        second_tree = Parser(filter_criteria=FilterCriteria(min_bytes=0), cache=cache).parse(root_libpath)
+        assert cache.hits == 3
+        assert cache.hit_rate == 1.0
+        assert second_tree.to_records() == first_tree.to_records()
+
+    def test_rescan_rereads_changed_directories(self, tmp_path_factory: pytest.TempPathFactory) -> None:
+        root_libpath = build_root(tmp_path_factory)
+        cache = ScanCache()
+        Parser(filter_criteria=FilterCriteria(min_bytes=0), cache=cache).parse(root_libpath)
+
+        # Add a file to one directory, which changes its mtime
+        sub_libpath = root_libpath / "sub-a"
+        create_file(sub_libpath, "c.txt", text="333")
+        os.utime(sub_libpath, ns=(OLD_MTIME_NS + 1, OLD_MTIME_NS + 1))
+
+        # Rescan and check only the changed directory was reread
+        cache.hits = cache.misses = 0
+        tree = Parser(filter_criteria=FilterCriteria(min_bytes=0), cache=cache).parse(root_libpath)
+        assert cache.hits == 2
+        assert cache.misses == 1
+        assert tree.get_size() == 1 + 2 + 2 + 3
+
+    def test_recently_modified_directories_are_not_cached(self, tmp_path_factory: pytest.TempPathFactory) -> None:
+        root_libpath = tmp_path_factory.mktemp("root")
+        cache = ScanCache()
+        parser = Parser(filter_criteria=FilterCriteria(min_bytes=0), cache=cache)
+        parser.parse(root_libpath)
+        parser.parse(root_libpath)
+        assert cache.hits == 0
+        assert cache.misses == 2
+
+    def test_load_rejects_other_versions(self, tmp_path_factory: pytest.TempPathFactory) -> None:
+        cache_libpath = tmp_path_factory.mktemp("cache") / "cache.json"
+        cache_libpath.write_text('{"version": 0, "dirs": {}}')
+        with pytest.raises(ValueError, match="Scan cache version not supported: 0"):
+            ScanCache.load(cache_libpath)
+
+    def test_cache_with_processes_raises(self) -> None:
+        with pytest.raises(ValueError, match="A scan cache cannot be shared between multiple processes"):
+            Parser(filter_criteria=FilterCriteria(min_bytes=0), processes=2, cache=ScanCache())
@@ -0,0 +1,135 @@
+from pathlib import Path
+
+import pytest
+from dirstuff.summary.filter_criteria import FilterCriteria
+from dirstuff.summary.tree import Tree
+
+
+def build_tree() -> Tree:
+    root = Tree(Path("/root"), size=60)
+    a = Tree(Path("/root/a"), size=40)
+    b = Tree(Path("/root/b"), size=20)
+    a_x = Tree(Path("/root/a/x"), size=30)
+    root.add_child(a)
+    root.add_child(b)
+    a.add_child(a_x)
+    return root
+
+
+class TestTree:
+    def test_to_records_flattens_in_preorder(self) -> None:
+        records = build_tree().to_records()
+        assert records.names == ["root", "a", "x", "b"]
+        assert list(records.parents) == [-1, 0, 1, 0]
+        assert list(records.sizes) == [60, 40, 30, 20]
+
+    def test_from_records_round_trips(self) -> None:
+        tree = build_tree()
+        loaded = Tree.from_records(Path("/root"), tree.to_records())
+        assert loaded.to_records() == tree.to_records()
+        assert [str(child.path) for child in loaded.children] == ["/root/a", "/root/b"]
+        assert loaded.children[0].children[0].path == Path("/root/a/x")
+
+    def test_save_and_load_round_trips(self, tmp_path_factory: pytest.TempPathFactory) -> None:
+        snapshot_libpath = tmp_path_factory.mktemp("snapshots") / "scan.snap"
+        tree = build_tree()
+        tree.save(snapshot_libpath)
+        loaded = Tree.load(snapshot_libpath)
+        assert loaded.path == Path("/root")
+        assert loaded.to_records() == tree.to_records()
+
+    def test_children_store_only_names(self) -> None:
+        tree = build_tree()
+        a_x = tree.children[0].children[0]
+        assert not hasattr(a_x, "__dict__")
+        assert a_x.name == "x"
+        assert a_x.parent is tree.children[0]
+        assert a_x.path == Path("/root/a/x")
+
+    def test_names_are_interned(self) -> None:
+        first = Tree("".join(["node", "_modules"]))
+        second = Tree("".join(["node_", "modules"]))
+        assert first.name is second.name
+
+    def test_root_at_filesystem_root_keeps_its_path(self) -> None:
+        root = Tree(Path("/"))
+        root.add_child(Tree("home"))
+        assert root.path == Path("/")
+        assert root.children[0].path == Path("/home")
+
+    def test_top_k_finds_largest_directories_in_order(self) -> None:
+        tree = build_tree()
+        assert [str(subtree.path) for subtree in tree.top_k(2)] == ["/root/a", "/root/a/x"]
+        assert [str(subtree.path) for subtree in tree.top_k(10)] == ["/root/a", "/root/a/x", "/root/b"]
+
+    def test_top_k_with_max_depth(self) -> None:
+        tree = build_tree()
+        assert [str(subtree.path) for subtree in tree.top_k(2, max_depth=1)] == ["/root/a", "/root/b"]
+
+    def test_lazy_filter_shares_nodes(self) -> None:
+        tree = build_tree()
+        view = tree.filter(FilterCriteria(min_bytes=25), lazy=True)
+        assert view.tree is tree
+        assert [child.tree for child in view.children] == [tree.children[0]]
+        assert [subtree.name for subtree in view.iter_trees()] == ["root", "a", "x"]
+
+    def test_lazy_filter_matches_filter(self, capsys: pytest.CaptureFixture) -> None:
+        tree = build_tree()
+        filter_criteria = FilterCriteria(min_bytes=25)
+        filtered = tree.filter(filter_criteria)
+        filtered.print()
+        filtered.print_search(dir_name="x")
+        expected = capsys.readouterr().out
+
+        view = tree.filter(filter_criteria, lazy=True)
+        view.print()
+        view.print_search(dir_name="x")
+        assert capsys.readouterr().out == expected
+        assert view.to_records() == filtered.to_records()
+        assert view.to_tree().to_records() == filtered.to_records()
+
+    def test_lazy_filters_chain(self) -> None:
+        tree = build_tree()
+        view = tree.filter(FilterCriteria(min_bytes=10), lazy=True).filter(FilterCriteria(min_bytes=35))
+        assert len(view.criteria) == 2
+        assert [subtree.name for subtree in view.iter_trees()] == ["root", "a"]
+        assert [subtree.name for subtree in view.top_k(5)] == ["a"]
+
+    def test_diff_ranks_changes_by_absolute_delta(self) -> None:
+        old = build_tree()
+        new = Tree(Path("/root"), size=55)
+        a = Tree("a", size=50)
+        a.add_child(Tree("x", size=30))
+        new.add_child(a)
+        new.add_child(Tree("c", size=5))
+
+        deltas = old.diff(new)
+        assert [(str(delta.path), delta.delta) for delta in deltas] == [
+            ("/root/b", -20),
+            ("/root/a", 10),
+            ("/root", -5),
+            ("/root/c", 5),
+        ]
+        assert [str(delta.path) for delta in old.diff(new, limit=2)] == ["/root/b", "/root/a"]
+
+    def test_diff_finds_growth_offset_by_deletion(self) -> None:
+        old = Tree(Path("/root"), size=20)
+        old.add_child(Tree("logs", size=10))
+        old.add_child(Tree("code", size=10))
+        new = Tree(Path("/root"), size=20)
+        new.add_child(Tree("dataset", size=10))
+        new.add_child(Tree("code", size=10))
+
+        deltas = old.diff(new)
+        assert sorted((str(delta.path), delta.delta) for delta in deltas) == [
+            ("/root/dataset", 10),
+            ("/root/logs", -10),
+        ]
+
+    def test_diff_of_identical_trees_is_empty(self) -> None:
+        assert build_tree().diff(build_tree()) == []
+
+    def test_walk_with_max_depth_and_limit(self) -> None:
+        tree = build_tree()
+        assert list(tree.walk(absolute=True, limit=1)) == [("/root", 60, 0), ("/root/a", 40, 1), ("/root/a/x", 30, 2)]
+        assert list(tree.walk(max_depth=1)) == [("root", 60, 0), ("a", 40, 1), ("b", 20, 1)]